@@ -0,0 +1,48 @@
+"""add hot path secondary indexes
+
+Revision ID: 0b079ef66388
+Revises: b583d6ce9d41
+Create Date: 2026-10-18 09:41:07.230518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b079ef66388'
+down_revision: Union[str, Sequence[str], None] = 'b583d6ce9d41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# MySQL has no partial indexes. Putting return_date last in the borrow lookup
+# index gives the same effect: "return_date IS NULL" is an index ref on InnoDB.
+INDEXES = [
+    ('ix_borrows_user_book_return', 'borrows', ['user_id', 'book_id', 'return_date']),
+    ('ix_borrows_return_due', 'borrows', ['return_date', 'due_date']),
+    ('ix_borrows_status_return', 'borrows', ['status', 'return_date']),
+    ('ix_borrows_user_status', 'borrows', ['user_id', 'status']),
+    ('ix_borrows_created_at_id', 'borrows', ['created_at', 'id']),
+    ('ix_reviews_book_created_at', 'reviews', ['book_id', 'created_at', 'id']),
+    ('ix_reviews_user_book', 'reviews', ['user_id', 'book_id']),
+    ('ix_notifications_recipient_read', 'notifications', ['recipient', 'read']),
+    ('ix_bookings_user_id', 'bookings', ['user_id']),
+    ('ix_bookings_status_date', 'bookings', ['status', 'expected_available_date']),
+    ('ix_users_created_at_id', 'users', ['created_at', 'id']),
+    ('ix_donation_requests_user_created_at', 'donation_requests', ['user_id', 'created_at']),
+    ('ix_donation_requests_created_at_id', 'donation_requests', ['created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
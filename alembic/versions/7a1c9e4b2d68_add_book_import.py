@@ -0,0 +1,52 @@
+"""add book isbn and import jobs
+
+Revision ID: 7a1c9e4b2d68
+Revises: 5e21c7a9d3f0
+Create Date: 2026-10-18 14:21:09.311042
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a1c9e4b2d68'
+down_revision: Union[str, Sequence[str], None] = '5e21c7a9d3f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column('isbn', sa.String(length=20), nullable=True))
+    op.create_index('ix_books_isbn', 'books', ['isbn'], unique=True)
+    op.create_index('ix_books_title_author', 'books', ['title', 'author'], unique=False)
+    op.create_table(
+        'book_import_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('file_path', sa.String(length=500), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', name='importstatus'), nullable=False),
+        sa.Column('last_line', sa.Integer(), nullable=False),
+        sa.Column('processed', sa.Integer(), nullable=False),
+        sa.Column('inserted', sa.Integer(), nullable=False),
+        sa.Column('updated', sa.Integer(), nullable=False),
+        sa.Column('failed', sa.Integer(), nullable=False),
+        sa.Column('errors', sa.Text(), nullable=True),
+        sa.Column('message', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_book_import_jobs_id'), 'book_import_jobs', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_book_import_jobs_id'), table_name='book_import_jobs')
+    op.drop_table('book_import_jobs')
+    op.drop_index('ix_books_title_author', table_name='books')
+    op.drop_index('ix_books_isbn', table_name='books')
+    op.drop_column('books', 'isbn')
@@ -0,0 +1,42 @@
+"""add media blobs
+
+Revision ID: a8d2c5e71f04
+Revises: f3b6d1a09c52
+Create Date: 2026-10-18 20:31:09.114372
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d2c5e71f04'
+down_revision: Union[str, Sequence[str], None] = 'f3b6d1a09c52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing media keeps its uploaded filenames until dedupe_media.py converts it
+    op.create_table(
+        'media_blobs',
+        sa.Column('name', sa.String(length=80), nullable=False),
+        sa.Column('folder', sa.String(length=20), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('content_type', sa.String(length=50), nullable=False),
+        sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.create_index('ix_media_blobs_ref_count_updated_at', 'media_blobs', ['ref_count', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_media_blobs_ref_count_updated_at', table_name='media_blobs')
+    op.drop_table('media_blobs')
@@ -0,0 +1,50 @@
+"""add book catalog indexes
+
+Revision ID: b583d6ce9d41
+Revises: 2c5df41c436f
+Create Date: 2026-10-18 09:20:41.512093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b583d6ce9d41'
+down_revision: Union[str, Sequence[str], None] = '2c5df41c436f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # average_rating is a sort key for keyset pagination, so it can't be NULL
+    op.execute("UPDATE books SET average_rating = 0 WHERE average_rating IS NULL")
+    op.alter_column('books', 'average_rating',
+               existing_type=mysql.FLOAT(),
+               nullable=False,
+               server_default=sa.text("'0'"))
+    op.create_index('ix_books_created_at_id', 'books', ['created_at', 'id'], unique=False)
+    op.create_index('ix_books_available_created_at', 'books', ['copies_available', 'created_at'], unique=False)
+    op.create_index('ix_books_category_created_at', 'books', ['category_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_books_format_created_at', 'books', ['format', 'created_at', 'id'], unique=False)
+    op.create_index('ix_books_author', 'books', ['author'], unique=False)
+    op.create_index('ix_books_average_rating_id', 'books', ['average_rating', 'id'], unique=False)
+    op.create_index('ix_books_updated_at', 'books', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_updated_at', table_name='books')
+    op.drop_index('ix_books_average_rating_id', table_name='books')
+    op.drop_index('ix_books_author', table_name='books')
+    op.drop_index('ix_books_format_created_at', table_name='books')
+    op.drop_index('ix_books_category_created_at', table_name='books')
+    op.drop_index('ix_books_available_created_at', table_name='books')
+    op.drop_index('ix_books_created_at_id', table_name='books')
+    op.alter_column('books', 'average_rating',
+               existing_type=mysql.FLOAT(),
+               nullable=True,
+               server_default=sa.text("'0'"))
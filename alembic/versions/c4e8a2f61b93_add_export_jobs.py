@@ -0,0 +1,62 @@
+"""add export jobs and watermarks
+
+Revision ID: c4e8a2f61b93
+Revises: 7a1c9e4b2d68
+Create Date: 2026-10-18 15:47:32.804117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a2f61b93'
+down_revision: Union[str, Sequence[str], None] = '7a1c9e4b2d68'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'export_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tables', sa.String(length=255), nullable=False),
+        sa.Column('format', sa.Enum('CSV', 'PARQUET', name='exportformat'), nullable=False),
+        sa.Column('incremental', sa.Boolean(), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', name='exportstatus'), nullable=False),
+        sa.Column('rows', sa.Integer(), nullable=False),
+        sa.Column('exported_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('artifacts', sa.Text(), nullable=True),
+        sa.Column('message', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_export_jobs_id'), 'export_jobs', ['id'], unique=False)
+    op.create_table(
+        'export_watermarks',
+        sa.Column('table_name', sa.String(length=64), nullable=False),
+        sa.Column('format', sa.Enum('CSV', 'PARQUET', name='exportformat'), nullable=False),
+        sa.Column('exported_until', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.PrimaryKeyConstraint('table_name', 'format'),
+    )
+    op.create_index('ix_borrows_updated_at', 'borrows', ['updated_at'], unique=False)
+    op.create_index('ix_users_updated_at', 'users', ['updated_at'], unique=False)
+    op.create_index('ix_reviews_updated_at', 'reviews', ['updated_at'], unique=False)
+    op.create_index('ix_reviews_created_at', 'reviews', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reviews_created_at', table_name='reviews')
+    op.drop_index('ix_reviews_updated_at', table_name='reviews')
+    op.drop_index('ix_users_updated_at', table_name='users')
+    op.drop_index('ix_borrows_updated_at', table_name='borrows')
+    op.drop_table('export_watermarks')
+    op.drop_index(op.f('ix_export_jobs_id'), table_name='export_jobs')
+    op.drop_table('export_jobs')
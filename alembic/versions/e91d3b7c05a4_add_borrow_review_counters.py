@@ -0,0 +1,62 @@
+"""add borrow and review counters
+
+Revision ID: e91d3b7c05a4
+Revises: c4e8a2f61b93
+Create Date: 2026-10-18 17:05:18.226590
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e91d3b7c05a4'
+down_revision: Union[str, Sequence[str], None] = 'c4e8a2f61b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BORROW_STATUS = sa.Enum('REQUESTED', 'ACCEPTED', 'ACTIVE', 'RETURNED', 'OVERDUE', 'REJECTED', name='borrowstatus')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'borrow_counters',
+        sa.Column('status', BORROW_STATUS, nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('status'),
+    )
+    op.create_table(
+        'user_borrow_counters',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status', BORROW_STATUS, nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('user_id', 'status'),
+    )
+    op.add_column('books', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the source tables
+    op.execute(
+        "INSERT INTO borrow_counters (status, total) "
+        "SELECT status, COUNT(*) FROM borrows GROUP BY status"
+    )
+    op.execute(
+        "INSERT INTO user_borrow_counters (user_id, status, total) "
+        "SELECT user_id, status, COUNT(*) FROM borrows GROUP BY user_id, status"
+    )
+    op.execute(
+        "UPDATE books SET "
+        "rating_sum = COALESCE((SELECT SUM(r.rating) FROM reviews r WHERE r.book_id = books.id), 0), "
+        "rating_count = (SELECT COUNT(*) FROM reviews r WHERE r.book_id = books.id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('books', 'rating_count')
+    op.drop_column('books', 'rating_sum')
+    op.drop_table('user_borrow_counters')
+    op.drop_table('borrow_counters')
@@ -0,0 +1,31 @@
+"""index borrows for the overdue job
+
+Revision ID: f3b6d1a09c52
+Revises: e91d3b7c05a4
+Create Date: 2026-10-18 19:12:40.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b6d1a09c52'
+down_revision: Union[str, Sequence[str], None] = 'e91d3b7c05a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Overdue readers now filter on status = OVERDUE; only the job compares due dates
+    op.create_index('ix_borrows_status_due', 'borrows', ['status', 'due_date'], unique=False)
+    op.drop_index('ix_borrows_return_due', table_name='borrows')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_borrows_return_due', 'borrows', ['return_date', 'due_date'], unique=False)
+    op.drop_index('ix_borrows_status_due', table_name='borrows')
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+from app.db.versioning import get_version_map
+from app.utils.http_cache import is_not_modified
+
+logger = logging.getLogger(__name__)
+
+# Tags a cached response can depend on; CRUD modules invalidate them on write
+BOOKS = "books"
+CATEGORIES = "categories"
+FEATURED = "featured"
+
+# Versioned tables (app.db.versioning) each tag's payloads are built from
+TAG_TABLES = {
+    BOOKS: ("books",),
+    CATEGORIES: ("categories",),
+    FEATURED: ("featured_books", "books"),
+}
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes, etag: str):
+        self.body = body
+        self.etag = etag
+
+
+# ------------------------------
+# Backends
+# ------------------------------
+class MemoryBackend:
+    """Per-worker LRU with a TTL per entry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._versions = {}
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value, ttl: int):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def version(self, tag: str) -> int:
+        return self._versions.get(tag, 0)
+
+    def bump(self, tag: str):
+        with self._lock:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    """Shared across workers; needs the optional `redis` package."""
+
+    def __init__(self, url: str, prefix: str = "lms:cache:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str):
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value, ttl: int):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl)
+
+    def version(self, tag: str) -> int:
+        return int(self.client.get(self.prefix + "v:" + tag) or 0)
+
+    def bump(self, tag: str):
+        self.client.incr(self.prefix + "v:" + tag)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+
+# ------------------------------
+# Response cache
+# ------------------------------
+class ResponseCache:
+    """
+    Caches serialized JSON responses keyed by route, query string and the current
+    version of every tag the response depends on, so entries for an older version
+    are never served again and age out of the LRU.
+
+    A tag's version combines the backend counter, which invalidate(tag) bumps in the
+    writing worker, with the table_versions rows of its tables, which every writer
+    bumps and a background thread re-reads every poll_seconds. Writes made by other
+    workers therefore reach a per-worker backend within poll_seconds.
+    """
+
+    def __init__(self, backend, ttl: int, max_age: int, poll_seconds: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_age = max_age
+        self.poll_seconds = poll_seconds
+        self.hits = 0
+        self.misses = 0
+        self._table_versions = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _version(self, tag: str) -> str:
+        shared = ".".join(str(self._table_versions.get(table, 0)) for table in TAG_TABLES.get(tag, ()))
+        return f"{shared}.{self.backend.version(tag)}"
+
+    def _key(self, request: Request, tags: Iterable[str]) -> str:
+        query = sorted(request.query_params.multi_items())
+        versions = ",".join(f"{tag}={self._version(tag)}" for tag in sorted(tags))
+        # base_url is part of the key because book payloads embed absolute media URLs
+        return f"{request.base_url}|{request.url.path}|{query}|{versions}"
+
+    def _respond(self, request: Request, entry: CachedResponse) -> Response:
+        headers = {"ETag": entry.etag, "Cache-Control": f"public, max-age={self.max_age}"}
+        if is_not_modified(request, entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    @staticmethod
+    def _encode(data) -> CachedResponse:
+        if isinstance(data, bytes):
+            body = data  # already encoded by the route
+        else:
+            body = json.dumps(jsonable_encoder(data), separators=(",", ":")).encode()
+        return CachedResponse(body, '"' + hashlib.sha1(body).hexdigest() + '"')
+
+    def _store(self, key: str, data) -> CachedResponse:
+        entry = self._encode(data)
+        self.backend.set(key, entry, self.ttl)
+        return entry
+
+    def respond(self, request: Request, tags: Iterable[str], build: Callable) -> Response:
+        """Serve from cache, or call build() for the payload and cache it."""
+        if self.backend is None:
+            return self._respond(request, self._encode(build()))
+        key = self._key(request, tags)
+        entry = self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+            entry = self._store(key, build())
+        else:
+            self.hits += 1
+        return self._respond(request, entry)
+
+    async def respond_async(self, request: Request, tags: Iterable[str], build: Callable) -> Response:
+        """respond() for an async build() coroutine function."""
+        if self.backend is None:
+            return self._respond(request, self._encode(await build()))
+        key = self._key(request, tags)
+        entry = self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+            entry = self._store(key, await build())
+        else:
+            self.hits += 1
+        return self._respond(request, entry)
+
+    def invalidate(self, *tags: str):
+        if self.backend is not None:
+            for tag in tags:
+                self.backend.bump(tag)
+
+    # ------------------------------
+    # Table version polling
+    # ------------------------------
+    def refresh_versions(self, db):
+        """Re-read the table versions behind every tag."""
+        tables = {table for names in TAG_TABLES.values() for table in names}
+        self._table_versions = get_version_map(db, tables)
+
+    def _loop(self, session_factory):
+        while True:
+            try:
+                with session_factory() as db:
+                    self.refresh_versions(db)
+            except Exception:
+                logger.exception("Could not read table versions for the response cache")
+            if self._stop.wait(self.poll_seconds):
+                return
+
+    def start(self, session_factory):
+        if self.backend is None or self.poll_seconds <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, args=(session_factory,), name="response-cache-versions", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+def _create_backend():
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisBackend(settings.RESPONSE_CACHE_URL)
+    if settings.RESPONSE_CACHE_BACKEND == "memory":
+        return MemoryBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+    return None
+
+
+response_cache = ResponseCache(
+    _create_backend(),
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    max_age=settings.RESPONSE_CACHE_MAX_AGE_SECONDS,
+    poll_seconds=settings.RESPONSE_CACHE_VERSION_POLL_SECONDS,
+)
@@ -0,0 +1,164 @@
+import mimetypes
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.book import Book
+from app.utils import media_store, uploads
+from app.utils.book_serializer import MEDIA_DIRS
+from app.utils.http_cache import file_etag
+
+# Book columns served by /download/pdf and /play/audio, and their fallback type
+SERVED_COLUMNS = {"pdf_file": "application/pdf", "audio_file": "audio/mpeg"}
+
+# Columns an entry is built from; changing one drops the book's entries
+CACHED_COLUMNS = ("title",) + tuple(SERVED_COLUMNS)
+
+MEDIA_TYPES = {extension: mime_type for mime_type, extension in uploads.EXTENSIONS.items()}
+
+
+@dataclass(frozen=True)
+class MediaFile:
+    """Where one media column of a book points: an external URL, or a local file with its validators."""
+
+    url: Optional[str] = None
+    path: Optional[str] = None
+    stat: Optional[os.stat_result] = None
+    key: Optional[str] = None  # media store key, "<folder>/<name>"
+    media_type: Optional[str] = None
+    filename: Optional[str] = None  # download name, from the book title
+    etag: Optional[str] = None  # the sha256 for content-addressed files
+
+    @property
+    def last_modified(self) -> datetime:
+        return datetime.fromtimestamp(self.stat.st_mtime, timezone.utc)
+
+
+def build_media_file(column: str, value: str, title: str) -> Optional[MediaFile]:
+    """MediaFile for a column value as stored on the book; None when the file is not there."""
+    if value.startswith("http"):
+        return MediaFile(url=value)
+    key = f"{MEDIA_DIRS[column]}/{value}"
+    try:
+        path = media_store.get_backend().local_path(key)
+        stat = os.stat(path) if path else None
+    except (OSError, ValueError):
+        return None
+    if stat is None:
+        return None
+    extension = os.path.splitext(value)[1].lower()
+    media_type = MEDIA_TYPES.get(extension) or mimetypes.guess_type(value)[0] or SERVED_COLUMNS[column]
+    return MediaFile(
+        path=path, stat=stat, key=key, media_type=media_type,
+        filename=uploads.safe_filename(title) + extension, etag=file_etag(value, stat),
+    )
+
+
+class MediaFileCache:
+    """
+    TTL + LRU cache of MediaFiles keyed by (book id, column), so repeat range requests
+    of a player never touch the database.
+
+    ORM writes to a book's title or media columns invalidate its entries (see the
+    listeners below); bulk UPDATEs must call invalidate() or clear() themselves. Other
+    workers see such a change within ttl seconds, which is safe for content-addressed
+    files: the garbage collector keeps them for MEDIA_GC_GRACE_HOURS after their last
+    reference goes.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, book_id: int, column: str) -> Optional[MediaFile]:
+        key = (book_id, column)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, book_id: int, column: str, media_file: MediaFile):
+        key = (book_id, column)
+        with self._lock:
+            self._entries[key] = (media_file, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, book_id: int):
+        with self._lock:
+            for column in SERVED_COLUMNS:
+                self._entries.pop((book_id, column), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+media_file_cache = MediaFileCache(settings.MEDIA_FILE_CACHE_TTL_SECONDS, settings.MEDIA_FILE_CACHE_MAX_SIZE)
+
+
+# ------------------------------
+# Invalidation
+# ------------------------------
+def _defer(book: Book):
+    # Drop again after commit, in case a concurrent request re-cached the old row
+    inspect(book).session.info.setdefault("media_cache_invalidate", set()).add(book.id)
+
+
+@event.listens_for(Book, "after_update")
+def _invalidate_on_update(mapper, connection, book):
+    state = inspect(book)
+    if any(state.attrs[name].history.has_changes() for name in CACHED_COLUMNS):
+        media_file_cache.invalidate(book.id)
+        _defer(book)
+
+
+@event.listens_for(Book, "after_delete")
+def _invalidate_on_delete(mapper, connection, book):
+    media_file_cache.invalidate(book.id)
+    _defer(book)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for book_id in session.info.pop("media_cache_invalidate", ()):
+        media_file_cache.invalidate(book_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("media_cache_invalidate", None)
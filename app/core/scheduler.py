@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.media import collect_garbage
+from app.crud.status_jobs import expire_bookings, mark_overdue_borrows
+from app.db.session import SessionLocal
+from app.utils.uploads import purge_stale_sessions
+
+logger = logging.getLogger(__name__)
+
+
+class JobStats:
+    """Run metrics of one scheduled job."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.runs = 0
+        self.failures = 0
+        self.rows = 0
+        self.total_seconds = 0.0
+        self.last_started: Optional[datetime] = None
+        self.last_seconds: Optional[float] = None
+        self.last_result: Optional[dict] = None
+        self.last_error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "rows": self.rows,
+            "avg_ms": round(self.total_seconds * 1000 / self.runs, 3) if self.runs else 0.0,
+            "last_started": self.last_started.isoformat() if self.last_started else None,
+            "last_ms": round(self.last_seconds * 1000, 3) if self.last_seconds is not None else None,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+
+class JobScheduler:
+    """
+    Runs registered jobs every `interval` seconds on one daemon thread, each with a
+    fresh session. Jobs return a dict of counts ("rows" is summed into the metrics).
+    Running it in several workers is safe for the status jobs, which lock and
+    compare-and-set their rows, but only one process should: SCHEDULER_ENABLED is off
+    by default and is turned on for one process (or run_jobs.py runs the jobs).
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self._session_factory = session_factory
+        self._jobs: Dict[str, Callable[[Session], dict]] = {}
+        self._stats: Dict[str, JobStats] = {}
+        self._due: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_job(self, name: str, func: Callable[[Session], dict], interval: float):
+        with self._lock:
+            self._jobs[name] = func
+            self._stats[name] = JobStats(interval)
+            self._due[name] = time.monotonic()
+
+    def run_job(self, name: str) -> dict:
+        """Run one job now, in the calling thread, and record its metrics."""
+        func, stats = self._jobs[name], self._stats[name]
+        started, start = datetime.utcnow(), time.perf_counter()
+        db = self._session_factory()
+        result, error = None, None
+        try:
+            result = func(db)
+        except Exception as e:
+            db.rollback()
+            error = f"{type(e).__name__}: {e}"[:500]
+            logger.exception("Scheduled job %s failed", name)
+        finally:
+            db.close()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            stats.runs += 1
+            stats.total_seconds += elapsed
+            stats.last_started, stats.last_seconds = started, elapsed
+            stats.last_result, stats.last_error = result, error
+            if error:
+                stats.failures += 1
+            else:
+                stats.rows += (result or {}).get("rows", 0)
+        return result
+
+    def run_pending(self, names: Optional[List[str]] = None):
+        """Run the jobs (all, or just `names`) whose interval has elapsed."""
+        now = time.monotonic()
+        with self._lock:
+            pending = [name for name, due in self._due.items() if due <= now and (names is None or name in names)]
+            for name in pending:
+                self._due[name] = now + self._stats[name].interval
+        for name in pending:
+            self.run_job(name)
+
+    def _loop(self, tick: float):
+        while not self._stop.wait(tick):
+            self.run_pending()
+
+    def start(self, tick: float = 1.0):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(tick,), name="job-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def job_stats(self, name: str) -> Optional[dict]:
+        with self._lock:
+            stats = self._stats.get(name)
+            return stats.as_dict() if stats else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "jobs": {name: stats.as_dict() for name, stats in self._stats.items()},
+            }
+
+
+
+# ------------------------------
+# Registered jobs
+# ------------------------------
+scheduler = JobScheduler(SessionLocal)
+scheduler.add_job("mark_overdue_borrows", mark_overdue_borrows, settings.OVERDUE_JOB_INTERVAL_SECONDS)
+scheduler.add_job("expire_bookings", expire_bookings, settings.BOOKING_EXPIRY_JOB_INTERVAL_SECONDS)
+scheduler.add_job("purge_stale_uploads", purge_stale_sessions, 3600)
+scheduler.add_job("collect_media_garbage", collect_garbage, settings.MEDIA_GC_INTERVAL_SECONDS)
@@ -0,0 +1,182 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.book import Book
+from app.models.category import Category
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Relevance weight of a match per indexed field
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "author": 2.0,
+    "category": 1.5,
+    "description": 1.0,
+}
+
+# A prefix hit ("harr" -> "harry") scores lower than an exact token hit
+PREFIX_FACTOR = 0.6
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return TOKEN_RE.findall(text.lower())
+
+
+class BookSearchIndex:
+    """
+    In-process inverted index over book title, author, description and category name.
+
+    Writes going through app.crud.book update the index immediately; changes made by
+    other workers are picked up by sync() through an updated_at watermark.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._doc_terms: Dict[int, set] = {}
+        self._terms: List[str] = []
+        self._terms_dirty = False
+        self._watermark = None
+        self._loaded = False
+        self._last_sync = 0.0
+
+    # ------------------------------
+    # Index maintenance
+    # ------------------------------
+    def _add(self, book_id: int, title, author, description, category_name):
+        self._remove(book_id)
+        weights: Dict[str, float] = {}
+        fields = {"title": title, "author": author, "description": description, "category": category_name}
+        for field, text in fields.items():
+            for token in tokenize(text):
+                weights[token] = max(weights.get(token, 0.0), FIELD_WEIGHTS[field])
+        for token, weight in weights.items():
+            if token not in self._postings:
+                self._terms_dirty = True
+            self._postings[token][book_id] = weight
+        self._doc_terms[book_id] = set(weights)
+
+    def _remove(self, book_id: int):
+        for token in self._doc_terms.pop(book_id, ()):
+            docs = self._postings.get(token)
+            if docs is None:
+                continue
+            docs.pop(book_id, None)
+            if not docs:
+                del self._postings[token]
+                self._terms_dirty = True
+
+    def index_book(self, book: Book):
+        category_name = book.category.name if book.category else None
+        with self._lock:
+            self._add(book.id, book.title, book.author, book.description, category_name)
+
+    def remove_book(self, book_id: int):
+        with self._lock:
+            self._remove(book_id)
+
+    def mark_stale(self):
+        """Force a full rebuild on the next sync (e.g. after a category rename)."""
+        with self._lock:
+            self._loaded = False
+
+    @staticmethod
+    def _document_query(db: Session):
+        return db.query(
+            Book.id, Book.title, Book.author, Book.description, Category.name, Book.updated_at
+        ).outerjoin(Category, Book.category_id == Category.id)
+
+    def rebuild(self, db: Session):
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._doc_terms = {}
+            self._watermark = None
+            for row in self._document_query(db).yield_per(1000):
+                self._add(row[0], row[1], row[2], row[3], row[4])
+                if self._watermark is None or row[5] > self._watermark:
+                    self._watermark = row[5]
+            self._terms_dirty = True
+            self._loaded = True
+            self._last_sync = time.monotonic()
+
+    def sync(self, db: Session, force: bool = False):
+        """Bring the index up to date with the books table."""
+        with self._lock:
+            if not self._loaded:
+                self.rebuild(db)
+                return
+            if not force and time.monotonic() - self._last_sync < settings.SEARCH_SYNC_INTERVAL_SECONDS:
+                return
+
+            latest, total = db.query(func.max(Book.updated_at), func.count(Book.id)).one()
+            if latest is not None and (self._watermark is None or latest > self._watermark):
+                changed = self._document_query(db)
+                if self._watermark is not None:
+                    changed = changed.filter(Book.updated_at >= self._watermark)
+                for row in changed.yield_per(1000):
+                    self._add(row[0], row[1], row[2], row[3], row[4])
+                self._watermark = latest
+
+            # Rows deleted by another worker leave no watermark trace
+            if total != len(self._doc_terms):
+                self.rebuild(db)
+                return
+            self._last_sync = time.monotonic()
+
+    # ------------------------------
+    # Querying
+    # ------------------------------
+    def _expand(self, token: str) -> List[str]:
+        if self._terms_dirty:
+            self._terms = sorted(self._postings)
+            self._terms_dirty = False
+        start = bisect_left(self._terms, token)
+        matches = []
+        for term in self._terms[start:]:
+            if not term.startswith(token):
+                break
+            matches.append(term)
+        return matches
+
+    def search(self, query: str, offset: int = 0, limit: int = 20) -> Tuple[List[int], int]:
+        """Return (ranked book ids for the requested page, total number of hits)."""
+        tokens = tokenize(query)
+        if not tokens:
+            return [], 0
+
+        with self._lock:
+            scores: Optional[Dict[int, float]] = None
+            for token in dict.fromkeys(tokens):
+                token_scores: Dict[int, float] = {}
+                for term in self._expand(token):
+                    factor = 1.0 if term == token else PREFIX_FACTOR
+                    for book_id, weight in self._postings[term].items():
+                        score = weight * factor
+                        if score > token_scores.get(book_id, 0.0):
+                            token_scores[book_id] = score
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        book_id: score + token_scores[book_id]
+                        for book_id, score in scores.items()
+                        if book_id in token_scores
+                    }
+                if not scores:
+                    return [], 0
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return [book_id for book_id, _ in ranked[offset:offset + limit]], len(ranked)
+
+
+book_index = BookSearchIndex()
@@ -0,0 +1,86 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.versioning import get_versions
+from app.models.settings import AdminSettings
+
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    """Read-only copy of the admin_settings row, safe to share across requests."""
+
+    borrow_day_limit: Optional[int]
+    borrow_extend_limit: Optional[int]
+    borrow_book_limit: Optional[int]
+    booking_days_limit: Optional[int]
+
+    @classmethod
+    def from_row(cls, row: AdminSettings) -> "SettingsSnapshot":
+        return cls(
+            borrow_day_limit=row.borrow_day_limit,
+            borrow_extend_limit=row.borrow_extend_limit,
+            borrow_book_limit=row.borrow_book_limit,
+            booking_days_limit=row.booking_days_limit,
+        )
+
+
+class SettingsCache:
+    """
+    Per-worker copy of the admin settings. Every write to admin_settings bumps its
+    table version (app.db.versioning); the cache compares that version at most every
+    poll_seconds with one primary-key read and reloads the row when it moved, so all
+    workers converge within poll_seconds. The writing worker invalidates immediately.
+    """
+
+    def __init__(self, poll_seconds: float):
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._snapshot: Optional[SettingsSnapshot] = None
+        self._version: Optional[str] = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.polls = 0
+        self.reloads = 0
+
+    def get(self, db: Session, load: Callable[[Session], AdminSettings]) -> SettingsSnapshot:
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._checked_at < self.poll_seconds:
+                self.hits += 1
+                return self._snapshot
+            snapshot, known = self._snapshot, self._version
+
+        version, _ = get_versions(db, ["admin_settings"])
+        if snapshot is not None and version == known:
+            with self._lock:
+                self.polls += 1
+                self._checked_at = time.monotonic()
+            return snapshot
+
+        snapshot = SettingsSnapshot.from_row(load(db))
+        with self._lock:
+            self.reloads += 1
+            self._snapshot, self._version, self._checked_at = snapshot, version, time.monotonic()
+        return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+            self._version = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "poll_seconds": self.poll_seconds,
+                "version": self._version,
+                "hits": self.hits,
+                "polls": self.polls,
+                "reloads": self.reloads,
+            }
+
+
+settings_cache = SettingsCache(settings.SETTINGS_CACHE_POLL_SECONDS)
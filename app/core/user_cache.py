@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import User, UserRoleEnum
+
+# Columns whose change must be visible to the very next authenticated request
+AUTH_COLUMNS = ("username", "role", "is_active", "password")
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Read-only snapshot of the authenticated user, safe to share across requests."""
+
+    id: int
+    username: str
+    name: str
+    email: str
+    role: UserRoleEnum
+    is_active: bool
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            name=user.name,
+            email=user.email,
+            role=user.role,
+            is_active=bool(user.is_active),
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+
+class UserCache:
+    """
+    TTL + LRU cache of Principals keyed by JWT subject (username).
+
+    ORM updates to a user's username, role, is_active or password invalidate its
+    entry (see the listeners below); bulk UPDATEs must call invalidate() themselves.
+    Other workers see such a change within ttl seconds.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, username: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[username]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(username)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, principal: Principal):
+        with self._lock:
+            self._entries[principal.username] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(principal.username)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, username: str):
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+user_cache = UserCache(settings.USER_CACHE_TTL_SECONDS, settings.USER_CACHE_MAX_SIZE)
+
+
+# ------------------------------
+# Invalidation
+# ------------------------------
+def _changed_usernames(user: User) -> set:
+    state = inspect(user)
+    if not any(state.attrs[name].history.has_changes() for name in AUTH_COLUMNS):
+        return set()
+    names = {user.username}
+    names.update(state.attrs.username.history.deleted or ())
+    return names
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_update(mapper, connection, user):
+    names = _changed_usernames(user)
+    for name in names:
+        user_cache.invalidate(name)
+    if names:
+        # Drop again after commit, in case a concurrent request re-cached the old row
+        inspect(user).session.info.setdefault("user_cache_invalidate", set()).update(names)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_on_delete(mapper, connection, user):
+    user_cache.invalidate(user.username)
+    inspect(user).session.info.setdefault("user_cache_invalidate", set()).add(user.username)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for name in session.info.pop("user_cache_invalidate", ()):
+        user_cache.invalidate(name)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("user_cache_invalidate", None)
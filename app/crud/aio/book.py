@@ -0,0 +1,142 @@
+from typing import Callable
+
+from anyio import to_thread
+from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.book import Book
+from app.schemas.book import BookFilter, BookSortEnum
+from app.core.search import book_index
+from app.core.cache import response_cache, BOOKS, CATEGORIES, FEATURED
+from app.core.media_cache import build_media_file, media_file_cache
+from app.crud.book import SORT_COLUMNS, filter_books
+from app.utils.pagination import paginate_async, DEFAULT_PAGE_SIZE
+
+
+# ------------------------------
+# CRUD Operations (AsyncSession)
+# ------------------------------
+
+async def get_all_books(db: AsyncSession, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE, include_total: bool = False):
+    return await query_books(db, cursor=cursor, limit=limit, include_total=include_total)
+
+
+async def query_books(
+    db: AsyncSession,
+    filters: BookFilter = None,
+    sort: BookSortEnum = BookSortEnum.CREATED_AT,
+    descending: bool = True,
+    cursor: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_total: bool = False,
+):
+    stmt = filter_books(select(Book), filters or BookFilter())
+    return await paginate_async(
+        db, stmt, Book, cursor, limit, include_total,
+        sort_column=SORT_COLUMNS[sort], descending=descending,
+    )
+
+
+async def get_available_books(db: AsyncSession, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE, include_total: bool = False):
+    return await query_books(db, BookFilter(available=True), cursor=cursor, limit=limit, include_total=include_total)
+
+
+async def get_books_by_category(db: AsyncSession, category_id: int, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE, include_total: bool = False):
+    return await query_books(db, BookFilter(category_id=category_id), cursor=cursor, limit=limit, include_total=include_total)
+
+
+async def get_book(db: AsyncSession, book_id: int):
+    return await db.get(Book, book_id)
+
+
+async def get_media_file(session_factory: Callable[[], AsyncSession], book_id: int, column: str):
+    """
+    Where a book's pdf_file/audio_file points, cached per worker (app.core.media_cache).
+    Hits need no session at all; one is opened from session_factory on a miss.
+    """
+    media_file = media_file_cache.get(book_id, column)
+    if media_file is not None:
+        return media_file
+    async with session_factory() as db:
+        row = (await db.execute(
+            select(Book.title, getattr(Book, column)).where(Book.id == book_id)
+        )).first()
+    if row is None or not row[1]:
+        return None
+    media_file = await to_thread.run_sync(build_media_file, column, row[1], row[0])
+    if media_file is not None:
+        media_file_cache.set(book_id, column, media_file)
+    return media_file
+
+
+async def get_books_by_ids(db: AsyncSession, book_ids: list):
+    if not book_ids:
+        return []
+    result = await db.execute(select(Book).where(Book.id.in_(book_ids)))
+    books = {b.id: b for b in result.scalars()}
+    return [books[i] for i in book_ids if i in books]
+
+
+async def is_book_available(db: AsyncSession, book_id: int):
+    book = await get_book(db, book_id)
+    return book and book.copies_available > 0
+
+
+async def _index(db: AsyncSession, db_book: Book):
+    await db.refresh(db_book, ["category"])
+    book_index.index_book(db_book)
+
+
+async def create_book(db: AsyncSession, book_in: dict):
+    db_book = Book(**book_in)
+    db.add(db_book)
+    await db.commit()
+    await db.refresh(db_book)
+    await _index(db, db_book)
+    response_cache.invalidate(BOOKS, CATEGORIES, FEATURED)
+    return db_book
+
+
+async def update_book(db: AsyncSession, book_id: int, book_in: dict):
+    db_book = await db.get(Book, book_id)
+    if not db_book:
+        return None
+    for field, value in book_in.items():
+        setattr(db_book, field, value)
+    await db.commit()
+    await db.refresh(db_book)
+    await _index(db, db_book)
+    response_cache.invalidate(BOOKS, CATEGORIES, FEATURED)
+    return db_book
+
+
+async def delete_book(db: AsyncSession, book_id: int):
+    db_book = await db.get(Book, book_id)
+    if not db_book:
+        return None
+    try:
+        await db.delete(db_book)
+        await db.commit()
+        book_index.remove_book(book_id)
+        response_cache.invalidate(BOOKS, CATEGORIES, FEATURED)
+        return {"message": f"Book with id {book_id} deleted successfully."}
+    except Exception as e:
+        await db.rollback()
+        raise e
+
+
+async def _top_books(db: AsyncSession, order_column, limit: int):
+    # id breaks ties so equal values keep a stable order
+    result = await db.execute(select(Book).order_by(desc(order_column), desc(Book.id)).limit(limit))
+    return result.scalars().all()
+
+
+async def get_recommended_books(db: AsyncSession, limit: int = 10):
+    return await _top_books(db, Book.average_rating, limit)
+
+
+async def get_popular_books(db: AsyncSession, limit: int = 10):
+    return await _top_books(db, Book.copies_total, limit)
+
+
+async def get_new_collection(db: AsyncSession, limit: int = 10):
+    return await _top_books(db, Book.created_at, limit)
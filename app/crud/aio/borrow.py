@@ -0,0 +1,47 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from app.models import borrow as borrow_model
+from app.models.counter import BorrowCounter
+from app.utils.pagination import paginate_async, DEFAULT_PAGE_SIZE
+
+Borrow = borrow_model.Borrow
+BorrowStatus = borrow_model.BorrowStatus
+
+# BorrowResponse nests user and book
+_with_relations = (joinedload(Borrow.user), joinedload(Borrow.book))
+
+async def get_user_borrows(db: AsyncSession, user_id: int):
+    result = await db.execute(select(Borrow).options(*_with_relations).where(Borrow.user_id == user_id))
+    return result.scalars().all()
+
+async def get_borrow_by_id(db: AsyncSession, borrow_id: int):
+    result = await db.execute(select(Borrow).options(*_with_relations).where(Borrow.id == borrow_id))
+    return result.scalars().first()
+
+async def get_all_borrows(db: AsyncSession, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE, include_total: bool = False):
+    stmt = select(Borrow).options(*_with_relations)
+    return await paginate_async(db, stmt, Borrow, cursor, limit, include_total)
+
+async def get_active_borrows(db: AsyncSession, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE, include_total: bool = False):
+    stmt = select(Borrow).options(*_with_relations).where(
+        Borrow.return_date.is_(None),
+        Borrow.status == BorrowStatus.ACTIVE
+    )
+    return await paginate_async(db, stmt, Borrow, cursor, limit, include_total)
+
+async def get_overdue_borrows(db: AsyncSession, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE, include_total: bool = False):
+    # Set by the mark-overdue job (app.crud.status_jobs)
+    stmt = select(Borrow).options(*_with_relations).where(Borrow.status == BorrowStatus.OVERDUE)
+    return await paginate_async(db, stmt, Borrow, cursor, limit, include_total)
+
+async def get_borrow_stats(db: AsyncSession):
+    # Status totals are maintained by app.db.counters
+    result = await db.execute(select(BorrowCounter.status, BorrowCounter.total))
+    by_status = dict(result.all())
+    return {
+        "totalBorrows": sum(by_status.values()),
+        "activeBorrows": by_status.get(BorrowStatus.ACTIVE, 0),
+        "returnedBorrows": by_status.get(BorrowStatus.RETURNED, 0),
+        "overdueBorrows": by_status.get(BorrowStatus.OVERDUE, 0)
+    }
@@ -0,0 +1,82 @@
+from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.book import Book
+from app.models.category import Category
+from app.crud.category import book_counts_query, set_book_counts
+from app.schemas import category as category_schema
+from app.core.search import book_index
+from app.core.cache import response_cache, CATEGORIES
+
+async def _get(db: AsyncSession, category_id: int):
+    result = await db.execute(select(Category).where(Category.id == category_id))
+    return result.scalars().first()
+
+async def _with_book_counts(db: AsyncSession, categories: List[Category], breakdown: bool = False):
+    # One GROUP BY for the whole page instead of loading each category's books
+    if not categories:
+        return categories
+    result = await db.execute(book_counts_query([c.id for c in categories], breakdown))
+    return set_book_counts(categories, result.all(), breakdown)
+
+async def create_category(db: AsyncSession, request: category_schema.CategoryCreate):
+    existing = await db.execute(select(Category.id).where(Category.name.ilike(request.name)))
+    if existing.first():
+        return None
+
+    category = Category(name=request.name, description=request.description)
+    db.add(category)
+    await db.commit()
+    response_cache.invalidate(CATEGORIES)
+    category = await _get(db, category.id)
+    # A new category has no books yet
+    category.book_count = 0
+    return category
+
+async def get_category_by_id(db: AsyncSession, category_id: int, breakdown: bool = False):
+    category = await _get(db, category_id)
+    if category:
+        await _with_book_counts(db, [category], breakdown)
+    return category
+
+async def get_all_categories(db: AsyncSession, skip: int = 0, limit: int = 10, breakdown: bool = False):
+    result = await db.execute(select(Category).offset(skip).limit(limit))
+    return await _with_book_counts(db, result.scalars().all(), breakdown)
+
+async def get_all_categories_list(db: AsyncSession, breakdown: bool = False):
+    result = await db.execute(select(Category))
+    return await _with_book_counts(db, result.scalars().all(), breakdown)
+
+async def update_category(db: AsyncSession, category_id: int, request: category_schema.CategoryUpdate):
+    category = await _get(db, category_id)
+    if not category:
+        return None
+
+    duplicate = await db.execute(
+        select(Category.id).where(Category.name.ilike(request.name), Category.id != category_id)
+    )
+    if duplicate.first():
+        return None
+
+    category.name = request.name
+    category.description = request.description
+    await db.commit()
+    response_cache.invalidate(CATEGORIES)
+    book_index.mark_stale()
+
+    category = await _get(db, category_id)
+    return (await _with_book_counts(db, [category]))[0]
+
+async def delete_category(db: AsyncSession, category_id: int):
+    category = await _get(db, category_id)
+    if not category:
+        return False
+
+    has_books = await db.execute(select(Book.id).where(Book.category_id == category_id).limit(1))
+    if has_books.first():
+        return False
+
+    await db.delete(category)
+    await db.commit()
+    response_cache.invalidate(CATEGORIES)
+    return True
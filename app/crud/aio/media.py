@@ -0,0 +1,26 @@
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.media import MediaBlob
+from app.utils import uploads
+
+
+async def register_blob(db: AsyncSession, stored: uploads.StoredFile) -> MediaBlob:
+    """app.crud.media.register_blob for an AsyncSession."""
+    blob = await db.get(MediaBlob, stored.filename)
+    if blob is None:
+        blob = MediaBlob(
+            name=stored.filename, folder=uploads.get_rule(stored.kind).media_dir, sha256=stored.sha256,
+            size=stored.size, content_type=stored.content_type, ref_count=0,
+        )
+        db.add(blob)
+    else:
+        blob.updated_at = func.now()
+    try:
+        await db.commit()
+    except IntegrityError:
+        # The same content registered concurrently
+        await db.rollback()
+        blob = await db.get(MediaBlob, stored.filename)
+    return blob
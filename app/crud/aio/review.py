@@ -0,0 +1,64 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from typing import List, Optional
+from app.models.book import Book
+from app.models.review import Review
+from app.crud.review import review_stats
+from app.schemas.review import ReviewCreateRequest, ReviewUpdateRequest
+from app.utils.pagination import paginate_async, DEFAULT_PAGE_SIZE
+
+# review_to_dict reads review.user and review.book
+_with_relations = (joinedload(Review.user), joinedload(Review.book))
+
+async def get_reviews_by_user(db: AsyncSession, user_id: int) -> List[Review]:
+    result = await db.execute(select(Review).options(*_with_relations).where(Review.user_id == user_id))
+    return result.scalars().all()
+
+async def get_reviews_by_book(db: AsyncSession, book_id: int, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE, include_total: bool = False):
+    stmt = select(Review).options(*_with_relations).where(Review.book_id == book_id)
+    return await paginate_async(db, stmt, Review, cursor, limit, include_total)
+
+async def get_review_by_user_and_book(db: AsyncSession, user_id: int, book_id: int) -> Optional[Review]:
+    result = await db.execute(select(Review).where(Review.user_id == user_id, Review.book_id == book_id))
+    return result.scalars().first()
+
+async def get_review(db: AsyncSession, review_id: int) -> Optional[Review]:
+    result = await db.execute(select(Review).options(*_with_relations).where(Review.id == review_id))
+    return result.scalars().first()
+
+async def create_review(db: AsyncSession, book_id: int, review_in: ReviewCreateRequest) -> Review:
+    review = Review(
+        user_id=review_in.userId,
+        book_id=book_id,
+        rating=review_in.rating,
+        comment=review_in.comment
+    )
+    db.add(review)
+    await db.commit()
+    return await get_review(db, review.id)
+
+async def update_review(db: AsyncSession, review_id: int, review_in: ReviewUpdateRequest) -> Optional[Review]:
+    review = await get_review(db, review_id)
+    if review:
+        if review_in.rating is not None:
+            review.rating = review_in.rating
+        if review_in.comment is not None:
+            review.comment = review_in.comment
+        await db.commit()
+        # updated_at is set by the UPDATE itself
+        await db.refresh(review, ["updated_at"])
+    return review
+
+async def delete_review(db: AsyncSession, review_id: int):
+    review = await get_review(db, review_id)
+    if review:
+        await db.delete(review)
+        await db.commit()
+    return review
+
+async def get_review_stats(db: AsyncSession, book_id: int):
+    # rating_sum / rating_count are maintained by app.db.counters
+    result = await db.execute(select(Book.rating_sum, Book.rating_count).where(Book.id == book_id))
+    row = result.first()
+    return review_stats(*row) if row else review_stats(0, 0)
@@ -0,0 +1,36 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User, UserRoleEnum
+from app.schemas.user import RegisterRequest
+from app.utils.hashing import password_hasher
+
+async def get_user_by_username(db: AsyncSession, username: str):
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
+
+async def create_user(db: AsyncSession, user_in: RegisterRequest, role: UserRoleEnum = UserRoleEnum.USER):
+    hashed_password = await password_hasher.hash_async(user_in.password)
+    db_user = User(
+        username=user_in.username,
+        name=user_in.name,
+        email=user_in.email,
+        password=hashed_password,
+        role=role
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await get_user_by_username(db, username)
+    if not user:
+        return None
+    valid, new_hash = await password_hasher.verify_and_update_async(password, user.password)
+    if not valid:
+        return None
+    if new_hash:
+        # Stored hash uses an old cost factor; upgrade it while we have the plaintext
+        user.password = new_hash
+        await db.commit()
+    return user
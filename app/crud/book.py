@@ -1,36 +1,96 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, or_
 from app.models.book import Book
+from app.schemas.book import BookFilter, BookSortEnum
+from app.core.search import book_index
+from app.core.cache import response_cache, BOOKS, CATEGORIES, FEATURED
+from app.utils.pagination import paginate, DEFAULT_PAGE_SIZE
 
-MEDIA_URL = "http://127.0.0.1:8000/media"
-
+# ------------------------------
+# CRUD Operations
+# ------------------------------
 
-def format_book_urls(book: Book) -> Book:
-    """
-    Add full URLs for cover, pdf_file, and audio_file if they are filenames.
-    If the field already has a URL (starts with http), leave it as is.
-    """
-    if book.cover and not book.cover.startswith("http"):
-        book.cover = f"{MEDIA_URL}/cover/{book.cover}"
-    if book.pdf_file and not book.pdf_file.startswith("http"):
-        book.pdf_file = f"{MEDIA_URL}/pdf/{book.pdf_file}"
-    if book.audio_file and not book.audio_file.startswith("http"):
-        book.audio_file = f"{MEDIA_URL}/audio/{book.audio_file}"
-    return book
+def get_all_books(db: Session, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE, include_total: bool = False):
+    return paginate(db.query(Book), Book, cursor, limit, include_total)
 
 
 # ------------------------------
-# CRUD Operations
+# Catalog queries
 # ------------------------------
 
-def get_all_books(db: Session):
-    books = db.query(Book).all()
-    return [format_book_urls(book) for book in books]
+SORT_COLUMNS = {
+    BookSortEnum.CREATED_AT: Book.created_at,
+    BookSortEnum.UPDATED_AT: Book.updated_at,
+    BookSortEnum.TITLE: Book.title,
+    BookSortEnum.RATING: Book.average_rating,
+}
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def filter_books(query, filters: BookFilter):
+    """Apply BookFilter to a Book query; every predicate runs in SQL."""
+    if filters.available is True:
+        query = query.filter(Book.copies_available > 0)
+    elif filters.available is False:
+        query = query.filter(or_(Book.copies_available <= 0, Book.copies_available.is_(None)))
+    if filters.category_id is not None:
+        query = query.filter(Book.category_id == filters.category_id)
+    if filters.format is not None:
+        query = query.filter(Book.format == filters.format)
+    if filters.author:
+        # Prefix match keeps ix_books_author usable
+        query = query.filter(Book.author.like(f"{_escape_like(filters.author)}%", escape="\\"))
+    if filters.min_rating is not None:
+        query = query.filter(Book.average_rating >= filters.min_rating)
+    if filters.max_rating is not None:
+        query = query.filter(Book.average_rating <= filters.max_rating)
+    if filters.created_after is not None:
+        query = query.filter(Book.created_at >= filters.created_after)
+    if filters.created_before is not None:
+        query = query.filter(Book.created_at < filters.created_before)
+    return query
+
+
+def query_books(
+    db: Session,
+    filters: BookFilter = None,
+    sort: BookSortEnum = BookSortEnum.CREATED_AT,
+    descending: bool = True,
+    cursor: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_total: bool = False,
+):
+    query = filter_books(db.query(Book), filters or BookFilter())
+    return paginate(
+        query, Book, cursor, limit, include_total,
+        sort_column=SORT_COLUMNS[sort], descending=descending,
+    )
+
+
+def get_available_books(db: Session, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE, include_total: bool = False):
+    return query_books(db, BookFilter(available=True), cursor=cursor, limit=limit, include_total=include_total)
 
 
 def get_book(db: Session, book_id: int):
-    book = db.query(Book).filter(Book.id == book_id).first()
-    return format_book_urls(book) if book else None
+    return db.query(Book).filter(Book.id == book_id).first()
+
+
+def get_books_by_ids(db: Session, book_ids: list):
+    """Fetch books by id, preserving the order of book_ids."""
+    if not book_ids:
+        return []
+    books = {b.id: b for b in db.query(Book).filter(Book.id.in_(book_ids)).all()}
+    return [books[i] for i in book_ids if i in books]
+
+
+def search_books(db: Session, q: str, skip: int = 0, limit: int = 20):
+    """Ranked full-text search over the in-process book index. Returns (books, total)."""
+    book_index.sync(db)
+    book_ids, total = book_index.search(q, offset=skip, limit=limit)
+    return get_books_by_ids(db, book_ids), total
 
 
 def is_book_available(db: Session, book_id: int):
@@ -46,7 +106,9 @@ def create_book(db: Session, book_in: dict):
     db.add(db_book)
     db.commit()
     db.refresh(db_book)
-    return format_book_urls(db_book)
+    book_index.index_book(db_book)
+    response_cache.invalidate(BOOKS, CATEGORIES, FEATURED)
+    return db_book
 
 
 def update_book(db: Session, book_id: int, book_in: dict):
@@ -57,7 +119,9 @@ def update_book(db: Session, book_id: int, book_in: dict):
         setattr(db_book, field, value)
     db.commit()
     db.refresh(db_book)
-    return format_book_urls(db_book)
+    book_index.index_book(db_book)
+    response_cache.invalidate(BOOKS, CATEGORIES, FEATURED)
+    return db_book
 
 
 def delete_book(db: Session, book_id: int):
@@ -67,27 +131,29 @@ def delete_book(db: Session, book_id: int):
     try:
         db.delete(db_book)
         db.commit()
+        book_index.remove_book(book_id)
+        response_cache.invalidate(BOOKS, CATEGORIES, FEATURED)
         return {"message": f"Book with id {book_id} deleted successfully."}
     except Exception as e:
         db.rollback()
         raise e
 
 
-def get_books_by_category(db: Session, category_id: int):
-    books = db.query(Book).filter(Book.category_id == category_id).all()
-    return [format_book_urls(book) for book in books]
+def get_books_by_category(db: Session, category_id: int, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE, include_total: bool = False):
+    return query_books(db, BookFilter(category_id=category_id), cursor=cursor, limit=limit, include_total=include_total)
 
 
 def get_recommended_books(db: Session, limit: int = 10):
-    books = db.query(Book).order_by(desc(Book.average_rating)).limit(limit).all()
-    return [format_book_urls(book) for book in books]
+    # Walks ix_books_average_rating_id backwards
+    books = db.query(Book).order_by(desc(Book.average_rating), desc(Book.id)).limit(limit).all()
+    return books
 
 
 def get_popular_books(db: Session, limit: int = 10):
     books = db.query(Book).order_by(desc(Book.copies_total)).limit(limit).all()
-    return [format_book_urls(book) for book in books]
+    return books
 
 
 def get_new_collection(db: Session, limit: int = 10):
     books = db.query(Book).order_by(desc(Book.created_at)).limit(limit).all()
-    return [format_book_urls(book) for book in books]
+    return books
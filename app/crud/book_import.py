@@ -0,0 +1,348 @@
+import csv
+import json
+import os
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import and_, case, func, insert, select, tuple_, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.core.cache import response_cache, BOOKS, CATEGORIES, FEATURED
+from app.core.media_cache import media_file_cache
+from app.core.search import book_index
+from app.crud.inventory import OUTSTANDING
+from app.db.versioning import bump_versions_after_commit
+from app.models.book import Book
+from app.models.book_import import BookImportJob, ImportStatus
+from app.models.borrow import Borrow
+from app.models.category import Category
+from app.schemas.book import BookImportRow
+
+IMPORT_BATCH_SIZE = 1000
+
+# Only the first errors are kept on the job; `failed` still counts all of them
+MAX_STORED_ERRORS = 1000
+
+BOOK_COLUMNS = (
+    "title", "author", "isbn", "category_id", "format", "copies_total", "copies_available",
+    "description", "cover", "pdf_file", "audio_file",
+)
+
+INVENTORY_COLUMNS = {"copies_total", "copies_available"}
+
+
+# ------------------------------
+# Reading
+# ------------------------------
+def read_rows(path: str) -> Iterator[Tuple[int, dict]]:
+    """Yield (line number, raw row) from a CSV or JSON Lines file without loading it whole."""
+    is_csv = path.lower().endswith(".csv")
+    with open(path, newline="" if is_csv else None, encoding="utf-8-sig") as f:
+        if is_csv:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_no, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield line_no, json.loads(line)
+                    except ValueError as e:
+                        yield line_no, e
+
+
+def _parse(raw) -> BookImportRow:
+    if isinstance(raw, Exception):
+        raise ValueError(f"Invalid JSON: {raw}")
+    if not isinstance(raw, dict):
+        raise ValueError("Row is not an object")
+    # Empty cells mean "not given", so field defaults apply
+    values = {k.strip(): v for k, v in raw.items() if k and v not in ("", None)}
+    return BookImportRow(**values)
+
+
+def _format_error(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+    return str(e)
+
+
+# ------------------------------
+# Batch writes
+# ------------------------------
+def _resolve_categories(db: Session, rows: List[Tuple[int, BookImportRow]], cache: Dict, errors: list) -> list:
+    """
+    Map category names to ids, creating the missing ones with one executemany, and
+    check that explicit category_ids exist. cache holds names (-> id) and ids (-> True)
+    already seen by the job. Returns the rows that can be written; the others go to errors.
+    """
+    names = {r.category for _, r in rows if r.category and r.category_id is None} - cache.keys()
+    if names:
+        for category_id, name in db.execute(select(Category.id, Category.name).where(Category.name.in_(names))):
+            cache[name] = category_id
+        missing = names - cache.keys()
+        if missing:
+            db.execute(insert(Category), [{"name": name} for name in sorted(missing)])
+            for category_id, name in db.execute(select(Category.id, Category.name).where(Category.name.in_(missing))):
+                cache[name] = category_id
+    for _, row in rows:
+        if row.category_id is None and row.category:
+            row.category_id = cache[row.category]
+
+    ids = {r.category_id for _, r in rows if r.category_id is not None} - cache.keys()
+    if ids:
+        for (category_id,) in db.execute(select(Category.id).where(Category.id.in_(ids))):
+            cache[category_id] = True
+    kept = []
+    for line_no, row in rows:
+        if row.category_id is not None and row.category_id not in cache:
+            errors.append({"line": line_no, "error": f"category_id: category {row.category_id} does not exist"})
+        else:
+            kept.append((line_no, row))
+    return kept
+
+
+def _match_books_without_isbn(db: Session, by_key: Dict[tuple, tuple], existing: Dict[tuple, int]):
+    """
+    Books created before ISBNs were recorded have none: an ISBN row that matched no
+    ISBN claims such a book by (title, author), and the update backfills its ISBN.
+    Each book is claimed once, so further editions of the same title are inserted.
+    """
+    unmatched = {key: (row.title, row.author) for key, (_, row) in by_key.items() if key[0] == "isbn" and key not in existing}
+    if not unmatched:
+        return
+    stmt = (
+        select(Book.id, Book.title, Book.author)
+        .where(Book.isbn.is_(None), tuple_(Book.title, Book.author).in_(set(unmatched.values())))
+        .order_by(Book.id)
+    )
+    candidates: Dict[tuple, List[int]] = {}
+    for book_id, title, author in db.execute(stmt):
+        candidates.setdefault((title, author), []).append(book_id)
+    for key, pair in unmatched.items():
+        if candidates.get(pair):
+            existing[key] = candidates[pair].pop(0)
+
+
+def _check_inventory(db: Session, updates: List[tuple], errors: list) -> List[tuple]:
+    """
+    A file cannot know how many copies are out: for an existing book it sets
+    copies_total, and copies_available is derived from the borrows holding a copy
+    (see _derive_available). Rows whose copies_total is below that are refused.
+    """
+    ids = [values["id"] for _, values in updates if INVENTORY_COLUMNS & values.keys()]
+    if not ids:
+        return updates
+    stmt = (
+        select(Book.id, Book.copies_total, func.count(Borrow.id))
+        .outerjoin(Borrow, and_(Borrow.book_id == Book.id, Borrow.status.in_(OUTSTANDING)))
+        .where(Book.id.in_(ids))
+        .group_by(Book.id, Book.copies_total)
+    )
+    current = {book_id: (total, on_loan) for book_id, total, on_loan in db.execute(stmt)}
+    kept = []
+    for line_no, values in updates:
+        if values["id"] in current:
+            values.pop("copies_available", None)
+            total = values.setdefault("copies_total", current[values["id"]][0])
+            on_loan = current[values["id"]][1]
+            if total is not None and total < on_loan:
+                errors.append({"line": line_no, "error": f"copies_total: {on_loan} copies are on loan, more than {total}"})
+                continue
+        kept.append((line_no, values))
+    return kept
+
+
+def _derive_available(db: Session, ids: List[int]):
+    """copies_available = copies_total - copies held by outstanding borrows, in one UPDATE."""
+    on_loan = (
+        select(func.count(Borrow.id))
+        .where(Borrow.book_id == Book.__table__.c.id, Borrow.status.in_(OUTSTANDING))
+        .scalar_subquery()
+    )
+    available = func.coalesce(Book.__table__.c.copies_total, 0) - on_loan
+    db.execute(
+        update(Book.__table__)
+        .where(Book.__table__.c.id.in_(ids))
+        .values(copies_available=case((available < 0, 0), else_=available))
+    )
+
+
+def _apply(db: Session, inserts: List[tuple], updates: List[tuple]):
+    if inserts:
+        db.execute(insert(Book), [values for _, values in inserts])
+    if updates:
+        db.execute(update(Book), [values for _, values in updates])
+        derived = [values["id"] for _, values in updates if "copies_total" in values]
+        if derived:
+            _derive_available(db, derived)
+
+
+def _write_batch(db: Session, rows: List[Tuple[int, BookImportRow]], categories: Dict, errors: list) -> Tuple[int, int]:
+    """
+    Upsert one batch of (line number, row) on ISBN, or (title, author) for rows
+    without one or whose ISBN is not stored yet. Returns (inserted, updated); rows the
+    database refuses are added to errors instead of failing the batch.
+    """
+    rows = _resolve_categories(db, rows, categories, errors)
+
+    # Last occurrence wins when the same book appears twice in a batch
+    by_key: Dict[tuple, tuple] = {}
+    for line_no, row in rows:
+        key = ("isbn", row.isbn) if row.isbn else ("title", row.title, row.author)
+        by_key[key] = (line_no, row)
+
+    isbns = [key[1] for key in by_key if key[0] == "isbn"]
+    pairs = [key[1:] for key in by_key if key[0] == "title"]
+    existing: Dict[tuple, int] = {}
+    if isbns:
+        for book_id, isbn in db.execute(select(Book.id, Book.isbn).where(Book.isbn.in_(isbns))):
+            existing[("isbn", isbn)] = book_id
+    if pairs:
+        stmt = select(Book.id, Book.title, Book.author).where(tuple_(Book.title, Book.author).in_(pairs))
+        for book_id, title, author in db.execute(stmt):
+            existing[("title", title, author)] = book_id
+    _match_books_without_isbn(db, by_key, existing)
+
+    inserts, updates = [], []
+    for key, (line_no, row) in by_key.items():
+        if key in existing:
+            # Only overwrite the columns the file actually gave
+            updates.append((line_no, {"id": existing[key], **row.dict(include=row.__fields_set__ & set(BOOK_COLUMNS))}))
+        else:
+            inserts.append((line_no, row.dict(include=set(BOOK_COLUMNS))))
+    updates = _check_inventory(db, updates, errors)
+
+    try:
+        with db.begin_nested():
+            _apply(db, inserts, updates)
+        return len(inserts), len(updates)
+    except DBAPIError:
+        pass
+
+    # One bad row fails a whole executemany: replay the batch row by row to find it
+    inserted = updated = 0
+    for is_insert, (line_no, values) in [(True, r) for r in inserts] + [(False, r) for r in updates]:
+        try:
+            with db.begin_nested():
+                _apply(db, [(line_no, values)] if is_insert else [], [] if is_insert else [(line_no, values)])
+        except DBAPIError as e:
+            errors.append({"line": line_no, "error": str(e.orig)[:500]})
+            continue
+        if is_insert:
+            inserted += 1
+        else:
+            updated += 1
+    return inserted, updated
+
+
+# ------------------------------
+# Jobs
+# ------------------------------
+def create_job(db: Session, filename: str, file_path: str) -> BookImportJob:
+    job = BookImportJob(filename=filename, file_path=file_path, status=ImportStatus.PENDING)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def claim_job(db: Session, job_id: int) -> bool:
+    """
+    Mark a pending or failed job RUNNING with one conditional UPDATE before it is
+    queued, so two quick requests cannot run the same import at once.
+    """
+    result = db.execute(
+        update(BookImportJob)
+        .where(BookImportJob.id == job_id, BookImportJob.status.in_((ImportStatus.PENDING, ImportStatus.FAILED)))
+        .values(status=ImportStatus.RUNNING, message=None)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def get_job(db: Session, job_id: int) -> Optional[BookImportJob]:
+    return db.query(BookImportJob).filter(BookImportJob.id == job_id).first()
+
+
+def job_errors(job: BookImportJob) -> list:
+    return json.loads(job.errors) if job.errors else []
+
+
+def _checkpoint(db: Session, job: BookImportJob, last_line: int, processed: int, inserted: int, updated: int, errors: list):
+    job.last_line = last_line
+    job.processed += processed
+    job.inserted += inserted
+    job.updated += updated
+    job.failed += len(errors)
+    if errors:
+        stored = job_errors(job)
+        errors.sort(key=lambda error: error["line"])
+        stored.extend(errors[:max(0, MAX_STORED_ERRORS - len(stored))])
+        job.errors = json.dumps(stored)
+
+
+def run_import(
+    db: Session,
+    job: BookImportJob,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    on_progress: Callable[[BookImportJob], None] = None,
+) -> BookImportJob:
+    """
+    Import job.file_path from the line after job.last_line. Each batch and its
+    checkpoint commit in one transaction; re-running a job after a failure resumes it.
+    """
+    job.status = ImportStatus.RUNNING
+    job.message = None
+    db.commit()
+
+    categories: Dict = {}
+    batch: List[Tuple[int, BookImportRow]] = []
+    errors: list = []
+    processed = 0
+    last_line = job.last_line
+
+    def flush():
+        nonlocal batch, errors, processed
+        inserted, updated = _write_batch(db, batch, categories, errors) if batch else (0, 0)
+        if inserted or updated:
+            bump_versions_after_commit(db, ["books", "categories"])
+        _checkpoint(db, job, last_line, processed, inserted, updated, errors)
+        db.commit()
+        batch, errors, processed = [], [], 0
+        if on_progress:
+            on_progress(job)
+
+    try:
+        for line_no, raw in read_rows(job.file_path):
+            if line_no <= job.last_line:
+                continue
+            processed += 1
+            last_line = line_no
+            try:
+                batch.append((line_no, _parse(raw)))
+            except (ValidationError, ValueError, TypeError) as e:
+                errors.append({"line": line_no, "error": _format_error(e)})
+            if processed >= batch_size:
+                flush()
+        flush()
+        job.status = ImportStatus.COMPLETED
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        job.status = ImportStatus.FAILED
+        job.message = str(e)[:500]
+        db.commit()
+        raise
+    finally:
+        # Imported rows skip the ORM hooks that keep these in sync
+        book_index.mark_stale()
+        response_cache.invalidate(BOOKS, CATEGORIES, FEATURED)
+        media_file_cache.clear()
+    return job
+
+
+def file_for_upload(folder: str, job_id: int, filename: str) -> str:
+    extension = ".csv" if filename.lower().endswith(".csv") else ".jsonl"
+    return os.path.join(folder, f"{job_id}{extension}")
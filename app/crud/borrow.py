@@ -1,64 +1,92 @@
 from sqlalchemy.orm import Session, joinedload
 from datetime import datetime, timedelta
 from app.models import borrow as borrow_model
+from app.models.counter import BorrowCounter, UserBorrowCounter
+from app.core.cache import response_cache, BOOKS, FEATURED
+from app.crud import inventory
+from app.crud import settings as settings_crud
+from app.db.versioning import bump_versions_after_commit
 from app.schemas import borrow as borrow_schema
+from app.utils.pagination import paginate, DEFAULT_PAGE_SIZE
 
 # ==========================
 # Borrow Management CRUD
 # ==========================
-def create_borrow(db: Session, request: borrow_schema.BorrowCreate, user_id: int):
-    active = db.query(borrow_model.Borrow).filter(
+def _outstanding_borrow(db: Session, user_id: int, book_id: int, statuses=inventory.OUTSTANDING):
+    return db.query(borrow_model.Borrow).filter(
         borrow_model.Borrow.user_id == user_id,
-        borrow_model.Borrow.book_id == request.book_id,
-        borrow_model.Borrow.return_date.is_(None)
+        borrow_model.Borrow.book_id == book_id,
+        borrow_model.Borrow.status.in_(statuses)
     ).first()
-    if active:
-        return None
 
-    borrow = borrow_model.Borrow(
-        user_id=user_id,
-        book_id=request.book_id,
-        borrow_date=datetime.utcnow(),
-        due_date=datetime.utcnow() + timedelta(days=request.days or 14),
-        status=borrow_model.BorrowStatus.REQUESTED,
-        extension_count=0
-    )
-    db.add(borrow)
+def _committed(db: Session, borrow_id: int, copies_changed: bool):
+    """Commit a borrow transition and return the borrow with its user and book."""
+    if copies_changed:
+        # copies_available is part of book payloads
+        bump_versions_after_commit(db, ["books"])
     db.commit()
-    db.refresh(borrow)
-    return db.query(borrow_model.Borrow)\
-             .options(joinedload(borrow_model.Borrow.user),
-                      joinedload(borrow_model.Borrow.book))\
-             .filter(borrow_model.Borrow.id == borrow.id)\
-             .first()
+    if copies_changed:
+        response_cache.invalidate(BOOKS, FEATURED)
+    return get_borrow_by_id(db, borrow_id)
+
+def create_borrow(db: Session, request: borrow_schema.BorrowCreate, user_id: int):
+    """
+    Reserve a copy and record the request in one transaction. The conditional UPDATE
+    on the book comes first so its lock orders concurrent requests for that book; the
+    borrower lock then makes the duplicate and limit checks safe. Raises InventoryError.
+    """
+    limit = settings_crud.get_cached_settings(db).borrow_book_limit
+    try:
+        if not inventory.reserve_copy(db, request.book_id):
+            raise inventory.OutOfStock()
+        inventory.lock_borrower(db, user_id)
+        if inventory.has_outstanding_borrow(db, user_id, request.book_id):
+            raise inventory.AlreadyBorrowed()
+        if limit is not None and inventory.outstanding_count(db, user_id) >= limit:
+            raise inventory.BorrowLimitReached(limit)
+
+        borrow = borrow_model.Borrow(
+            user_id=user_id,
+            book_id=request.book_id,
+            borrow_date=datetime.utcnow(),
+            due_date=datetime.utcnow() + timedelta(days=request.days or 14),
+            status=borrow_model.BorrowStatus.REQUESTED,
+            extension_count=0
+        )
+        db.add(borrow)
+        db.flush()
+    except Exception:
+        db.rollback()
+        raise
+    return _committed(db, borrow.id, copies_changed=True)
 
 def return_book(db: Session, user_id: int, book_id: int):
-    borrow = db.query(borrow_model.Borrow).filter(
-        borrow_model.Borrow.user_id == user_id,
-        borrow_model.Borrow.book_id == book_id,
-        borrow_model.Borrow.return_date.is_(None)
-    ).first()
+    borrow = _outstanding_borrow(db, user_id, book_id)
     if not borrow:
         return None
-    borrow.return_date = datetime.utcnow()
-    borrow.status = borrow_model.BorrowStatus.RETURNED
-    db.commit()
-    db.refresh(borrow)
-    return borrow
+    # Book row first, then borrow and counters: the lock order of create_borrow
+    inventory.release_copy(db, book_id)
+    if not inventory.transition(db, borrow, borrow_model.BorrowStatus.RETURNED, return_date=datetime.utcnow()):
+        db.rollback()
+        raise inventory.InvalidTransition("Borrow was changed by another request")
+    return _committed(db, borrow.id, copies_changed=True)
 
 def extend_due_date(db: Session, user_id: int, book_id: int, extend_days: int = 7):
-    borrow = db.query(borrow_model.Borrow).filter(
-        borrow_model.Borrow.user_id == user_id,
-        borrow_model.Borrow.book_id == book_id,
-        borrow_model.Borrow.return_date.is_(None)
-    ).first()
+    borrow = _outstanding_borrow(db, user_id, book_id)
     if not borrow:
         return None
-    borrow.due_date += timedelta(days=extend_days)
-    borrow.extension_count += 1
-    db.commit()
-    db.refresh(borrow)
-    return borrow
+    limit = settings_crud.get_cached_settings(db).borrow_extend_limit
+    # Before extend(), whose UPDATE syncs the new due date onto borrow
+    due_date = borrow.due_date + timedelta(days=extend_days)
+    if not inventory.extend(db, borrow, extend_days, limit):
+        db.rollback()
+        raise inventory.InvalidTransition("Borrow was changed by another request")
+    # An overdue borrow extended past today is on loan again
+    if borrow.status == borrow_model.BorrowStatus.OVERDUE and due_date >= datetime.utcnow().date():
+        if not inventory.transition(db, borrow, borrow_model.BorrowStatus.ACTIVE):
+            db.rollback()
+            raise inventory.InvalidTransition("Borrow was changed by another request")
+    return _committed(db, borrow.id, copies_changed=False)
 
 def get_user_borrows(db: Session, user_id: int):
     return db.query(borrow_model.Borrow)\
@@ -67,20 +95,23 @@ def get_user_borrows(db: Session, user_id: int):
              .filter(borrow_model.Borrow.user_id == user_id)\
              .all()
 
-def get_all_borrows(db: Session):
+def all_borrows_query(db: Session):
     return db.query(borrow_model.Borrow)\
              .options(joinedload(borrow_model.Borrow.user),
-                      joinedload(borrow_model.Borrow.book))\
-             .all()
+                      joinedload(borrow_model.Borrow.book))
 
-def get_active_borrows(db: Session):
-    return db.query(borrow_model.Borrow)\
-             .options(joinedload(borrow_model.Borrow.user),
-                      joinedload(borrow_model.Borrow.book))\
-             .filter(
-                 borrow_model.Borrow.return_date.is_(None),
-                 borrow_model.Borrow.status == borrow_model.BorrowStatus.ACTIVE
-             ).all()
+def get_all_borrows(db: Session, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE, include_total: bool = False):
+    return paginate(all_borrows_query(db), borrow_model.Borrow, cursor, limit, include_total)
+
+def get_active_borrows(db: Session, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE, include_total: bool = False):
+    query = db.query(borrow_model.Borrow)\
+              .options(joinedload(borrow_model.Borrow.user),
+                       joinedload(borrow_model.Borrow.book))\
+              .filter(
+                  borrow_model.Borrow.return_date.is_(None),
+                  borrow_model.Borrow.status == borrow_model.BorrowStatus.ACTIVE
+              )
+    return paginate(query, borrow_model.Borrow, cursor, limit, include_total)
 
 def get_borrow_by_id(db: Session, borrow_id: int):
     return db.query(borrow_model.Borrow)\
@@ -89,63 +120,61 @@ def get_borrow_by_id(db: Session, borrow_id: int):
              .filter(borrow_model.Borrow.id == borrow_id)\
              .first()
 
-def get_overdue_borrows(db: Session):
-    today = datetime.utcnow()
-    return db.query(borrow_model.Borrow)\
-             .options(joinedload(borrow_model.Borrow.user),
-                      joinedload(borrow_model.Borrow.book))\
-             .filter(
-                 borrow_model.Borrow.return_date.is_(None),
-                 borrow_model.Borrow.due_date < today
-             ).all()
+def get_overdue_borrows(db: Session, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE, include_total: bool = False):
+    # Set by the mark-overdue job (app.crud.status_jobs)
+    query = db.query(borrow_model.Borrow)\
+              .options(joinedload(borrow_model.Borrow.user),
+                       joinedload(borrow_model.Borrow.book))\
+              .filter(borrow_model.Borrow.status == borrow_model.BorrowStatus.OVERDUE)
+    return paginate(query, borrow_model.Borrow, cursor, limit, include_total)
 
 # ==========================
 # Borrow Status Management (Admin)
 # ==========================
+# Requests can be rejected until they are handed out
+REJECTABLE = (borrow_model.BorrowStatus.REQUESTED, borrow_model.BorrowStatus.ACCEPTED)
+
 def reject_borrow(db: Session, user_id: int, book_id: int):
-    borrow = db.query(borrow_model.Borrow).filter(
-        borrow_model.Borrow.user_id == user_id,
-        borrow_model.Borrow.book_id == book_id,
-        borrow_model.Borrow.return_date.is_(None)
-    ).first()
+    borrow = _outstanding_borrow(db, user_id, book_id, REJECTABLE)
     if not borrow:
         return None
-    borrow.status = borrow_model.BorrowStatus.REJECTED
-    db.commit()
-    db.refresh(borrow)
-    return borrow
+    inventory.release_copy(db, book_id)
+    if not inventory.transition(db, borrow, borrow_model.BorrowStatus.REJECTED):
+        db.rollback()
+        raise inventory.InvalidTransition("Borrow was changed by another request")
+    return _committed(db, borrow.id, copies_changed=True)
 
 def accept_borrow(db: Session, user_id: int, book_id: int):
-    borrow = db.query(borrow_model.Borrow).filter(
-        borrow_model.Borrow.user_id == user_id,
-        borrow_model.Borrow.book_id == book_id
-    ).first()
+    # The copy was reserved when the borrow was requested
+    borrow = _outstanding_borrow(db, user_id, book_id, (borrow_model.BorrowStatus.REQUESTED,))
     if not borrow:
         return None
-    borrow.status = borrow_model.BorrowStatus.ACCEPTED
-    db.commit()
-    db.refresh(borrow)
-    return borrow
+    if not inventory.transition(db, borrow, borrow_model.BorrowStatus.ACCEPTED):
+        db.rollback()
+        raise inventory.InvalidTransition("Borrow was changed by another request")
+    return _committed(db, borrow.id, copies_changed=False)
 
 # ==========================
 # Borrow Statistics
 # ==========================
 def get_borrow_stats(db: Session):
-    from sqlalchemy import func
-    total = db.query(func.count(borrow_model.Borrow.id)).scalar()
-    active = db.query(func.count(borrow_model.Borrow.id)).filter(
-        borrow_model.Borrow.status == borrow_model.BorrowStatus.ACTIVE
-    ).scalar()
-    returned = db.query(func.count(borrow_model.Borrow.id)).filter(
-        borrow_model.Borrow.status == borrow_model.BorrowStatus.RETURNED
-    ).scalar()
-    overdue = db.query(func.count(borrow_model.Borrow.id)).filter(
-        borrow_model.Borrow.return_date.is_(None),
-        borrow_model.Borrow.due_date < datetime.utcnow()
-    ).scalar()
+    # Status totals are maintained by app.db.counters
+    by_status = dict(db.query(BorrowCounter.status, BorrowCounter.total).all())
+    return {
+        "totalBorrows": sum(by_status.values()),
+        "activeBorrows": by_status.get(borrow_model.BorrowStatus.ACTIVE, 0),
+        "returnedBorrows": by_status.get(borrow_model.BorrowStatus.RETURNED, 0),
+        "overdueBorrows": by_status.get(borrow_model.BorrowStatus.OVERDUE, 0)
+    }
+
+def get_user_borrow_stats(db: Session, user_id: int):
+    by_status = dict(
+        db.query(UserBorrowCounter.status, UserBorrowCounter.total)
+          .filter(UserBorrowCounter.user_id == user_id)
+          .all()
+    )
     return {
-        "totalBorrows": total,
-        "activeBorrows": active,
-        "returnedBorrows": returned,
-        "overdueBorrows": overdue
+        "total_borrowed_books": sum(by_status.values()),
+        "total_returned_books": by_status.get(borrow_model.BorrowStatus.RETURNED, 0),
+        "total_overdue_books": by_status.get(borrow_model.BorrowStatus.OVERDUE, 0)
     }
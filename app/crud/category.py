@@ -1,6 +1,50 @@
+from typing import List
+from sqlalchemy import case, func, select
 from sqlalchemy.orm import Session
+from app.models.book import Book
 from app.models.category import Category
 from app.schemas import category as category_schema
+from app.core.search import book_index
+from app.core.cache import response_cache, CATEGORIES
+
+# ------------------------------
+# Book counts
+# ------------------------------
+def book_counts_query(category_ids: List[int], breakdown: bool = False):
+    """
+    One GROUP BY over books for a page of categories. The plain count is read from the
+    (category_id, created_at, id) index; the breakdown also groups by format and counts
+    the books with a copy available.
+    """
+    columns, group_by = [Book.category_id, func.count(Book.id)], [Book.category_id]
+    if breakdown:
+        columns += [Book.format, func.sum(case((Book.copies_available > 0, 1), else_=0))]
+        group_by.append(Book.format)
+    return select(*columns).where(Book.category_id.in_(category_ids)).group_by(*group_by)
+
+def set_book_counts(categories: List[Category], rows, breakdown: bool = False):
+    """Attach book_count (and with breakdown, format_counts and available_count) for the response."""
+    by_id = {c.id: c for c in categories}
+    for c in categories:
+        c.book_count = 0
+        if breakdown:
+            c.format_counts, c.available_count = {}, 0
+    for row in rows:
+        category = by_id[row[0]]
+        category.book_count += row[1]
+        if breakdown:
+            category.format_counts[row[2].value] = row[1]
+            category.available_count += row[3] or 0
+    return categories
+
+def _with_book_counts(db: Session, categories: List[Category], breakdown: bool = False):
+    if not categories:
+        return categories
+    rows = db.execute(book_counts_query([c.id for c in categories], breakdown)).all()
+    return set_book_counts(categories, rows, breakdown)
+
+def has_books(db: Session, category_id: int) -> bool:
+    return db.execute(select(Book.id).where(Book.category_id == category_id).limit(1)).first() is not None
 
 def create_category(db: Session, request: category_schema.CategoryCreate):
     existing = db.query(Category).filter(Category.name.ilike(request.name)).first()
@@ -10,29 +54,26 @@ def create_category(db: Session, request: category_schema.CategoryCreate):
     category = Category(name=request.name, description=request.description)
     db.add(category)
     db.commit()
+    response_cache.invalidate(CATEGORIES)
     db.refresh(category)
 
-    # Set book_count dynamically for response
-    category.book_count = len(category.books)  # usually 0 for new category
+    # A new category has no books yet
+    category.book_count = 0
     return category
 
-def get_category_by_id(db: Session, category_id: int):
+def get_category_by_id(db: Session, category_id: int, breakdown: bool = False):
     category = db.query(Category).filter(Category.id == category_id).first()
     if category:
-        category.book_count = len(category.books)
+        _with_book_counts(db, [category], breakdown)
     return category
 
-def get_all_categories(db: Session, skip: int = 0, limit: int = 10):
+def get_all_categories(db: Session, skip: int = 0, limit: int = 10, breakdown: bool = False):
     categories = db.query(Category).offset(skip).limit(limit).all()
-    for c in categories:
-        c.book_count = len(c.books)
-    return categories
+    return _with_book_counts(db, categories, breakdown)
 
-def get_all_categories_list(db: Session):
+def get_all_categories_list(db: Session, breakdown: bool = False):
     categories = db.query(Category).all()
-    for c in categories:
-        c.book_count = len(c.books)
-    return categories
+    return _with_book_counts(db, categories, breakdown)
 
 def update_category(db: Session, category_id: int, request: category_schema.CategoryUpdate):
     category = db.query(Category).filter(Category.id == category_id).first()
@@ -46,19 +87,23 @@ def update_category(db: Session, category_id: int, request: category_schema.Cate
     category.name = request.name
     category.description = request.description
     db.commit()
+    response_cache.invalidate(CATEGORIES)
     db.refresh(category)
 
-    category.book_count = len(category.books)
-    return category
+    # Category name is part of every book's search document
+    book_index.mark_stale()
+
+    return _with_book_counts(db, [category])[0]
 
 def delete_category(db: Session, category_id: int):
     category = db.query(Category).filter(Category.id == category_id).first()
     if not category:
         return False
 
-    if category.books and len(category.books) > 0:
+    if has_books(db, category_id):
         return False
 
     db.delete(category)
     db.commit()
+    response_cache.invalidate(CATEGORIES)
     return True
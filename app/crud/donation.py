@@ -4,6 +4,7 @@ from typing import List, Optional
 from app.models.donation import DonationRequest, DonationStatus
 from app.schemas import donation as donation_schema
 from app.models.user import User  # Ensure correct import
+from app.utils.pagination import paginate, DEFAULT_PAGE_SIZE
 
 def create_donation_request(db: Session, request: donation_schema.DonationCreate):
     donation = DonationRequest(
@@ -25,25 +26,54 @@ def create_donation_request(db: Session, request: donation_schema.DonationCreate
     donation.status = donation.status.value
     return donation
 
-def get_all_donation_requests(
+def donation_requests_query(
     db: Session,
     user_id: Optional[int] = None,
     status: Optional[donation_schema.DonationStatusEnum] = None,
-    skip: int = 0,
-    limit: int = 10
-) -> List[DonationRequest]:
+):
     query = db.query(DonationRequest).options(joinedload(DonationRequest.user))
     if user_id:
         query = query.filter(DonationRequest.user_id == user_id)
     if status:
         query = query.filter(DonationRequest.status == DonationStatus[status.value])
-    
-    donations = query.offset(skip).limit(limit).all()
-    for donation in donations:
+    return query
+
+def donation_export_row(donation: DonationRequest) -> dict:
+    """DonationResponse dict for a streamed export, without touching the ORM row."""
+    user = donation.user
+    return {
+        "id": donation.id,
+        "user": {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "full_name": user.full_name or user.username,
+        },
+        "book_title": donation.book_title,
+        "author": donation.author,
+        "isbn": donation.isbn,
+        "notes": donation.notes,
+        "status": donation.status,
+        "admin_notes": donation.admin_notes,
+        "created_at": donation.created_at,
+        "updated_at": donation.updated_at,
+    }
+
+def get_all_donation_requests(
+    db: Session,
+    user_id: Optional[int] = None,
+    status: Optional[donation_schema.DonationStatusEnum] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_total: bool = False
+) -> dict:
+    query = donation_requests_query(db, user_id, status)
+    page = paginate(query, DonationRequest, cursor, limit, include_total)
+    for donation in page["data"]:
         if donation.user and not donation.user.full_name:
             donation.user.full_name = donation.user.username
         donation.status = donation.status.value
-    return donations
+    return page
 
 def get_donation_request_by_id(db: Session, donation_id: int):
     donation = db.query(DonationRequest)\
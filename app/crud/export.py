@@ -0,0 +1,266 @@
+import csv
+import json
+import os
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.book import Book
+from app.models.borrow import Borrow
+from app.models.export import ExportFormat, ExportJob, ExportStatus, ExportWatermark
+from app.models.review import Review
+from app.models.user import User
+
+EXPORT_DIR = os.path.join(os.getcwd(), "media", "exports")
+
+EXPORT_TABLES = {
+    "books": Book.__table__,
+    "borrows": Borrow.__table__,
+    "reviews": Review.__table__,
+    "users": User.__table__,
+}
+
+# Never leave the database
+EXCLUDED_COLUMNS = {"users": {"password"}}
+
+
+class ExportUnavailable(Exception):
+    """Raised when the requested format needs an optional package that is not installed."""
+
+
+def export_columns(name: str):
+    excluded = EXCLUDED_COLUMNS.get(name, set())
+    return [c for c in EXPORT_TABLES[name].columns if c.name not in excluded]
+
+
+# ------------------------------
+# Reading
+# ------------------------------
+def _changed_filter(table, since: Optional[datetime], until: datetime):
+    """Rows changed in (since, until]. Tables with a nullable updated_at fall back to created_at."""
+    columns = [table.c.updated_at]
+    if table.c.updated_at.nullable:
+        columns.append(table.c.created_at)
+    changed_at = func.coalesce(*columns) if len(columns) > 1 else columns[0]
+    clauses = [changed_at <= until]
+    if since is not None:
+        # One comparison per column so each can use its own index
+        clauses.append(or_(*(c > since for c in columns)))
+    return clauses
+
+
+def iter_batches(db: Session, name: str, since: Optional[datetime], until: Optional[datetime]) -> Iterator[list]:
+    """Yield lists of row tuples from a server-side cursor, settings.EXPORT_BATCH_SIZE at a time."""
+    table = EXPORT_TABLES[name]
+    stmt = select(*export_columns(name)).order_by(table.c.id)
+    if until is not None:
+        stmt = stmt.where(*_changed_filter(table, since, until))
+    result = db.execute(stmt.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+    yield from result.partitions()
+
+
+# ------------------------------
+# Writers
+# ------------------------------
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class CsvChunkWriter:
+    extension = "csv"
+
+    def __init__(self, path: str, columns):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([c.name for c in columns])
+
+    def write(self, rows: list):
+        self._writer.writerows([_csv_value(v) for v in row] for row in rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetChunkWriter:
+    """Needs the optional `pyarrow` package; each batch becomes one row group."""
+    extension = "parquet"
+
+    def __init__(self, path: str, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([(c.name, _arrow_type(pa, c.type)) for c in columns])
+        self._writer = pq.ParquetWriter(path, self._schema, compression="snappy")
+
+    def write(self, rows: list):
+        values = list(zip(*rows))
+        arrays = [
+            [v.value if isinstance(v, Enum) else v for v in column]
+            for column in values
+        ]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def _arrow_type(pa, column_type):
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+WRITERS = {ExportFormat.CSV: CsvChunkWriter, ExportFormat.PARQUET: ParquetChunkWriter}
+
+
+def check_format(fmt: ExportFormat):
+    if fmt == ExportFormat.PARQUET:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ExportUnavailable("Parquet exports need the pyarrow package")
+
+
+def write_table(db: Session, job: ExportJob, name: str, since, until, folder: str) -> List[dict]:
+    """Write one table as numbered chunk files of at most settings.EXPORT_CHUNK_ROWS rows."""
+    writer_class = WRITERS[job.format]
+    columns = export_columns(name)
+    artifacts, writer, chunk_rows = [], None, 0
+
+    def close():
+        writer.close()
+        artifacts[-1]["rows"] = chunk_rows
+
+    for batch in iter_batches(db, name, since, until):
+        while batch:
+            if writer is None:
+                filename = f"{name}-{len(artifacts) + 1:05d}.{writer_class.extension}"
+                writer = writer_class(os.path.join(folder, filename), columns)
+                artifacts.append({
+                    "table": name, "file": filename, "rows": 0,
+                    "url": f"/api/admin/exports/{job.id}/files/{filename}",
+                })
+                chunk_rows = 0
+            take = batch[:settings.EXPORT_CHUNK_ROWS - chunk_rows]
+            batch = batch[len(take):]
+            writer.write(take)
+            chunk_rows += len(take)
+            if chunk_rows >= settings.EXPORT_CHUNK_ROWS:
+                close()
+                writer = None
+    if writer is not None:
+        close()
+    return artifacts
+
+
+# ------------------------------
+# Jobs
+# ------------------------------
+def create_job(db: Session, tables: List[str], fmt: ExportFormat, incremental: bool) -> ExportJob:
+    job = ExportJob(tables=",".join(tables), format=fmt, incremental=incremental, status=ExportStatus.PENDING)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_job(db: Session, job_id: int) -> Optional[ExportJob]:
+    return db.query(ExportJob).filter(ExportJob.id == job_id).first()
+
+
+def job_artifacts(job: ExportJob) -> list:
+    return json.loads(job.artifacts) if job.artifacts else []
+
+
+def get_watermark(db: Session, name: str, fmt: ExportFormat) -> Optional[datetime]:
+    mark = db.query(ExportWatermark).filter(
+        ExportWatermark.table_name == name, ExportWatermark.format == fmt
+    ).first()
+    return mark.exported_until if mark else None
+
+
+def _set_watermark(db: Session, name: str, job: ExportJob, until: datetime):
+    mark = db.get(ExportWatermark, (name, job.format))
+    if mark is None:
+        mark = ExportWatermark(table_name=name, format=job.format)
+        db.add(mark)
+    mark.exported_until = until
+    mark.job_id = job.id
+
+
+def _db_now(db: Session) -> datetime:
+    # The database clock, which is the one that stamps updated_at
+    return db.execute(select(func.now(type_=DateTime))).scalar()
+
+
+def run_export(
+    db: Session,
+    read_db: Session,
+    job: ExportJob,
+    on_progress: Callable[[ExportJob], None] = None,
+) -> ExportJob:
+    """
+    Export each table of the job from read_db (a replica when configured) and record
+    progress and watermarks on db. A table's watermark only moves once all of its
+    files are written, so a failed export is simply run again.
+    """
+    job.status = ExportStatus.RUNNING
+    job.message = None
+    until = _db_now(db) - timedelta(seconds=settings.EXPORT_WATERMARK_LAG_SECONDS)
+    job.exported_until = until
+    db.commit()
+
+    folder = os.path.join(EXPORT_DIR, str(job.id))
+    os.makedirs(folder, exist_ok=True)
+    artifacts = []
+    try:
+        for name in job.tables.split(","):
+            if job.incremental:
+                written = write_table(read_db, job, name, get_watermark(db, name, job.format), until, folder)
+            else:
+                # Full snapshot: every row, including the ones newer than the watermark
+                written = write_table(read_db, job, name, None, None, folder)
+            artifacts.extend(written)
+            job.artifacts = json.dumps(artifacts)
+            job.rows += sum(a["rows"] for a in written)
+            _set_watermark(db, name, job, until)
+            db.commit()
+            if on_progress:
+                on_progress(job)
+        job.status = ExportStatus.COMPLETED
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        job.status = ExportStatus.FAILED
+        job.message = str(e)[:500]
+        db.commit()
+        raise
+    finally:
+        read_db.rollback()  # end the long read transaction
+    return job
+
+
+def artifact_path(job: ExportJob, filename: str) -> Optional[str]:
+    """Path of one of the job's files, or None for names the job did not write."""
+    if filename not in {a["file"] for a in job_artifacts(job)}:
+        return None
+    return os.path.join(EXPORT_DIR, str(job.id), filename)
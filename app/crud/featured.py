@@ -2,12 +2,14 @@ from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from app.models.featured import FeaturedBook
 from app.schemas.featured import FeaturedBookCreate, FeaturedBookUpdate
+from app.core.cache import response_cache, FEATURED
 
 #   CREATE
 def create_featured_book(db: Session, obj_in: FeaturedBookCreate) -> FeaturedBook:
     db_obj = FeaturedBook(book_id=obj_in.book_id)
     db.add(db_obj)
     db.commit()
+    response_cache.invalidate(FEATURED)
     db.refresh(db_obj)
     # eager load book info
     db_obj.book  
@@ -26,6 +28,7 @@ def update_featured_book(db: Session, db_obj: FeaturedBook, obj_in: FeaturedBook
     if obj_in.book_id is not None:
         db_obj.book_id = obj_in.book_id
     db.commit()
+    response_cache.invalidate(FEATURED)
     db.refresh(db_obj)
     db_obj.book  
     return db_obj
@@ -34,3 +37,4 @@ def update_featured_book(db: Session, db_obj: FeaturedBook, obj_in: FeaturedBook
 def delete_featured_book(db: Session, db_obj: FeaturedBook) -> None:
     db.delete(db_obj)
     db.commit()
+    response_cache.invalidate(FEATURED)
@@ -0,0 +1,135 @@
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.db.counters import apply_borrow_delta
+from app.models.book import Book
+from app.models.borrow import Borrow, BorrowStatus
+from app.models.counter import UserBorrowCounter
+from app.models.user import User
+
+# Borrows that hold a copy of their book
+OUTSTANDING = (BorrowStatus.REQUESTED, BorrowStatus.ACCEPTED, BorrowStatus.ACTIVE, BorrowStatus.OVERDUE)
+
+
+class InventoryError(Exception):
+    """A borrow transition that was refused; the message is safe to show the user."""
+
+
+class OutOfStock(InventoryError):
+    def __init__(self):
+        super().__init__("Book not available")
+
+
+class AlreadyBorrowed(InventoryError):
+    def __init__(self):
+        super().__init__("Book already borrowed")
+
+
+class BorrowLimitReached(InventoryError):
+    def __init__(self, limit: int):
+        super().__init__(f"Borrow limit of {limit} books reached")
+
+
+class ExtendLimitReached(InventoryError):
+    def __init__(self, limit: int):
+        super().__init__(f"Due date can be extended at most {limit} times")
+
+
+class InvalidTransition(InventoryError):
+    def __init__(self, detail: str):
+        super().__init__(detail)
+
+
+# ------------------------------
+# Copies
+# ------------------------------
+def reserve_copy(db: Session, book_id: int) -> bool:
+    """
+    Take one copy with a single conditional UPDATE. The row lock it takes (MySQL) or
+    the write lock (SQLite) is held until commit, so borrows of a book are serialized.
+    """
+    result = db.execute(
+        update(Book.__table__)
+        .where(Book.__table__.c.id == book_id, Book.__table__.c.copies_available > 0)
+        .values(copies_available=Book.__table__.c.copies_available - 1, updated_at=func.now())
+    )
+    return result.rowcount == 1
+
+
+def release_copy(db: Session, book_id: int):
+    db.execute(
+        update(Book.__table__)
+        .where(Book.__table__.c.id == book_id)
+        .values(copies_available=Book.__table__.c.copies_available + 1, updated_at=func.now())
+    )
+
+
+# ------------------------------
+# Borrowers
+# ------------------------------
+def lock_borrower(db: Session, user_id: int):
+    """Serialize one user's borrow requests (SELECT ... FOR UPDATE; a no-op on SQLite)."""
+    db.execute(select(User.id).where(User.id == user_id).with_for_update())
+
+
+def has_outstanding_borrow(db: Session, user_id: int, book_id: int) -> bool:
+    return db.execute(
+        select(Borrow.id).where(
+            Borrow.user_id == user_id,
+            Borrow.book_id == book_id,
+            Borrow.status.in_(OUTSTANDING),
+        ).limit(1)
+    ).first() is not None
+
+
+def outstanding_count(db: Session, user_id: int) -> int:
+    """Books the user holds, from the maintained per-user counters."""
+    return db.execute(
+        select(func.coalesce(func.sum(UserBorrowCounter.total), 0)).where(
+            UserBorrowCounter.user_id == user_id,
+            UserBorrowCounter.status.in_(OUTSTANDING),
+        )
+    ).scalar()
+
+
+# ------------------------------
+# Borrow transitions
+# ------------------------------
+def transition(db: Session, borrow: Borrow, to_status: BorrowStatus, **values) -> bool:
+    """
+    Compare-and-set the borrow's status: the UPDATE only matches while the row still
+    has the status that was read, so concurrent transitions cannot both succeed.
+    Counters are adjusted here because the UPDATE bypasses the ORM flush.
+    """
+    from_status = borrow.status
+    result = db.execute(
+        update(Borrow)
+        .where(Borrow.id == borrow.id, Borrow.status == from_status)
+        .values(status=to_status, **values)
+    )
+    if result.rowcount != 1:
+        return False
+    connection = db.connection()
+    apply_borrow_delta(connection, borrow.user_id, from_status, -1)
+    apply_borrow_delta(connection, borrow.user_id, to_status, 1)
+    return True
+
+
+def extend(db: Session, borrow: Borrow, days: int, limit: Optional[int]) -> bool:
+    """Push the due date back, at most `limit` times, guarded on the extension count read."""
+    count = borrow.extension_count or 0
+    if limit is not None and count >= limit:
+        raise ExtendLimitReached(limit)
+    result = db.execute(
+        update(Borrow)
+        .where(
+            Borrow.id == borrow.id,
+            Borrow.status.in_(OUTSTANDING),
+            func.coalesce(Borrow.extension_count, 0) == count,
+        )
+        .values(due_date=borrow.due_date + timedelta(days=days), extension_count=count + 1)
+    )
+    return result.rowcount == 1
@@ -0,0 +1,165 @@
+from collections import Counter
+from datetime import timedelta
+from typing import Callable, List
+
+from sqlalchemy import DateTime, delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.cache import response_cache, BOOKS, FEATURED
+from app.core.config import settings
+from app.core.media_cache import media_file_cache
+from app.db.media_refs import MEDIA_COLUMNS, is_blob_name
+from app.db.versioning import bump_versions_after_commit
+from app.models.book import Book
+from app.models.media import MediaBlob
+from app.utils import media_store, uploads
+
+# Upload kind of each book media column
+COLUMN_KINDS = {rule.column: kind for kind, rule in uploads.UPLOAD_RULES.items()}
+
+MEDIA_BATCH_SIZE = 500
+
+
+# ------------------------------
+# Blobs
+# ------------------------------
+def register_blob(db: Session, stored: uploads.StoredFile) -> MediaBlob:
+    """
+    Record a stored upload with no references yet. Until a book names it, it is a
+    garbage-collection candidate once settings.MEDIA_GC_GRACE_HOURS have passed;
+    uploading the same bytes again restarts that grace period.
+    """
+    blob = db.get(MediaBlob, stored.filename)
+    if blob is None:
+        blob = MediaBlob(
+            name=stored.filename, folder=uploads.get_rule(stored.kind).media_dir, sha256=stored.sha256,
+            size=stored.size, content_type=stored.content_type, ref_count=0,
+        )
+        db.add(blob)
+    else:
+        blob.updated_at = func.now()
+    try:
+        db.commit()
+    except IntegrityError:
+        # The same content registered concurrently
+        db.rollback()
+        blob = db.get(MediaBlob, stored.filename)
+    return blob
+
+
+def _references(db: Session, names: List[str]) -> Counter:
+    """How many book columns name each blob, straight from the books table."""
+    counts = Counter()
+    for column in MEDIA_COLUMNS:
+        attr = getattr(Book, column)
+        for value, n in db.execute(select(attr, func.count()).where(attr.in_(names)).group_by(attr)):
+            counts[value] += n
+    return counts
+
+
+def recount_references(db: Session) -> int:
+    """Recompute every ref_count from the books table (after Core writes to books). Returns rows fixed."""
+    counts = Counter()
+    for column in MEDIA_COLUMNS:
+        attr = getattr(Book, column)
+        for value, n in db.execute(select(attr, func.count()).where(attr.isnot(None)).group_by(attr)):
+            if is_blob_name(value):
+                counts[value] += n
+    fixes = [
+        {"name": name, "ref_count": counts.get(name, 0)}
+        for name, ref_count in db.execute(select(MediaBlob.name, MediaBlob.ref_count))
+        if ref_count != counts.get(name, 0)
+    ]
+    if fixes:
+        db.execute(update(MediaBlob), fixes)
+    db.commit()
+    return len(fixes)
+
+
+# ------------------------------
+# Garbage collection
+# ------------------------------
+def collect_garbage(db: Session, batch_size: int = MEDIA_BATCH_SIZE) -> dict:
+    """
+    Scheduled job: delete blobs without references that have not been touched for
+    settings.MEDIA_GC_GRACE_HOURS. Each candidate batch is checked against the books
+    table first; counts that drifted (Core writes to books) are repaired, not deleted.
+    Rows go first and files after the commit, so a failure never leaves a row without
+    its file.
+    """
+    cutoff = db.execute(select(func.now(type_=DateTime))).scalar() - timedelta(hours=settings.MEDIA_GC_GRACE_HOURS)
+    backend = media_store.get_backend()
+    deleted, freed, repaired = 0, 0, 0
+    while True:
+        candidates = db.execute(
+            select(MediaBlob.name, MediaBlob.folder, MediaBlob.size)
+            .where(MediaBlob.ref_count <= 0, MediaBlob.updated_at < cutoff)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not candidates:
+            db.rollback()
+            break
+        referenced = _references(db, [c.name for c in candidates])
+        fixes = [{"name": c.name, "ref_count": referenced[c.name]} for c in candidates if referenced[c.name]]
+        orphans = [c for c in candidates if not referenced[c.name]]
+        if fixes:
+            db.execute(update(MediaBlob), fixes)
+        if orphans:
+            db.execute(delete(MediaBlob).where(
+                MediaBlob.name.in_([c.name for c in orphans]), MediaBlob.ref_count <= 0
+            ))
+        db.commit()
+        for c in orphans:
+            backend.delete(f"{c.folder}/{c.name}")
+        deleted += len(orphans)
+        freed += sum(c.size for c in orphans)
+        repaired += len(fixes)
+        if len(candidates) < batch_size:
+            break
+    return {"rows": deleted, "bytes_freed": freed, "repaired": repaired}
+
+
+# ------------------------------
+# Legacy files
+# ------------------------------
+def convert_legacy_media(db: Session, on_progress: Callable[[dict], None] = None) -> dict:
+    """
+    Move media stored under uploaded filenames into the content-addressed store: each
+    distinct file is hashed once, every book naming it is pointed at the blob, and the
+    old file is removed. Identical files collapse into one blob. URLs, missing files
+    and files failing the upload checks are left as they are.
+    """
+    backend = media_store.get_backend()
+    report = {"converted": 0, "books": 0, "skipped": 0, "missing": 0}
+    for column, kind in COLUMN_KINDS.items():
+        attr, rule = getattr(Book, column), uploads.get_rule(kind)
+        values = db.execute(select(attr).where(attr.isnot(None)).distinct()).scalars().all()
+        for value in values:
+            if is_blob_name(value) or value.startswith(("http://", "https://")):
+                continue
+            key = f"{rule.media_dir}/{value}"
+            try:
+                if not backend.exists(key):
+                    report["missing"] += 1
+                    continue
+                with backend.open(key) as f:
+                    stored = uploads.store_upload(f, kind)
+            except (uploads.UploadError, ValueError):
+                report["skipped"] += 1
+                continue
+            register_blob(db, stored)
+            result = db.execute(update(Book).where(attr == value).values({column: stored.filename}))
+            bump_versions_after_commit(db, ["books"])
+            db.commit()
+            backend.delete(key)
+            report["converted"] += 1
+            report["books"] += result.rowcount
+            if on_progress:
+                on_progress(report)
+    # The UPDATEs above bypass the reference listener
+    recount_references(db)
+    response_cache.invalidate(BOOKS, FEATURED)
+    media_file_cache.clear()
+    return report
@@ -17,12 +17,12 @@ def create_notification(db: Session, notification_in: NotificationCreate) -> Not
     return notification
 
 def get_unread_notifications(db: Session, recipient: str) -> List[Notification]:
-    return db.query(Notification).filter(Notification.recipient == recipient, Notification.is_read == False).all()
+    return db.query(Notification).filter(Notification.recipient == recipient, Notification.read == False).all()
 
 def mark_as_read(db: Session, notification_id: int) -> Notification | None:
     notification = db.query(Notification).filter(Notification.id == notification_id).first()
     if notification:
-        notification.is_read = True
+        notification.read = True
         db.commit()
         db.refresh(notification)
     return notification
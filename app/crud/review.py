@@ -1,16 +1,19 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
-from sqlalchemy import func
 from app.models.review import Review
 from app.schemas.review import ReviewCreateRequest, ReviewUpdateRequest
 from app.models.user import User
 from app.models.book import Book
+from app.utils.pagination import paginate, DEFAULT_PAGE_SIZE
 
 def get_reviews_by_user(db: Session, user_id: int) -> List[Review]:
     return db.query(Review).filter(Review.user_id == user_id).all()
 
-def get_reviews_by_book(db: Session, book_id: int) -> List[Review]:
-    return db.query(Review).filter(Review.book_id == book_id).all()
+def get_reviews_by_book(db: Session, book_id: int, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE, include_total: bool = False):
+    query = db.query(Review)\
+              .options(joinedload(Review.user), joinedload(Review.book))\
+              .filter(Review.book_id == book_id)
+    return paginate(query, Review, cursor, limit, include_total)
 
 def get_review_by_user_and_book(db: Session, user_id: int, book_id: int) -> Optional[Review]:
     return db.query(Review).filter(Review.user_id == user_id, Review.book_id == book_id).first()
@@ -48,7 +51,10 @@ def delete_review(db: Session, review_id: int):
         db.commit()
     return review
 
+def review_stats(rating_sum: int, rating_count: int) -> dict:
+    return {"average_rating": rating_sum / rating_count if rating_count else 0, "total_reviews": rating_count}
+
 def get_review_stats(db: Session, book_id: int):
-    avg_rating = db.query(func.avg(Review.rating)).filter(Review.book_id == book_id).scalar() or 0
-    total_reviews = db.query(Review).filter(Review.book_id == book_id).count()
-    return {"average_rating": avg_rating, "total_reviews": total_reviews}
+    # rating_sum / rating_count are maintained by app.db.counters
+    row = db.query(Book.rating_sum, Book.rating_count).filter(Book.id == book_id).first()
+    return review_stats(*row) if row else review_stats(0, 0)
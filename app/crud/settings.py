@@ -1,6 +1,7 @@
 # crud/settings.py
 from sqlalchemy.orm import Session
 from app.models.settings import AdminSettings
+from app.core.settings_cache import SettingsSnapshot, settings_cache
 from typing import Optional
 
 def get_settings(db: Session) -> AdminSettings:
@@ -13,10 +14,15 @@ def get_settings(db: Session) -> AdminSettings:
         db.refresh(settings)
     return settings
 
+def get_cached_settings(db: Session) -> SettingsSnapshot:
+    """Settings for hot paths (borrow limits); served from the per-worker cache."""
+    return settings_cache.get(db, get_settings)
+
 def set_borrow_day_limit(db: Session, value: int) -> AdminSettings:
     settings = get_settings(db)
     settings.borrow_day_limit = value
     db.commit()
+    settings_cache.invalidate()
     db.refresh(settings)
     return settings
 
@@ -24,6 +30,7 @@ def set_borrow_extend_limit(db: Session, value: int) -> AdminSettings:
     settings = get_settings(db)
     settings.borrow_extend_limit = value
     db.commit()
+    settings_cache.invalidate()
     db.refresh(settings)
     return settings
 
@@ -31,6 +38,7 @@ def set_borrow_book_limit(db: Session, value: int) -> AdminSettings:
     settings = get_settings(db)
     settings.borrow_book_limit = value
     db.commit()
+    settings_cache.invalidate()
     db.refresh(settings)
     return settings
 
@@ -38,5 +46,6 @@ def set_booking_days_limit(db: Session, value: int) -> AdminSettings:
     settings = get_settings(db)
     settings.booking_days_limit = value
     db.commit()
+    settings_cache.invalidate()
     db.refresh(settings)
     return settings
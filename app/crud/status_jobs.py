@@ -0,0 +1,140 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.crud import settings as settings_crud
+from app.db.counters import apply_borrow_delta
+from app.models.book import Book
+from app.models.booking import Booking, BookingStatusEnum
+from app.models.borrow import Borrow, BorrowStatus
+from app.models.notification import Notification
+from app.models.user import User
+
+STATUS_BATCH_SIZE = 500
+
+# Borrows that become OVERDUE once their due date has passed
+DUE = (BorrowStatus.ACCEPTED, BorrowStatus.ACTIVE)
+
+
+def _today() -> date:
+    # Same clock as create_borrow, which stamps due_date from utcnow
+    return datetime.utcnow().date()
+
+
+def _notify(db: Session, rows: list):
+    """Queue notifications in the transaction that changed the status, so none are lost or doubled."""
+    if rows:
+        db.execute(insert(Notification), rows)
+
+
+# ------------------------------
+# Overdue borrows
+# ------------------------------
+def _mark_overdue_batch(db: Session, from_status: BorrowStatus, today: date, batch_size: int) -> int:
+    """
+    Flip one batch with a single UPDATE guarded on the status that was read. The rows are
+    locked first (MySQL skips rows another worker holds); if a concurrent return still
+    got in between, the batch is rolled back and read again so the counters stay exact.
+    """
+    while True:
+        rows = db.execute(
+            select(Borrow.id, Borrow.user_id, User.email, Book.title, Borrow.due_date)
+            .join(User, User.id == Borrow.user_id)
+            .join(Book, Book.id == Borrow.book_id)
+            .where(Borrow.status == from_status, Borrow.due_date < today)
+            .order_by(Borrow.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True, of=Borrow)
+        ).all()
+        if not rows:
+            db.rollback()
+            return 0
+        result = db.execute(
+            update(Borrow)
+            .where(Borrow.id.in_([r.id for r in rows]), Borrow.status == from_status)
+            .values(status=BorrowStatus.OVERDUE)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == len(rows):
+            break
+        db.rollback()
+
+    connection = db.connection()
+    for user_id, n in Counter(r.user_id for r in rows).items():
+        apply_borrow_delta(connection, user_id, from_status, -n)
+        apply_borrow_delta(connection, user_id, BorrowStatus.OVERDUE, n)
+    _notify(db, [
+        {"recipient": r.email, "message": f'"{r.title}" was due on {r.due_date.isoformat()}, please return it.'[:255]}
+        for r in rows
+    ])
+    db.commit()
+    return len(rows)
+
+
+def mark_overdue_borrows(db: Session, today: Optional[date] = None, batch_size: int = STATUS_BATCH_SIZE) -> dict:
+    """Move borrows past their due date to OVERDUE, batch_size rows per transaction."""
+    today = today or _today()
+    flipped = 0
+    for from_status in DUE:
+        while True:
+            n = _mark_overdue_batch(db, from_status, today, batch_size)
+            flipped += n
+            if n < batch_size:
+                break
+    return {"rows": flipped, "notifications": flipped}
+
+
+# ------------------------------
+# Expired bookings
+# ------------------------------
+def _expire_batch(db: Session, cutoff: date, batch_size: int) -> int:
+    """One batch of expire_bookings, read, flipped and notified like _mark_overdue_batch."""
+    while True:
+        rows = db.execute(
+            select(Booking.id, User.email, Book.title)
+            .join(User, User.id == Booking.user_id)
+            .join(Book, Book.id == Booking.book_id)
+            .where(Booking.status == BookingStatusEnum.PENDING, Booking.expected_available_date < cutoff)
+            .order_by(Booking.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True, of=Booking)
+        ).all()
+        if not rows:
+            db.rollback()
+            return 0
+        result = db.execute(
+            update(Booking)
+            .where(Booking.id.in_([r.id for r in rows]), Booking.status == BookingStatusEnum.PENDING)
+            .values(status=BookingStatusEnum.EXPIRED)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == len(rows):
+            break
+        db.rollback()
+
+    _notify(db, [
+        {"recipient": r.email, "message": f'Your booking for "{r.title}" has expired.'[:255]}
+        for r in rows
+    ])
+    db.commit()
+    return len(rows)
+
+
+def expire_bookings(db: Session, today: Optional[date] = None, batch_size: int = STATUS_BATCH_SIZE) -> dict:
+    """
+    Move PENDING bookings to EXPIRED once booking_days_limit days have passed since
+    their expected_available_date, batch_size rows per transaction.
+    """
+    today = today or _today()
+    hold_days = settings_crud.get_cached_settings(db).booking_days_limit or 0
+    cutoff = today - timedelta(days=hold_days)
+    expired = 0
+    while True:
+        n = _expire_batch(db, cutoff, batch_size)
+        expired += n
+        if n < batch_size:
+            break
+    return {"rows": expired, "notifications": expired}
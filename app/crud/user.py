@@ -1,15 +1,13 @@
 from sqlalchemy.orm import Session
 from app.models.user import User, UserRoleEnum
 from app.schemas.user import RegisterRequest
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.utils.hashing import password_hasher
 
 def get_user_by_username(db: Session, username: str):
     return db.query(User).filter(User.username == username).first()
 
 def create_user(db: Session, user_in: RegisterRequest, role: UserRoleEnum = UserRoleEnum.USER):
-    hashed_password = pwd_context.hash(user_in.password)
+    hashed_password = password_hasher.hash(user_in.password)
     db_user = User(
         username=user_in.username,
         name=user_in.name,
@@ -24,6 +22,13 @@ def create_user(db: Session, user_in: RegisterRequest, role: UserRoleEnum = User
 
 def authenticate_user(db: Session, username: str, password: str):
     user = get_user_by_username(db, username)
-    if not user or not pwd_context.verify(password, user.password):
+    if not user:
+        return None
+    valid, new_hash = password_hasher.verify_and_update(password, user.password)
+    if not valid:
         return None
+    if new_hash:
+        # Stored hash uses an old cost factor; upgrade it while we have the plaintext
+        user.password = new_hash
+        db.commit()
     return user
@@ -0,0 +1,45 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.core.config import settings
+from app.db.session import pool_options, create_replica_router, replica_engines
+from app.db.routing import RoutingSession
+
+# Async drivers for the sync URLs used elsewhere (Alembic and scripts keep the sync engine)
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.drivername}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+def create_async_db_engine(url: str):
+    return create_async_engine(async_database_url(url), **pool_options(is_async=True))
+
+async_engine = create_async_db_engine(settings.MYSQL_URL)
+async_replica_engines = [create_async_db_engine(url) for url in settings.MYSQL_REPLICA_URLS]
+async_replica_router = create_replica_router(
+    async_engine.sync_engine, [e.sync_engine for e in async_replica_engines],
+    # Lag is measured from a plain thread, which cannot drive the async engines
+    probes=replica_engines,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False,
+    sync_session_class=RoutingSession, router=async_replica_router,
+)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -0,0 +1,258 @@
+from collections import Counter
+from typing import Callable, Dict, Tuple
+
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.core.cache import response_cache, BOOKS, FEATURED
+from app.db.versioning import bump_versions_after_commit
+from app.models.book import Book
+from app.models.borrow import Borrow, BorrowStatus
+from app.models.counter import BorrowCounter, UserBorrowCounter
+from app.models.review import Review
+
+# Drifted rows listed per section of a reconcile report
+MAX_REPORTED_DRIFT = 100
+
+
+# ------------------------------
+# Maintenance (same transaction as the write)
+# ------------------------------
+def _old_value(obj, attr: str):
+    history = inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, attr)
+
+
+def _collect(session) -> Tuple[Counter, Counter, Dict[int, list]]:
+    """Net counter deltas of one flush: per status, per (user, status) and per book [sum, count]."""
+    statuses, user_statuses, ratings = Counter(), Counter(), {}
+
+    def borrow(user_id, status, delta):
+        statuses[status] += delta
+        user_statuses[(user_id, status)] += delta
+
+    def rating(book_id, value, delta):
+        totals = ratings.setdefault(book_id, [0, 0])
+        totals[0] += value * delta
+        totals[1] += delta
+
+    for obj in session.new:
+        if isinstance(obj, Borrow):
+            borrow(obj.user_id, obj.status, 1)
+        elif isinstance(obj, Review):
+            rating(obj.book_id, obj.rating, 1)
+    for obj in session.dirty:
+        if isinstance(obj, Borrow) and session.is_modified(obj):
+            old = (_old_value(obj, "user_id"), _old_value(obj, "status"))
+            if old != (obj.user_id, obj.status):
+                borrow(*old, -1)
+                borrow(obj.user_id, obj.status, 1)
+        elif isinstance(obj, Review) and session.is_modified(obj):
+            old = (_old_value(obj, "book_id"), _old_value(obj, "rating"))
+            if old != (obj.book_id, obj.rating):
+                rating(*old, -1)
+                rating(obj.book_id, obj.rating, 1)
+    for obj in session.deleted:
+        if isinstance(obj, Borrow):
+            borrow(_old_value(obj, "user_id"), _old_value(obj, "status"), -1)
+        elif isinstance(obj, Review):
+            rating(_old_value(obj, "book_id"), _old_value(obj, "rating"), -1)
+    return statuses, user_statuses, ratings
+
+
+def _insert(connection, table):
+    if connection.dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
+def _add(connection, table, key: dict, delta: int):
+    """Atomic `total = total + delta`, creating the row on first use."""
+    stmt = _insert(connection, table).values(**key, total=delta)
+    if connection.dialect.name == "mysql":
+        stmt = stmt.on_duplicate_key_update(total=table.c.total + delta)
+    else:
+        stmt = stmt.on_conflict_do_update(index_elements=list(key), set_={"total": table.c.total + delta})
+    connection.execute(stmt)
+
+
+def apply_borrow_delta(connection, user_id: int, status: BorrowStatus, delta: int):
+    """Adjust the counters explicitly, for Core/bulk borrow updates that bypass the ORM flush."""
+    _add(connection, BorrowCounter.__table__, {"status": status}, delta)
+    _add(connection, UserBorrowCounter.__table__, {"user_id": user_id, "status": status}, delta)
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_counters(session, flush_context):
+    statuses, user_statuses, ratings = _collect(session)
+    if not (statuses or ratings):
+        return
+    connection = session.connection()
+    for status, delta in statuses.items():
+        if delta:
+            _add(connection, BorrowCounter.__table__, {"status": status}, delta)
+    for (user_id, status), delta in user_statuses.items():
+        if delta:
+            _add(connection, UserBorrowCounter.__table__, {"user_id": user_id, "status": status}, delta)
+    changed_books = [book_id for book_id, delta in ratings.items() if any(delta)]
+    for book_id in changed_books:
+        connection.execute(rating_update(book_id, *ratings[book_id]))
+    if changed_books:
+        # average_rating is part of book payloads and orders the recommendations
+        bump_versions_after_commit(session, ["books"])
+        session.info["ratings_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_rated_books(session):
+    if session.info.pop("ratings_changed", False):
+        response_cache.invalidate(BOOKS, FEATURED)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rated_books(session):
+    session.info.pop("ratings_changed", None)
+
+
+def _average(rating_sum, rating_count):
+    # * 1.0 keeps SQLite from doing integer division
+    return func.coalesce(rating_sum * 1.0 / func.nullif(rating_count, 0), 0)
+
+
+def rating_update(book_id: int, sum_delta: int, count_delta: int):
+    """
+    UPDATE adding a review delta to a book and recomputing average_rating from the
+    new totals in the same statement. average_rating is assigned first because MySQL
+    evaluates SET clauses left to right against the already-updated columns.
+    """
+    books = Book.__table__
+    new_sum, new_count = books.c.rating_sum + sum_delta, books.c.rating_count + count_delta
+    return (
+        update(books)
+        .where(books.c.id == book_id)
+        .ordered_values(
+            (books.c.average_rating, _average(new_sum, new_count)),
+            (books.c.rating_sum, new_sum),
+            (books.c.rating_count, new_count),
+        )
+    )
+
+
+# ------------------------------
+# Reconciliation
+# ------------------------------
+def _drift(expected: dict, actual: dict, key_names: Tuple[str, ...], missing=0) -> list:
+    drifted = []
+    for key in sorted(expected.keys() | actual.keys(), key=str):
+        want, have = expected.get(key, missing), actual.get(key, missing)
+        if want != have:
+            entry = dict(zip(key_names, key if isinstance(key, tuple) else (key,)))
+            entry.update(expected=want, actual=have)
+            drifted.append(entry)
+    return drifted
+
+
+def _reset(db: Session, table, rows: list, key_names: Tuple[str, ...]):
+    for row in rows:
+        key = {name: row[name] for name in key_names}
+        _add(db.connection(), table, key, row["expected"] - row["actual"])
+
+
+def _status(value) -> BorrowStatus:
+    return value if isinstance(value, BorrowStatus) else BorrowStatus(value)
+
+
+def reconcile(db: Session, fix: bool = False) -> dict:
+    """
+    Recompute every counter from borrows and reviews and report the differences.
+    With fix=True the counters are corrected in one transaction. Writes that commit
+    while this runs can show up as drift, so fix during a quiet period.
+    """
+    expected = {_status(s): n for s, n in db.execute(
+        select(Borrow.status, func.count(Borrow.id)).group_by(Borrow.status))}
+    actual = {_status(s): n for s, n in db.execute(select(BorrowCounter.status, BorrowCounter.total))}
+    status_drift = _drift(expected, actual, ("status",))
+
+    expected = {(u, _status(s)): n for u, s, n in db.execute(
+        select(Borrow.user_id, Borrow.status, func.count(Borrow.id)).group_by(Borrow.user_id, Borrow.status))}
+    actual = {(u, _status(s)): n for u, s, n in db.execute(
+        select(UserBorrowCounter.user_id, UserBorrowCounter.status, UserBorrowCounter.total))}
+    user_drift = _drift(expected, actual, ("user_id", "status"))
+
+    expected = {b: (s, n) for b, s, n in db.execute(
+        select(Review.book_id, func.sum(Review.rating), func.count(Review.id)).group_by(Review.book_id))}
+    actual = {b: (s, n) for b, s, n in db.execute(
+        select(Book.id, Book.rating_sum, Book.rating_count).where(Book.rating_count != 0))}
+    book_drift = _drift(expected, actual, ("book_id",), missing=(0, 0))
+
+    if fix:
+        _reset(db, BorrowCounter.__table__, status_drift, ("status",))
+        _reset(db, UserBorrowCounter.__table__, user_drift, ("user_id", "status"))
+        for row in book_drift:
+            rating_sum, rating_count = row["expected"]
+            db.execute(update(Book).where(Book.id == row["book_id"]).values(
+                rating_sum=rating_sum, rating_count=rating_count,
+                average_rating=rating_sum / rating_count if rating_count else 0,
+            ))
+        if book_drift:
+            bump_versions_after_commit(db, ["books"])
+        db.commit()
+
+    if fix and book_drift:
+        response_cache.invalidate(BOOKS, FEATURED)
+    for row in status_drift + user_drift:
+        row["status"] = row["status"].value
+    return {
+        "fixed": fix,
+        "drift": {
+            "borrow_status": len(status_drift),
+            "user_borrows": len(user_drift),
+            "book_ratings": len(book_drift),
+        },
+        "borrow_status": status_drift,
+        "user_borrows": user_drift[:MAX_REPORTED_DRIFT],
+        "book_ratings": book_drift[:MAX_REPORTED_DRIFT],
+    }
+
+
+# ------------------------------
+# Backfill
+# ------------------------------
+def backfill_ratings(db: Session, batch_size: int = 1000, on_progress: Callable[[int], None] = None) -> int:
+    """
+    Recompute rating_sum, rating_count and average_rating for every book, batch_size
+    books per transaction (one GROUP BY over their reviews, one executemany UPDATE).
+    Returns the number of books written.
+    """
+    last_id, written = 0, 0
+    while True:
+        ids = db.execute(
+            select(Book.id).where(Book.id > last_id).order_by(Book.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        totals = {book_id: (rating_sum, rating_count) for book_id, rating_sum, rating_count in db.execute(
+            select(Review.book_id, func.sum(Review.rating), func.count(Review.id))
+            .where(Review.book_id.in_(ids))
+            .group_by(Review.book_id)
+        )}
+        rows = []
+        for book_id in ids:
+            rating_sum, rating_count = totals.get(book_id, (0, 0))
+            rows.append({
+                "id": book_id, "rating_sum": rating_sum, "rating_count": rating_count,
+                "average_rating": rating_sum / rating_count if rating_count else 0,
+            })
+        db.execute(update(Book), rows)
+        bump_versions_after_commit(db, ["books"])
+        db.commit()
+        written += len(ids)
+        last_id = ids[-1]
+        if on_progress:
+            on_progress(written)
+    response_cache.invalidate(BOOKS, FEATURED)
+    return written
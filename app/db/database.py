@@ -1,19 +1,4 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from app.core.config import settings
+# Kept for existing imports; the engine and sessions live in app.db.session
+from app.db.session import engine, SessionLocal, get_db
 
-SQLALCHEMY_DATABASE_URL = settings.MYSQL_URL
-
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={}  # MySQL doesn't need extra args
-)
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-def get_db():
-    db: Session = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+SQLALCHEMY_DATABASE_URL = engine.url.render_as_string(hide_password=False)
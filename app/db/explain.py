@@ -0,0 +1,69 @@
+import warnings
+from contextlib import contextmanager
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Dialects whose query plans full_table_scans() can read
+EXPLAIN_DIALECTS = ("mysql", "sqlite")
+
+
+@contextmanager
+def capture_queries(engine: Engine):
+    """Record every (statement, parameters) executed on engine inside the block."""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def full_table_scans(engine: Engine, statement: str, parameters=None) -> Optional[List[str]]:
+    """
+    Run EXPLAIN on statement and return the tables it reads with a full table scan,
+    or None when the dialect is not one of EXPLAIN_DIALECTS.
+
+    MySQL reports these as access type ALL. SQLite reports "SCAN <table>" without
+    an index; an ordered "SCAN <table> USING INDEX" walk is accepted because the
+    list queries it comes from are LIMITed.
+    """
+    dialect = engine.dialect.name
+    with engine.connect() as conn:
+        if dialect == "mysql":
+            rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters or ()).mappings().all()
+            return [row["table"] for row in rows if row["type"] == "ALL"]
+        if dialect == "sqlite":
+            rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters or ()).all()
+            scans = []
+            for row in rows:
+                detail = row[-1]
+                if detail.startswith("SCAN ") and " USING " not in detail:
+                    name = detail.split()[1]
+                    if name not in ("CONSTANT", "SUBQUERY") and not name.startswith("("):
+                        scans.append(name)
+            return scans
+    return None
+
+
+def assert_no_full_scans(engine: Engine, captured) -> None:
+    """Fail if any captured SELECT/UPDATE/DELETE does a full table scan."""
+    if engine.dialect.name not in EXPLAIN_DIALECTS:
+        warnings.warn(f"EXPLAIN check skipped: {engine.dialect.name} plans are not parsed (only {', '.join(EXPLAIN_DIALECTS)})")
+        return
+    offenders = []
+    for statement, parameters in captured:
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        if verb not in ("SELECT", "UPDATE", "DELETE"):
+            continue
+        tables = full_table_scans(engine, statement, parameters)
+        if tables:
+            offenders.append(f"{', '.join(tables)}: {' '.join(statement.split())}")
+    if offenders:
+        raise AssertionError("Full table scan in hot query:\n" + "\n".join(offenders))
@@ -0,0 +1,52 @@
+from collections import Counter
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from app.db.counters import _old_value
+from app.models.book import Book
+from app.models.media import MediaBlob
+from app.utils.media_store import is_blob_name
+
+# Book columns that can name a content-addressed blob
+MEDIA_COLUMNS = ("cover", "pdf_file", "audio_file")
+
+
+def _collect(session) -> Counter:
+    """Net reference deltas of one flush, per blob name."""
+    deltas = Counter()
+
+    def refs(values, delta):
+        for value in values:
+            if is_blob_name(value):
+                deltas[value] += delta
+
+    for obj in session.new:
+        if isinstance(obj, Book):
+            refs((getattr(obj, c) for c in MEDIA_COLUMNS), 1)
+    for obj in session.dirty:
+        if isinstance(obj, Book) and session.is_modified(obj):
+            for column in MEDIA_COLUMNS:
+                old, new = _old_value(obj, column), getattr(obj, column)
+                if old != new:
+                    refs((old,), -1)
+                    refs((new,), 1)
+    for obj in session.deleted:
+        if isinstance(obj, Book):
+            refs((_old_value(obj, c) for c in MEDIA_COLUMNS), -1)
+    return deltas
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_media_refs(session, flush_context):
+    deltas = _collect(session)
+    if not any(deltas.values()):
+        return
+    blobs = MediaBlob.__table__
+    connection = session.connection()
+    for name, delta in deltas.items():
+        if delta:
+            # updated_at moves too, so a blob that just lost its last reference gets the full GC grace period
+            connection.execute(
+                update(blobs).where(blobs.c.name == name).values(ref_count=blobs.c.ref_count + delta)
+            )
@@ -0,0 +1,165 @@
+import itertools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+logger = logging.getLogger(__name__)
+
+# Set once anything in the current request flushes a write; later reads in
+# that request go to the primary so they see their own writes.
+primary_pinned: ContextVar[bool] = ContextVar("primary_pinned", default=False)
+
+
+@event.listens_for(Session, "after_flush")
+def _pin_primary_after_write(session, flush_context):
+    primary_pinned.set(True)
+
+
+def pin_primary():
+    """Route the rest of this request's reads to the primary."""
+    primary_pinned.set(True)
+
+
+# Lag query and column: MySQL 8.0.22+, then the older names
+LAG_QUERIES = (
+    ("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+    ("SHOW SLAVE STATUS", "Seconds_Behind_Master"),
+)
+
+
+class ReplicaRouter:
+    """
+    Picks a replica engine for a read, round-robin over replicas whose lag is within
+    max_lag seconds. pick() only reads the cached lag; start() re-measures it every
+    check_interval seconds on a daemon thread (or call refresh()), so no request
+    waits on a lag query. probes are the sync engines to measure with, one per
+    replica, for routers whose replicas are the sync_engine of async engines.
+    """
+
+    def __init__(self, primary, replicas: List, max_lag: float, fallback_to_primary: bool,
+                 check_interval: float, probes: Optional[List] = None):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.probes = list(probes) if probes is not None else list(self.replicas)
+        self.max_lag = max_lag
+        self.fallback_to_primary = fallback_to_primary
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._lag = {id(e): 0.0 for e in self.replicas}
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def measure_lag(engine) -> Optional[float]:
+        """Replication lag in seconds, or None if the replica is unreachable/broken."""
+        if engine.dialect.name != "mysql":
+            return 0.0
+        try:
+            with engine.connect() as conn:
+                for query, column in LAG_QUERIES:
+                    try:
+                        row = conn.execute(text(query)).mappings().first()
+                        break
+                    except DBAPIError:
+                        if query == LAG_QUERIES[-1][0]:
+                            raise
+        except Exception:
+            logger.warning("Replica %s lag check failed", engine.url.host, exc_info=True)
+            return None
+        if row is None:
+            # Not configured as a replica (e.g. a standalone stand-in database)
+            return 0.0
+        lag = row.get(column)
+        return float(lag) if lag is not None else None
+
+    def refresh(self):
+        """Measure every replica without holding the lock, then publish the results."""
+        lags = {id(replica): self.measure_lag(probe) for replica, probe in zip(self.replicas, self.probes)}
+        with self._lock:
+            self._lag.update(lags)
+
+    def _loop(self):
+        while True:
+            self.refresh()
+            if self._stop.wait(self.check_interval):
+                return
+
+    def start(self):
+        if not self.replicas or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="replica-lag", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def healthy_replicas(self) -> List:
+        with self._lock:
+            return [
+                e for e in self.replicas
+                if self._lag[id(e)] is not None and self._lag[id(e)] <= self.max_lag
+            ]
+
+    def pick(self):
+        if not self.replicas:
+            return self.primary
+        healthy = self.healthy_replicas()
+        if healthy:
+            with self._lock:
+                for _ in range(len(self.replicas)):
+                    engine = next(self._cycle)
+                    if engine in healthy:
+                        return engine
+        if self.fallback_to_primary:
+            return self.primary
+        # No fallback: use the least-lagged reachable replica
+        with self._lock:
+            reachable = [(self._lag[id(e)], i, e) for i, e in enumerate(self.replicas) if self._lag[id(e)] is not None]
+        if not reachable:
+            return self.primary
+        return min(reachable)[2]
+
+    def status(self) -> list:
+        with self._lock:
+            return [
+                {"url": e.url.render_as_string(hide_password=True), "lag_seconds": self._lag[id(e)]}
+                for e in self.replicas
+            ]
+
+
+class RoutingSession(Session):
+    """
+    Session for read dependencies: SELECTs go to a replica chosen by the router,
+    while flushes, DML, SELECT ... FOR UPDATE and any read after a write in the
+    same request go to the primary.
+    """
+
+    def __init__(self, *args, router: ReplicaRouter = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.router = router
+        self._replica = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.router is None:
+            return super().get_bind(mapper=mapper, clause=clause, **kw)
+        if self._flushing or isinstance(clause, UpdateBase) or getattr(clause, "_for_update_arg", None) is not None:
+            primary_pinned.set(True)
+            return self.router.primary
+        if primary_pinned.get() or self.new or self.dirty or self.deleted:
+            return self.router.primary
+        # One replica per session, so a request reads from a single snapshot
+        if self._replica is None:
+            self._replica = self.router.pick()
+        return self._replica
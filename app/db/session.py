@@ -1,11 +1,118 @@
+import threading
+import time
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.db.routing import ReplicaRouter, RoutingSession
+from app.db import versioning  # noqa: F401  (registers the table version listeners)
+from app.db import counters  # noqa: F401  (registers the borrow/review counter listeners)
+from app.db import media_refs  # noqa: F401  (registers the media blob reference listener)
 
-# Use exact attribute name from Settings
-engine = create_engine(settings.MYSQL_URL, future=True, pool_pre_ping=True)
+
+# ------------------------------
+# Pool instrumentation
+# ------------------------------
+class PoolWaitStats:
+    """How long callers waited to check a connection out of the pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "total_wait_ms": round(self.total_wait * 1000, 3),
+                "avg_wait_ms": round(self.total_wait * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+class _TimedCheckout:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_stats.record(time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+# ------------------------------
+# Engine factory
+# ------------------------------
+def pool_options(is_async: bool = False) -> dict:
+    """Pool settings of one engine; the sync and async engines are sized separately."""
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_ASYNC_POOL_SIZE if is_async else settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_ASYNC_MAX_OVERFLOW if is_async else settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def create_db_engine(url: str):
+    """The only place sync engines are created; pool tuning comes from Settings."""
+    return create_engine(url, future=True, **pool_options())
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    status = {
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "timeout": pool.timeout(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        status.update(wait_stats.as_dict())
+    return status
+
+
+def create_replica_router(primary, replicas, probes=None) -> ReplicaRouter:
+    return ReplicaRouter(
+        primary,
+        replicas,
+        max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+        fallback_to_primary=settings.REPLICA_FALLBACK_TO_PRIMARY,
+        check_interval=settings.REPLICA_LAG_CHECK_SECONDS,
+        probes=probes,
+    )
+
+
+engine = create_db_engine(settings.MYSQL_URL)
+replica_engines = [create_db_engine(url) for url in settings.MYSQL_REPLICA_URLS]
+replica_router = create_replica_router(engine, replica_engines)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Without replicas the router always answers with the primary
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=RoutingSession, router=replica_router)
 
 def get_db():
     db = SessionLocal()
@@ -13,3 +120,10 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,111 @@
+"""
+Per-table version counters (table_versions) behind version-based ETags, the settings
+cache and cross-worker response cache invalidation.
+
+Versions are bumped after the writing transaction commits, in a short transaction of
+their own, not inside it: one row per table means a bump inside every catalog write
+(including each borrow, return and review, through the counters) would hold that row
+lock until commit and serialize all of them. The trade-off is that a version can lag
+its commit by one statement, and a crash or error between the two leaves it unbumped
+until the next write to the table, so readers may revalidate against stale data for
+that long. Bumps are idempotent increments, so concurrent writers never conflict.
+"""
+import logging
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.table_version import TableVersion
+
+logger = logging.getLogger(__name__)
+
+# Tables whose collection endpoints are served with version-based ETags, plus
+# admin_settings, whose version tells the settings cache to reload, and
+# featured_books, whose version invalidates the response cache in every worker
+VERSIONED_TABLES = ("books", "categories", "admin_settings", "featured_books")
+
+
+@event.listens_for(TableVersion.__table__, "after_create")
+def _seed_versions(table, connection, **kw):
+    connection.execute(insert(table), [{"name": name, "version": 0} for name in VERSIONED_TABLES])
+
+
+@event.listens_for(Session, "after_flush")
+def _record_versions(session, flush_context):
+    """Remember every versioned table this flush wrote to; they are bumped once it commits."""
+    touched = {
+        obj.__table__.name
+        for obj in chain(session.new, session.dirty, session.deleted)
+        if getattr(obj, "__tablename__", None) in VERSIONED_TABLES
+    }
+    if touched:
+        bump_versions_after_commit(session, touched)
+
+
+def bump_versions_after_commit(session: Session, names: Iterable[str]):
+    """Bump table versions once the session's transaction commits, for Core/bulk writes that bypass the ORM flush."""
+    pending = session.info.setdefault("pending_versions", {})
+    pending.setdefault(session.connection().engine, set()).update(names)
+
+
+@event.listens_for(Session, "after_commit")
+def _commit_versions(session):
+    pending = session.info.pop("pending_versions", None)
+    if pending:
+        session.info["committed_versions"] = pending
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _bump_committed_versions(session, transaction):
+    # Runs once the root transaction has returned its connection to the pool. Tables
+    # still pending were rolled back; a rolled-back savepoint only costs an extra bump.
+    if transaction.parent is not None:
+        return
+    session.info.pop("pending_versions", None)
+    committed = session.info.pop("committed_versions", None)
+    for engine, names in (committed or {}).items():
+        try:
+            with engine.begin() as connection:
+                bump_versions(connection, names)
+        except Exception:
+            logger.exception("Could not bump table versions for %s", sorted(names))
+
+
+def bump_versions(connection, names: Iterable[str]):
+    """Bump table versions on connection, in its current transaction."""
+    names = set(names)
+    result = connection.execute(
+        update(TableVersion)
+        .where(TableVersion.name.in_(names))
+        .values(version=TableVersion.version + 1, updated_at=func.now())
+    )
+    if result.rowcount < len(names):
+        existing = set(connection.execute(select(TableVersion.name).where(TableVersion.name.in_(names))).scalars())
+        connection.execute(insert(TableVersion), [{"name": name, "version": 1} for name in names - existing])
+
+
+def _versions_stmt(names: Iterable[str]):
+    return select(TableVersion.name, TableVersion.version, TableVersion.updated_at).where(TableVersion.name.in_(list(names)))
+
+
+def _fold(rows) -> Tuple[str, Optional[datetime]]:
+    token = ",".join(f"{name}:{version}" for name, version, _ in sorted(rows))
+    stamps = [updated_at for _, _, updated_at in rows if updated_at is not None]
+    return token, max(stamps) if stamps else None
+
+
+def get_versions(db: Session, names: Iterable[str]) -> Tuple[str, Optional[datetime]]:
+    """Return (version token, last change time) for the given tables."""
+    return _fold(db.execute(_versions_stmt(names)).all())
+
+
+def get_version_map(db: Session, names: Iterable[str]) -> Dict[str, int]:
+    """Return {table: version} for the given tables."""
+    return {name: version for name, version, _ in db.execute(_versions_stmt(names))}
+
+
+async def get_versions_async(db, names: Iterable[str]) -> Tuple[str, Optional[datetime]]:
+    return _fold((await db.execute(_versions_stmt(names))).all())
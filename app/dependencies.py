@@ -5,10 +5,11 @@ from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.models.user import User, UserRoleEnum
 from app.core.config import settings
+from app.core.user_cache import Principal, user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-def get_current_user(token: str = Security(oauth2_scheme), db: Session = Depends(get_db)):
+def get_current_user(token: str = Security(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Not authenticated",
@@ -23,12 +24,19 @@ def get_current_user(token: str = Security(oauth2_scheme), db: Session = Depends
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == username).first()
-    if not user:
-        raise credentials_exception
-    return user
+    principal = user_cache.get(username)
+    if principal is None:
+        user = db.query(User).filter(User.username == username).first()
+        if not user:
+            raise credentials_exception
+        principal = Principal.from_user(user)
+        user_cache.set(principal)
+
+    if not principal.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
+    return principal
 
-def require_admin(user: User = Depends(get_current_user)):
+def require_admin(user: Principal = Depends(get_current_user)):
     if user.role != UserRoleEnum.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -1,9 +1,18 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from fastapi.staticfiles import StaticFiles
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.db.base import Base
-from app.db.session import engine
+from app.db.session import SessionLocal, engine, replica_router
+from app.db.async_session import async_engine, async_replica_engines, async_replica_router
+from app.utils.hashing import PasswordHasherBusy, password_hasher
+from app.core.config import settings
+from app.core.cache import response_cache
+from app.core.scheduler import scheduler
+from app.media_server import app as signed_media_app
+from app.utils.media_urls import SIGNED_FOLDERS
 from dotenv import load_dotenv
 import os
 
@@ -22,6 +31,7 @@ from app.routers.donations import router as donation_router
 from app.routers.featured import router as featured_router
 from app.routers.settings import router as settings_router
 from app.routers.notifications import router as notification_router
+from app.routers.admindashboard import router as admin_dashboard_router
 
 # Create all tables
 Base.metadata.create_all(bind=engine)
@@ -55,11 +65,61 @@ app.include_router(donation_router, prefix="/api/donations")
 app.include_router(featured_router)
 app.include_router(settings_router, prefix="/api/admin-settings")
 app.include_router(notification_router, prefix="/api/notifications")
+app.include_router(admin_dashboard_router)
+
+# ===== Backpressure =====
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many login attempts in progress, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
 
 # ===== Serve Media Files =====
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # project root
 MEDIA_DIR = os.path.join(BASE_DIR, "media")  # /home/tanzil/LMSBS-Fastapi/media
-app.mount("/media", StaticFiles(directory=MEDIA_DIR), name="media")
+
+class PublicMediaFiles(StaticFiles):
+    """
+    Book media only; imports, exports and unfinished uploads are not public. With
+    MEDIA_SIGNED_URLS, PDFs and audio are only served through signed links.
+    """
+    PRIVATE_DIRS = ("imports", "exports", "uploads") + (SIGNED_FOLDERS if settings.MEDIA_SIGNED_URLS else ())
+
+    async def get_response(self, path: str, scope):
+        if path.replace("\\", "/").split("/", 1)[0] in self.PRIVATE_DIRS:
+            raise StarletteHTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+# Before /media, which would otherwise claim these paths
+app.mount("/media/signed", signed_media_app, name="signed_media")
+app.mount("/media", PublicMediaFiles(directory=MEDIA_DIR), name="media")
+
+@app.on_event("startup")
+def start_scheduler():
+    if settings.SCHEDULER_ENABLED:
+        scheduler.start()
+
+@app.on_event("startup")
+def start_replica_lag_checks():
+    replica_router.start()
+    async_replica_router.start()
+
+@app.on_event("startup")
+def start_response_cache_version_polling():
+    response_cache.start(SessionLocal)
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    scheduler.stop()
+    replica_router.stop()
+    async_replica_router.stop()
+    response_cache.stop()
+    await async_engine.dispose()
+    for replica in async_replica_engines:
+        await replica.dispose()
+    password_hasher.shutdown()
 
 # Root endpoint
 @app.get("/")
@@ -0,0 +1,49 @@
+"""
+Signed media URLs (app.utils.media_urls), served without a database: the expiry
+and signature in the query string are the whole authorization, and the file is
+streamed straight from the media store. Mounted by app.main at /media/signed; run
+it on its own to scale media serving apart from the API:
+
+    uvicorn app.media_server:app --port 8001    # and MEDIA_URL_BASE=https://<host>
+"""
+import mimetypes
+import os
+
+from anyio import to_thread
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import Route
+
+from app.core.config import settings
+from app.utils import media_store
+from app.utils.http_cache import MediaFileResponse, file_etag, is_not_modified
+from app.utils.media_urls import SIGNED_FOLDERS, verify
+
+
+async def serve_signed_media(request: Request) -> Response:
+    key = request.path_params["key"]
+    if key.split("/", 1)[0] not in SIGNED_FOLDERS:
+        return PlainTextResponse("Not Found", status_code=404)
+    if not verify(key, request.query_params.get("expires"), request.query_params.get("sig")):
+        return PlainTextResponse("Invalid or expired link", status_code=403)
+    try:
+        path = media_store.get_backend().local_path(key)
+        stat = await to_thread.run_sync(os.stat, path)
+    except (OSError, TypeError, ValueError):
+        return PlainTextResponse("Not Found", status_code=404)
+
+    etag = file_etag(os.path.basename(key), stat)
+    # Browsers reuse the bytes (and revalidate range requests) for the life of the link
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={settings.MEDIA_URL_TTL_SECONDS}"}
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return MediaFileResponse(
+        path,
+        media_type=mimetypes.guess_type(key)[0] or "application/octet-stream",
+        stat_result=stat,
+        headers=headers,
+    )
+
+
+app = Starlette(routes=[Route("/{key:path}", serve_signed_media, methods=["GET", "HEAD"])])
@@ -3,4 +3,14 @@ from .book import Book
 from .category import Category
 from .borrow import Borrow
 from .booking import Booking
-from .review import Review
\ No newline at end of file
+from .review import Review
+from .user import User
+from .donation import DonationRequest
+from .featured import FeaturedBook
+from .notification import Notification
+from .settings import AdminSettings
+from .table_version import TableVersion
+from .book_import import BookImportJob
+from .export import ExportJob, ExportWatermark
+from .counter import BorrowCounter, UserBorrowCounter
+from .media import MediaBlob
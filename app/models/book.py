@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -11,10 +11,24 @@ class BookFormatEnum(str, enum.Enum):
 
 class Book(Base):
     __tablename__ = "books"
+    __table_args__ = (
+        # Catalog filters (see crud.book.query_books); created_at/id is the keyset order
+        Index("ix_books_created_at_id", "created_at", "id"),
+        Index("ix_books_available_created_at", "copies_available", "created_at"),
+        Index("ix_books_category_created_at", "category_id", "created_at", "id"),
+        Index("ix_books_format_created_at", "format", "created_at", "id"),
+        Index("ix_books_author", "author"),
+        Index("ix_books_average_rating_id", "average_rating", "id"),
+        Index("ix_books_updated_at", "updated_at"),
+        # Bulk import upsert keys (see crud.book_import)
+        Index("ix_books_isbn", "isbn", unique=True),
+        Index("ix_books_title_author", "title", "author"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
     author = Column(String(100), nullable=False)
+    isbn = Column(String(20), nullable=True)
     description = Column(String(500), nullable=True)
 
     cover = Column(String(255), nullable=True)
@@ -27,7 +41,10 @@ class Book(Base):
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
     category = relationship("Category", back_populates="books")
 
-    average_rating = Column(Float, default=0)
+    average_rating = Column(Float, default=0, server_default="0", nullable=False)
+    # Maintained from review writes by app.db.counters
+    rating_sum = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_count = Column(Integer, default=0, server_default="0", nullable=False)
     format = Column(Enum(BookFormatEnum), nullable=False)
 
     borrows = relationship("Borrow", back_populates="book", cascade="all, delete-orphan")
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum
+from sqlalchemy.sql import func
+from app.db.base import Base
+import enum
+
+class ImportStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+class BookImportJob(Base):
+    """
+    One bulk catalog import. last_line is committed together with each batch,
+    so a failed or interrupted import resumes right after the last stored batch.
+    """
+    __tablename__ = "book_import_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    filename = Column(String(255), nullable=False)
+    file_path = Column(String(500), nullable=False)
+    status = Column(Enum(ImportStatus, name="importstatus"), nullable=False, default=ImportStatus.PENDING)
+
+    last_line = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    inserted = Column(Integer, nullable=False, default=0)
+    updated = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    errors = Column(Text, nullable=True)  # JSON list of {"line", "error"}, capped
+    message = Column(String(500), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
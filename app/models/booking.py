@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Enum, Date, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, Enum, Date, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -12,6 +12,10 @@ class BookingStatusEnum(str, enum.Enum):
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        Index("ix_bookings_user_id", "user_id"),
+        Index("ix_bookings_status_date", "status", "expected_available_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
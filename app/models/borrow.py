@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Date, DateTime, Enum
+from sqlalchemy import Column, Integer, ForeignKey, Date, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -14,6 +14,17 @@ class BorrowStatus(enum.Enum):
 
 class Borrow(Base):
     __tablename__ = "borrows"
+    __table_args__ = (
+        # Active-borrow lookups: (user_id, book_id, return_date IS NULL)
+        Index("ix_borrows_user_book_return", "user_id", "book_id", "return_date"),
+        # Mark-overdue job: status = ACTIVE AND due_date < today (see crud.status_jobs)
+        Index("ix_borrows_status_due", "status", "due_date"),
+        Index("ix_borrows_status_return", "status", "return_date"),
+        Index("ix_borrows_user_status", "user_id", "status"),
+        Index("ix_borrows_created_at_id", "created_at", "id"),
+        # Incremental exports (see crud.export)
+        Index("ix_borrows_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     
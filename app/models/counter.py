@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, Enum
+from app.db.base import Base
+from app.models.borrow import BorrowStatus
+
+class BorrowCounter(Base):
+    """Number of borrows per status, maintained by app.db.counters."""
+    __tablename__ = "borrow_counters"
+
+    status = Column(Enum(BorrowStatus, name="borrowstatus"), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+
+class UserBorrowCounter(Base):
+    """Number of borrows per user and status, maintained by app.db.counters."""
+    __tablename__ = "user_borrow_counters"
+
+    user_id = Column(Integer, primary_key=True)
+    status = Column(Enum(BorrowStatus, name="borrowstatus"), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
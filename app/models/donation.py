@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -11,6 +11,10 @@ class DonationStatus(str, enum.Enum):
 
 class DonationRequest(Base):
     __tablename__ = "donation_requests"
+    __table_args__ = (
+        Index("ix_donation_requests_user_created_at", "user_id", "created_at"),
+        Index("ix_donation_requests_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
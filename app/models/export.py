@@ -0,0 +1,42 @@
+from sqlalchemy import Boolean, Column, DateTime, Enum, Integer, String, Text
+from sqlalchemy.sql import func
+from app.db.base import Base
+import enum
+
+class ExportFormat(str, enum.Enum):
+    CSV = "csv"
+    PARQUET = "parquet"
+
+class ExportStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+class ExportJob(Base):
+    """One analytics export; artifacts lists the chunk files written under media/exports/<id>/."""
+    __tablename__ = "export_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tables = Column(String(255), nullable=False)  # comma-separated
+    format = Column(Enum(ExportFormat, name="exportformat"), nullable=False, default=ExportFormat.CSV)
+    incremental = Column(Boolean, nullable=False, default=True)
+    status = Column(Enum(ExportStatus, name="exportstatus"), nullable=False, default=ExportStatus.PENDING)
+
+    rows = Column(Integer, nullable=False, default=0)
+    exported_until = Column(DateTime(timezone=True), nullable=True)
+    artifacts = Column(Text, nullable=True)  # JSON list of {"table", "file", "rows", "url"}
+    message = Column(String(500), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+class ExportWatermark(Base):
+    """Incremental exports pick up rows with updated_at after exported_until."""
+    __tablename__ = "export_watermarks"
+
+    table_name = Column(String(64), primary_key=True)
+    format = Column(Enum(ExportFormat, name="exportformat"), primary_key=True)
+    exported_until = Column(DateTime(timezone=True), nullable=False)
+    job_id = Column(Integer, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
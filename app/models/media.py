@@ -0,0 +1,28 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class MediaBlob(Base):
+    """
+    One content-addressed media file, "<sha256><ext>" in its folder (covers, pdfs, audio).
+    ref_count is the number of book columns naming it, maintained by app.db.media_refs.
+    """
+    __tablename__ = "media_blobs"
+    __table_args__ = (
+        # Garbage collection: unreferenced blobs not touched for the grace period
+        Index("ix_media_blobs_ref_count_updated_at", "ref_count", "updated_at"),
+    )
+
+    name = Column(String(80), primary_key=True)
+    folder = Column(String(20), nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    content_type = Column(String(50), nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    @property
+    def key(self) -> str:
+        return f"{self.folder}/{self.name}"
@@ -1,10 +1,17 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
 
 class Review(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index("ix_reviews_book_created_at", "book_id", "created_at", "id"),
+        Index("ix_reviews_user_book", "user_id", "book_id"),
+        # Incremental exports (see crud.export); updated_at is NULL until the first edit
+        Index("ix_reviews_updated_at", "updated_at"),
+        Index("ix_reviews_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -0,0 +1,109 @@
+import os
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from app.db.session import engine, replica_engines, replica_router, pool_status, get_db, SessionLocal, ReadSessionLocal
+from app.db import counters
+from app.db.async_session import async_engine, async_replica_engines
+from app.dependencies import require_admin
+from app.core.user_cache import Principal, user_cache
+from app.core.cache import response_cache
+from app.core.media_cache import media_file_cache
+from app.core.settings_cache import settings_cache
+from app.core.scheduler import scheduler
+from app.crud import export as export_crud
+from app.schemas.export import ExportCreate, ExportJobResponse
+
+router = APIRouter(prefix="/api/admin", tags=["Admin Dashboard"])
+
+@router.get("/db-pool", summary="Connection pool statistics for this worker")
+def db_pool_stats(user: Principal = Depends(require_admin)):
+    stats = {
+        "primary": pool_status(engine),
+        "primary_async": pool_status(async_engine.sync_engine),
+    }
+    if replica_engines:
+        stats["replicas"] = [pool_status(e) for e in replica_engines]
+        stats["replicas_async"] = [pool_status(e.sync_engine) for e in async_replica_engines]
+        stats["replica_lag"] = replica_router.status()
+    # Most connections this worker can open to each database
+    stats["max_connections_per_database"] = sum(
+        stats[name]["size"] + stats[name]["max_overflow"] for name in ("primary", "primary_async")
+    )
+    return stats
+
+@router.get("/auth-cache", summary="Authenticated-user cache statistics for this worker")
+def auth_cache_stats(user: Principal = Depends(require_admin)):
+    return user_cache.stats()
+
+@router.get("/response-cache", summary="Catalog response cache statistics for this worker")
+def response_cache_stats(user: Principal = Depends(require_admin)):
+    return response_cache.stats()
+
+@router.get("/settings-cache", summary="Admin settings cache statistics for this worker")
+def settings_cache_stats(user: Principal = Depends(require_admin)):
+    return settings_cache.stats()
+
+@router.get("/media-cache", summary="Book media file cache statistics for this worker")
+def media_cache_stats(user: Principal = Depends(require_admin)):
+    return media_file_cache.stats()
+
+@router.get("/jobs", summary="Scheduled job run metrics for this process")
+def job_stats(user: Principal = Depends(require_admin)):
+    return scheduler.stats()
+
+@router.post("/jobs/{name}/run", summary="Run a scheduled job now")
+def run_scheduled_job(name: str, user: Principal = Depends(require_admin)):
+    if scheduler.job_stats(name) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    scheduler.run_job(name)
+    return scheduler.job_stats(name)
+
+@router.post("/counters/reconcile", summary="Recompute borrow/review counters and report drift")
+def reconcile_counters(fix: bool = False, db: Session = Depends(get_db), user: Principal = Depends(require_admin)):
+    return counters.reconcile(db, fix=fix)
+
+# ------------------------------
+# Analytics exports
+# ------------------------------
+def run_export_job(job_id: int):
+    """Background task: reads go to a replica session, job bookkeeping to the primary."""
+    db, read_db = SessionLocal(), ReadSessionLocal()
+    try:
+        export_crud.run_export(db, read_db, export_crud.get_job(db, job_id))
+    except Exception:
+        pass  # recorded on the job as FAILED
+    finally:
+        read_db.close()
+        db.close()
+
+@router.post("/exports", response_model=ExportJobResponse, status_code=status.HTTP_202_ACCEPTED,
+             summary="Export table snapshots to CSV or Parquet files in the background")
+def create_export(
+    request: ExportCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    user: Principal = Depends(require_admin),
+):
+    try:
+        export_crud.check_format(request.format)
+    except export_crud.ExportUnavailable as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    job = export_crud.create_job(db, [t.value for t in request.tables], request.format, request.incremental)
+    background_tasks.add_task(run_export_job, job.id)
+    return job
+
+@router.get("/exports/{job_id}", response_model=ExportJobResponse, summary="Export job status and files")
+def export_status(job_id: int, db: Session = Depends(get_db), user: Principal = Depends(require_admin)):
+    job = export_crud.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job
+
+@router.get("/exports/{job_id}/files/{filename}", summary="Download one export file")
+def download_export(job_id: int, filename: str, db: Session = Depends(get_db), user: Principal = Depends(require_admin)):
+    job = export_crud.get_job(db, job_id)
+    path = export_crud.artifact_path(job, filename) if job else None
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Export file not found")
+    return FileResponse(path, filename=filename)
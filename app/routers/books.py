@@ -1,17 +1,38 @@
 from fastapi import (
     APIRouter, Depends, HTTPException, status, Request,
-    UploadFile, File, Form
+    UploadFile, File, Form, Query, BackgroundTasks, Header
 )
-from fastapi.responses import FileResponse
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-import os, shutil
-
-from app.db.session import get_db
-from app.schemas.book import BookResponse, BookFormatEnum
+from datetime import datetime
+import logging
+import os
+
+from app.db.session import get_db, get_read_db, SessionLocal
+from app.db.async_session import get_async_db, get_async_read_db, AsyncReadSessionLocal
+from app.schemas.book import (
+    BookFormatEnum, BookFilter, BookSortEnum, BookImportJobResponse,
+    UploadSessionCreate, UploadSessionResponse, StoredFileResponse,
+)
+from app.schemas.pagination import Page
+from app.utils.pagination import PageParams
 from app.crud import book as crud_book
+from app.crud.aio import book as aio_book
+from app.crud.aio import media as aio_media
+from app.crud import book_import
+from app.crud import media as media_crud
 from app.dependencies import require_admin
-from app.models.user import User
+from app.core.config import settings
+from app.core.user_cache import Principal
+from app.core.cache import response_cache, BOOKS
+from app.db.versioning import get_versions_async
+from app.utils.http_cache import make_etag, row_etag, is_not_modified, not_modified, validators, MediaFileResponse
+from app.utils.book_serializer import book_serializer
+from app.utils import media_urls, uploads
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Book Management📖"])
 
@@ -22,83 +43,155 @@ MEDIA_DIR = os.path.join(os.getcwd(), "media")
 COVER_DIR = os.path.join(MEDIA_DIR, "covers")
 PDF_DIR = os.path.join(MEDIA_DIR, "pdfs")
 AUDIO_DIR = os.path.join(MEDIA_DIR, "audio")
+IMPORT_DIR = os.path.join(MEDIA_DIR, "imports")
 
 os.makedirs(COVER_DIR, exist_ok=True)
 os.makedirs(PDF_DIR, exist_ok=True)
 os.makedirs(AUDIO_DIR, exist_ok=True)
+os.makedirs(IMPORT_DIR, exist_ok=True)
 
 
-def save_file(upload_file: UploadFile, folder: str) -> str:
-    """Save uploaded file into media folder and return filename."""
-    filename = upload_file.filename
-    file_path = os.path.join(folder, filename)
-    with open(file_path, "wb") as f:
-        shutil.copyfileobj(upload_file.file, f)
-    return filename  # only filename is stored in DB
+async def save_file(db: AsyncSession, upload_file: UploadFile, kind: str) -> str:
+    """
+    Stream an uploaded file into the media store and return its content-addressed
+    filename. Writes and hashing run on a worker thread, off the event loop.
+    """
+    try:
+        stored = await uploads.save_upload_file(upload_file, kind)
+    except uploads.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    await aio_media.register_blob(db, stored)
+    return stored.filename  # only filename is stored in DB
 
 
 # ------------------------------
 # Public Endpoints
 # ------------------------------
 
-@router.get("/list", response_model=List[dict])
-def list_books(db: Session = Depends(get_db), request: Request = None):
-    books = crud_book.get_all_books(db)
-    return [BookResponse.as_response(b, request) for b in books]
+def media_urls_window():
+    """Part of book payload ETags: signed media links change when their window rolls over."""
+    return media_urls.current_window() if settings.MEDIA_SIGNED_URLS else None
+
+
+@router.get("/list", response_model=Page[dict])
+async def list_books(page: PageParams = Depends(), db: AsyncSession = Depends(get_async_read_db), request: Request = None):
+    version, last_modified = await get_versions_async(db, ["books"])
+    etag = make_etag("books", version, str(request.base_url), media_urls_window(), sorted(request.query_params.multi_items()))
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    result = await aio_book.get_all_books(db, page.cursor, page.limit, page.include_total)
+    return book_serializer(request).page_response(result, headers=validators(etag, last_modified))
 
 
 @router.get("/{id}/is_available")
-def check_availability(id: int, db: Session = Depends(get_db)):
-    available = crud_book.is_book_available(db, id)
+async def check_availability(id: int, db: AsyncSession = Depends(get_async_read_db)):
+    available = await aio_book.is_book_available(db, id)
     if available is None:
         raise HTTPException(status_code=404, detail="Book not found")
     return {"book_id": id, "is_available": available}
 
 
-@router.get("/search", response_model=List[dict])
-def search_books(q: str, db: Session = Depends(get_db), request: Request = None):
-    all_books = crud_book.get_all_books(db)
-    filtered = [b for b in all_books if q.lower() in b.title.lower() or q.lower() in b.author.lower()]
-    return [BookResponse.as_response(b, request) for b in filtered]
+@router.get("/search", response_model=dict)
+def search_books(
+    q: str = Query(..., min_length=1),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    request: Request = None,
+):
+    books, total = crud_book.search_books(db, q, skip=(page - 1) * page_size, limit=page_size)
+    return book_serializer(request).page_response({
+        "data": books,
+        "meta": {
+            "page": page,
+            "page_size": page_size,
+            "total": total,
+            "total_pages": (total + page_size - 1) // page_size
+        }
+    })
 
 
 @router.get("/retrieve/{id}", response_model=dict)
-def retrieve_book(id: int, db: Session = Depends(get_db), request: Request = None):
-    book = crud_book.get_book(db, id)
+async def retrieve_book(id: int, db: AsyncSession = Depends(get_async_read_db), request: Request = None):
+    book = await aio_book.get_book(db, id)
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
-    return BookResponse.as_response(book, request)
+    etag = row_etag(book, str(request.base_url), media_urls_window())
+    if is_not_modified(request, etag, book.updated_at):
+        return not_modified(etag, book.updated_at)
+    return book_serializer(request).response(book, headers=validators(etag, book.updated_at))
 
 
 @router.get("/recommended-books", response_model=List[dict])
-def recommended_books(db: Session = Depends(get_db), request: Request = None):
-    books = crud_book.get_recommended_books(db)
-    return [BookResponse.as_response(b, request) for b in books]
+async def recommended_books(db: AsyncSession = Depends(get_async_read_db), request: Request = None):
+    async def build():
+        return book_serializer(request).dumps_list(await aio_book.get_recommended_books(db))
+    return await response_cache.respond_async(request, [BOOKS], build)
 
 
 @router.get("/popular-books", response_model=List[dict])
-def popular_books(db: Session = Depends(get_db), request: Request = None):
-    books = crud_book.get_popular_books(db)
-    return [BookResponse.as_response(b, request) for b in books]
+async def popular_books(db: AsyncSession = Depends(get_async_read_db), request: Request = None):
+    async def build():
+        return book_serializer(request).dumps_list(await aio_book.get_popular_books(db))
+    return await response_cache.respond_async(request, [BOOKS], build)
 
 
 @router.get("/new-collection", response_model=List[dict])
-def new_collection(db: Session = Depends(get_db), request: Request = None):
-    books = crud_book.get_new_collection(db)
-    return [BookResponse.as_response(b, request) for b in books]
+async def new_collection(db: AsyncSession = Depends(get_async_read_db), request: Request = None):
+    async def build():
+        return book_serializer(request).dumps_list(await aio_book.get_new_collection(db))
+    return await response_cache.respond_async(request, [BOOKS], build)
+
+
+@router.get("/category/{categoryId}", response_model=Page[dict])
+async def filter_by_category(categoryId: int, page: PageParams = Depends(), db: AsyncSession = Depends(get_async_read_db), request: Request = None):
+    result = await aio_book.get_books_by_category(db, categoryId, page.cursor, page.limit, page.include_total)
+    return book_serializer(request).page_response(result)
+
+
+def book_filters(
+    available: Optional[bool] = Query(None),
+    category_id: Optional[int] = Query(None),
+    format: Optional[BookFormatEnum] = Query(None),
+    author: Optional[str] = Query(None, min_length=1, description="Author name prefix"),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    max_rating: Optional[float] = Query(None, ge=0, le=5),
+    created_after: Optional[datetime] = Query(None),
+    created_before: Optional[datetime] = Query(None),
+) -> BookFilter:
+    return BookFilter(
+        available=available,
+        category_id=category_id,
+        format=format,
+        author=author,
+        min_rating=min_rating,
+        max_rating=max_rating,
+        created_after=created_after,
+        created_before=created_before,
+    )
 
 
-@router.get("/category/{categoryId}", response_model=List[dict])
-def filter_by_category(categoryId: int, db: Session = Depends(get_db), request: Request = None):
-    books = crud_book.get_books_by_category(db, categoryId)
-    return [BookResponse.as_response(b, request) for b in books]
+@router.get("/catalog", response_model=Page[dict])
+async def catalog(
+    filters: BookFilter = Depends(book_filters),
+    sort: BookSortEnum = Query(BookSortEnum.CREATED_AT),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_read_db),
+    request: Request = None,
+):
+    result = await aio_book.query_books(
+        db, filters, sort=sort, descending=(order == "desc"),
+        cursor=page.cursor, limit=page.limit, include_total=page.include_total,
+    )
+    return book_serializer(request).page_response(result)
 
 
-@router.get("/available", response_model=List[dict])
-def available_books(db: Session = Depends(get_db), request: Request = None):
-    all_books = crud_book.get_all_books(db)
-    books = [b for b in all_books if b.copies_available > 0]
-    return [BookResponse.as_response(b, request) for b in books]
+@router.get("/available", response_model=Page[dict])
+async def available_books(page: PageParams = Depends(), db: AsyncSession = Depends(get_async_read_db), request: Request = None):
+    result = await aio_book.get_available_books(db, page.cursor, page.limit, page.include_total)
+    return book_serializer(request).page_response(result)
 
 
 # ------------------------------
@@ -106,7 +199,7 @@ def available_books(db: Session = Depends(get_db), request: Request = None):
 # ------------------------------
 
 @router.post("/create", response_model=dict, status_code=status.HTTP_201_CREATED)
-def create_book_endpoint(
+async def create_book_endpoint(
     title: str = Form(...),
     author: str = Form(...),
     category_id: int = Form(1),
@@ -124,8 +217,8 @@ def create_book_endpoint(
     pdf_upload: Optional[UploadFile] = File(None),
     audio_upload: Optional[UploadFile] = File(None),
 
-    db: Session = Depends(get_db),
-    user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(require_admin),
     request: Request = None,
 ):
     data = {
@@ -140,26 +233,26 @@ def create_book_endpoint(
 
     # File upload > URL fallback
     if cover_file:
-        data["cover"] = save_file(cover_file, COVER_DIR)
+        data["cover"] = await save_file(db, cover_file, "cover")
     elif cover:
         data["cover"] = cover
 
     if pdf_upload:
-        data["pdf_file"] = save_file(pdf_upload, PDF_DIR)
+        data["pdf_file"] = await save_file(db, pdf_upload, "pdf")
     elif pdf_file:
         data["pdf_file"] = pdf_file
 
     if audio_upload:
-        data["audio_file"] = save_file(audio_upload, AUDIO_DIR)
+        data["audio_file"] = await save_file(db, audio_upload, "audio")
     elif audio_file:
         data["audio_file"] = audio_file
 
-    book = crud_book.create_book(db, data)
-    return BookResponse.as_response(book, request)
+    book = await aio_book.create_book(db, data)
+    return book_serializer(request).row(book)
 
 
 @router.put("/edit/{id}", response_model=dict)
-def edit_book(
+async def edit_book(
     id: int,
     title: Optional[str] = Form(None),
     author: Optional[str] = Form(None),
@@ -177,8 +270,8 @@ def edit_book(
     pdf_upload: Optional[UploadFile] = File(None),
     audio_upload: Optional[UploadFile] = File(None),
 
-    db: Session = Depends(get_db),
-    user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(require_admin),
     request: Request = None,
 ):
     book_data = {}
@@ -192,64 +285,208 @@ def edit_book(
     if description: book_data["description"] = description
 
     if cover_file:
-        book_data["cover"] = save_file(cover_file, COVER_DIR)
+        book_data["cover"] = await save_file(db, cover_file, "cover")
     elif cover:
         book_data["cover"] = cover
 
     if pdf_upload:
-        book_data["pdf_file"] = save_file(pdf_upload, PDF_DIR)
+        book_data["pdf_file"] = await save_file(db, pdf_upload, "pdf")
     elif pdf_file:
         book_data["pdf_file"] = pdf_file
 
     if audio_upload:
-        book_data["audio_file"] = save_file(audio_upload, AUDIO_DIR)
+        book_data["audio_file"] = await save_file(db, audio_upload, "audio")
     elif audio_file:
         book_data["audio_file"] = audio_file
 
-    book = crud_book.update_book(db, id, book_data)
+    book = await aio_book.update_book(db, id, book_data)
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
-    return BookResponse.as_response(book, request)
+    return book_serializer(request).row(book)
 
 
 @router.delete("/delete/{id}")
-def delete_book_endpoint(id: int, db: Session = Depends(get_db), user: User = Depends(require_admin)):
+def delete_book_endpoint(id: int, db: Session = Depends(get_db), user: Principal = Depends(require_admin)):
     result = crud_book.delete_book(db, id)
     if not result:
         raise HTTPException(status_code=404, detail="Book not found")
     return {"detail": "Book deleted successfully"}
 
 
+# ------------------------------
+# Resumable uploads (admin)
+# ------------------------------
+# Large files go up in pieces: create a session, PUT the body from the offset the
+# server reports (again after a dropped connection), then complete it and pass the
+# returned filename as the book's cover, pdf_file or audio_file.
+
+def _session_or_404(upload_id: str) -> uploads.UploadSession:
+    session = uploads.get_session(upload_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+
+@router.post("/uploads", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+def create_upload(request: UploadSessionCreate, user: Principal = Depends(require_admin)):
+    try:
+        session = uploads.create_session(request.kind.value, request.filename, request.size, request.content_type)
+    except uploads.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    return session.as_dict(offset=0)
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+def upload_status(upload_id: str, user: Principal = Depends(require_admin)):
+    session = _session_or_404(upload_id)
+    return session.as_dict(uploads.received(session))
+
+
+@router.put("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Header(..., alias="Upload-Offset", ge=0),
+    user: Principal = Depends(require_admin),
+):
+    """Append the raw request body at Upload-Offset; the body is streamed, never buffered whole."""
+    session = _session_or_404(upload_id)
+    try:
+        received = await uploads.append_chunk(session, offset, request.stream())
+    except uploads.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    return session.as_dict(received)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=StoredFileResponse)
+def complete_upload(upload_id: str, db: Session = Depends(get_db), user: Principal = Depends(require_admin)):
+    session = _session_or_404(upload_id)
+    try:
+        stored = uploads.complete_session(session)
+    except uploads.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    media_crud.register_blob(db, stored)
+    return stored
+
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def discard_upload(upload_id: str, user: Principal = Depends(require_admin)):
+    _session_or_404(upload_id)
+    uploads.discard_session(upload_id)
+
+
+# ------------------------------
+# Bulk import (admin)
+# ------------------------------
+
+def run_import_job(job_id: int):
+    """Background task: runs with its own session, the request's one is closed by then."""
+    db = SessionLocal()
+    try:
+        job = book_import.get_job(db, job_id)
+        if job is None:
+            logger.error("Import job %s no longer exists", job_id)
+            return
+        book_import.run_import(db, job)
+    except Exception:
+        # run_import records FAILED on the job; resume it with POST /import/{id}/resume
+        logger.exception("Import job %s failed", job_id)
+    finally:
+        db.close()
+
+
+@router.post("/import", response_model=BookImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def import_books(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(..., description="CSV with a header row, or JSON Lines (.jsonl)"),
+    db: Session = Depends(get_db),
+    user: Principal = Depends(require_admin),
+):
+    if not file.filename.lower().endswith((".csv", ".jsonl", ".ndjson")):
+        raise HTTPException(status_code=400, detail="Only .csv and .jsonl files can be imported")
+    job = book_import.create_job(db, file.filename, "")
+    job.file_path = book_import.file_for_upload(IMPORT_DIR, job.id, file.filename)
+    uploads.copy_to_path(file.file, job.file_path)
+    db.commit()
+    book_import.claim_job(db, job.id)
+    background_tasks.add_task(run_import_job, job.id)
+    db.refresh(job)
+    return job
+
+
+@router.get("/import/{job_id}", response_model=BookImportJobResponse)
+def import_status(job_id: int, db: Session = Depends(get_db), user: Principal = Depends(require_admin)):
+    job = book_import.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+
+@router.post("/import/{job_id}/resume", response_model=BookImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def resume_import(
+    job_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    user: Principal = Depends(require_admin),
+):
+    job = book_import.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    if not book_import.claim_job(db, job.id):
+        db.refresh(job)
+        raise HTTPException(status_code=409, detail=f"Import job is {job.status.value}")
+    background_tasks.add_task(run_import_job, job.id)
+    db.refresh(job)
+    return job
+
+
 # ------------------------------
 # Serve PDF & Audio
 # ------------------------------
 
+def media_response(request: Request, media_file, disposition: str) -> Response:
+    """
+    Serve a book's local media file. MediaFileResponse answers Range requests (206,
+    multi-range, 416, If-Range) from the cached stat, and hands whole files to the
+    server with the pathsend extension where it supports it. With
+    MEDIA_ACCEL_REDIRECT_PREFIX set, nginx serves the bytes with sendfile instead.
+    """
+    headers = validators(media_file.etag, media_file.last_modified)
+    headers["Cache-Control"] = f"public, max-age={settings.MEDIA_MAX_AGE_SECONDS}"
+    if is_not_modified(request, media_file.etag, media_file.last_modified):
+        return Response(status_code=304, headers=headers)
+    if settings.MEDIA_ACCEL_REDIRECT_PREFIX:
+        headers["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + media_file.key
+        headers["Content-Disposition"] = f'{disposition}; filename="{media_file.filename}"'
+        return Response(media_type=media_file.media_type, headers=headers)
+    return MediaFileResponse(
+        media_file.path,
+        media_type=media_file.media_type,
+        filename=media_file.filename,
+        stat_result=media_file.stat,
+        headers=headers,
+        content_disposition_type=disposition,
+    )
+
+
 @router.get("/download/pdf/{id}")
-def download_pdf(id: int, db: Session = Depends(get_db)):
-    book = crud_book.get_book(db, id)
-    if not book or not book.pdf_file:
+async def download_pdf(id: int, request: Request):
+    media_file = await aio_book.get_media_file(AsyncReadSessionLocal, id, "pdf_file")
+    if media_file is None:
         raise HTTPException(status_code=404, detail="PDF not found")
 
-    if book.pdf_file.startswith("http"):
-        return {"pdf_url": book.pdf_file}
+    if media_file.url:
+        return {"pdf_url": media_file.url}
 
-    return FileResponse(
-        os.path.join(PDF_DIR, book.pdf_file),
-        media_type="application/pdf",
-        filename=os.path.basename(book.pdf_file)
-    )
+    return media_response(request, media_file, "attachment")
 
 @router.get("/play/audio/{id}")
-def play_audio(id: int, db: Session = Depends(get_db)):
-    book = crud_book.get_book(db, id)
-    if not book or not book.audio_file:
+async def play_audio(id: int, request: Request):
+    media_file = await aio_book.get_media_file(AsyncReadSessionLocal, id, "audio_file")
+    if media_file is None:
         raise HTTPException(status_code=404, detail="Audio not found")
 
-    if book.audio_file.startswith("http"):
-        return {"audio_url": book.audio_file}
+    if media_file.url:
+        return {"audio_url": media_file.url}
 
-    return FileResponse(
-        os.path.join(AUDIO_DIR, book.audio_file),
-        media_type="audio/mpeg",
-        filename=os.path.basename(book.audio_file)
-    )
+    return media_response(request, media_file, "inline")
@@ -1,14 +1,22 @@
 # app/routers/borrow.py
 from fastapi import APIRouter, Depends, HTTPException, Query, Path
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from app.db.database import get_db
+from app.db.session import get_db, get_read_db, ReadSessionLocal
+from app.db.async_session import get_async_read_db
 from app.crud import borrow as borrow_crud
+from app.crud.aio import borrow as aio_borrow
+from app.crud.inventory import InventoryError
 from app.schemas import borrow as borrow_schema
-from .auth import get_current_user, get_admin_user
+from app.schemas.pagination import Page
+from app.utils.pagination import PageParams
+from app.utils.streaming import ResponseFormat, stream_query
+from app.models.borrow import Borrow
+from app.dependencies import get_current_user, require_admin
 
-from app.models.user import User
+from app.core.user_cache import Principal
 
 router = APIRouter(tags=["Borrow & Return"])
 
@@ -20,24 +28,28 @@ router = APIRouter(tags=["Borrow & Return"])
 def create_borrow(
     request: borrow_schema.BorrowCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     # Flexible: Only block guests or unauthorized users
     if current_user.role not in ["USER", "ADMIN"]:
         raise HTTPException(status_code=403, detail="Not allowed to borrow")
 
-    borrow = borrow_crud.create_borrow(db, request, current_user.id)
-    if not borrow:
-        raise HTTPException(status_code=400, detail="Book not available or already borrowed")
+    try:
+        borrow = borrow_crud.create_borrow(db, request, current_user.id)
+    except InventoryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return borrow
 
 @router.put("/return", response_model=borrow_schema.BorrowResponse)
 def return_book(
     book_id: int = Query(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    borrow = borrow_crud.return_book(db, current_user.id, book_id)
+    try:
+        borrow = borrow_crud.return_book(db, current_user.id, book_id)
+    except InventoryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not borrow:
         raise HTTPException(status_code=400, detail="Book not borrowed or already returned")
     return borrow
@@ -47,9 +59,12 @@ def extend_due_date(
     book_id: int = Query(...),
     extend_days: Optional[int] = Query(7),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    borrow = borrow_crud.extend_due_date(db, current_user.id, book_id, extend_days)
+    try:
+        borrow = borrow_crud.extend_due_date(db, current_user.id, book_id, extend_days)
+    except InventoryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not borrow:
         raise HTTPException(status_code=400, detail="Cannot extend due date")
     return borrow
@@ -60,29 +75,41 @@ def extend_due_date(
 
 @router.get("/user/me", response_model=List[borrow_schema.BorrowResponse])
 def get_my_borrows(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     return borrow_crud.get_user_borrows(db, current_user.id)
 
-@router.get("/list", response_model=List[borrow_schema.BorrowResponse])
-def get_all_borrows(db: Session = Depends(get_db)):
-    return borrow_crud.get_all_borrows(db)
-
-@router.get("/active", response_model=List[borrow_schema.BorrowResponse])
-def get_active_borrows(db: Session = Depends(get_db)):
-    return borrow_crud.get_active_borrows(db)
+@router.get("/list", response_model=Page[borrow_schema.BorrowResponse])
+async def get_all_borrows(
+    page: PageParams = Depends(),
+    format: ResponseFormat = Query(ResponseFormat.PAGE, description="page, or json/ndjson to stream every row"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    if format != ResponseFormat.PAGE:
+        return stream_query(
+            ReadSessionLocal,
+            lambda s: borrow_crud.all_borrows_query(s).order_by(Borrow.created_at.desc(), Borrow.id.desc()),
+            lambda b: borrow_schema.BorrowResponse.from_orm(b).dict(),
+            format,
+            filename="borrows",
+        )
+    return await aio_borrow.get_all_borrows(db, page.cursor, page.limit, page.include_total)
+
+@router.get("/active", response_model=Page[borrow_schema.BorrowResponse])
+async def get_active_borrows(page: PageParams = Depends(), db: AsyncSession = Depends(get_async_read_db)):
+    return await aio_borrow.get_active_borrows(db, page.cursor, page.limit, page.include_total)
 
 @router.get("/retrieve/{id}", response_model=borrow_schema.BorrowResponse)
-def retrieve_borrow(id: int = Path(...), db: Session = Depends(get_db)):
-    borrow = borrow_crud.get_borrow_by_id(db, id)
+async def retrieve_borrow(id: int = Path(...), db: AsyncSession = Depends(get_async_read_db)):
+    borrow = await aio_borrow.get_borrow_by_id(db, id)
     if not borrow:
         raise HTTPException(status_code=404, detail="Borrow not found")
     return borrow
 
-@router.get("/overdue", response_model=List[borrow_schema.BorrowResponse])
-def get_overdue_borrows(db: Session = Depends(get_db)):
-    return borrow_crud.get_overdue_borrows(db)
+@router.get("/overdue", response_model=Page[borrow_schema.BorrowResponse])
+async def get_overdue_borrows(page: PageParams = Depends(), db: AsyncSession = Depends(get_async_read_db)):
+    return await aio_borrow.get_overdue_borrows(db, page.cursor, page.limit, page.include_total)
 
 # ==========================
 # Borrow Request Management (Admin)
@@ -93,9 +120,12 @@ def reject_borrow_request(
     user_id: int = Query(...),
     book_id: int = Query(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)  # only admin
+    current_user: Principal = Depends(require_admin)  # only admin
 ):
-    borrow = borrow_crud.reject_borrow(db, user_id, book_id)
+    try:
+        borrow = borrow_crud.reject_borrow(db, user_id, book_id)
+    except InventoryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not borrow:
         raise HTTPException(status_code=400, detail="Cannot reject borrow request")
     return borrow
@@ -105,9 +135,12 @@ def accept_borrow_request(
     user_id: int = Query(...),
     book_id: int = Query(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)  # only admin
+    current_user: Principal = Depends(require_admin)  # only admin
 ):
-    borrow = borrow_crud.accept_borrow(db, user_id, book_id)
+    try:
+        borrow = borrow_crud.accept_borrow(db, user_id, book_id)
+    except InventoryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not borrow:
         raise HTTPException(status_code=400, detail="Cannot accept borrow request")
     return borrow
@@ -117,8 +150,8 @@ def accept_borrow_request(
 # ==========================
 
 @router.get("/stats", response_model=borrow_schema.BorrowStatsResponse)
-def get_borrow_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)  
+async def get_borrow_stats(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(require_admin)  
 ):
-    return borrow_crud.get_borrow_stats(db)
+    return await aio_borrow.get_borrow_stats(db)
@@ -1,50 +1,70 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.crud import category as category_crud
+from app.crud.aio import category as aio_category
 from app.schemas import category as category_schema
-from app.db.database import get_db
+from app.db.async_session import get_async_db, get_async_read_db
+from app.core.cache import response_cache, BOOKS, CATEGORIES
+from app.db.versioning import get_versions_async
+from app.utils.http_cache import make_etag, row_etag, is_not_modified, not_modified, validators
 
 router = APIRouter(tags=["Category Management"])
 
+BREAKDOWN = Query(False, description="Also return book counts per format and the number of available books")
+
 # ✅ Create Category
 @router.post("/create", response_model=category_schema.CategoryResponse, status_code=status.HTTP_201_CREATED)
-def create_category(request: category_schema.CategoryCreate, db: Session = Depends(get_db)):
-    category = category_crud.create_category(db, request)
+async def create_category(request: category_schema.CategoryCreate, db: AsyncSession = Depends(get_async_db)):
+    category = await aio_category.create_category(db, request)
     if not category:
         raise HTTPException(status_code=409, detail="Category already exists")
     return category
 
 # ✅ List all categories (static path BEFORE dynamic /{id})
 @router.get("/list", response_model=List[category_schema.CategoryResponse])
-def get_all_categories_list(db: Session = Depends(get_db)):
-    return category_crud.get_all_categories_list(db)
+async def get_all_categories_list(request: Request, breakdown: bool = BREAKDOWN, db: AsyncSession = Depends(get_async_read_db)):
+    async def build():
+        categories = await aio_category.get_all_categories_list(db, breakdown)
+        return [category_schema.CategoryResponse.from_orm(c) for c in categories]
+    # Availability changes with every borrow, which only invalidates BOOKS
+    tags = [CATEGORIES, BOOKS] if breakdown else [CATEGORIES]
+    return await response_cache.respond_async(request, tags, build)
 
 # ✅ Get all categories with pagination
 @router.get("", response_model=List[category_schema.CategoryResponse])
-def get_all_categories(skip: int = 0, limit: int = Query(10, ge=1), db: Session = Depends(get_db)):
-    return category_crud.get_all_categories(db, skip=skip, limit=limit)
+async def get_all_categories(request: Request, response: Response, skip: int = 0, limit: int = Query(10, ge=1), breakdown: bool = BREAKDOWN, db: AsyncSession = Depends(get_async_read_db)):
+    # book_count makes the listing depend on the books table too
+    version, last_modified = await get_versions_async(db, ["categories", "books"])
+    etag = make_etag("categories", version, skip, limit, breakdown)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    response.headers.update(validators(etag, last_modified))
+    return await aio_category.get_all_categories(db, skip=skip, limit=limit, breakdown=breakdown)
 
 # ✅ Get category by ID (dynamic path)
 @router.get("/{id}", response_model=category_schema.CategoryResponse)
-def get_category_by_id(id: int = Path(...), db: Session = Depends(get_db)):
-    category = category_crud.get_category_by_id(db, id)
+async def get_category_by_id(request: Request, response: Response, id: int = Path(...), breakdown: bool = BREAKDOWN, db: AsyncSession = Depends(get_async_read_db)):
+    category = await aio_category.get_category_by_id(db, id, breakdown)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
+    etag = row_etag(category, category.book_count, getattr(category, "format_counts", None), getattr(category, "available_count", None))
+    if is_not_modified(request, etag, category.updated_at):
+        return not_modified(etag, category.updated_at)
+    response.headers.update(validators(etag, category.updated_at))
     return category
 
 # ✅ Update category
 @router.put("/edit/{id}", response_model=category_schema.CategoryResponse)
-def update_category(id: int, request: category_schema.CategoryUpdate, db: Session = Depends(get_db)):
-    category = category_crud.update_category(db, id, request)
+async def update_category(id: int, request: category_schema.CategoryUpdate, db: AsyncSession = Depends(get_async_db)):
+    category = await aio_category.update_category(db, id, request)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found or name already exists")
     return category
 
 # ✅ Delete category with success message
 @router.delete("/delete/{id}", status_code=status.HTTP_200_OK)
-def delete_category(id: int, db: Session = Depends(get_db)):
-    success = category_crud.delete_category(db, id)
+async def delete_category(id: int, db: AsyncSession = Depends(get_async_db)):
+    success = await aio_category.delete_category(db, id)
     if not success:
         raise HTTPException(status_code=404, detail="Category not found or has associated books")
     return {"detail": "Category deleted successfully"}
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.crud import donation as donation_crud
 from app.schemas import donation as donation_schema
-from app.db.session import get_db
+from app.db.session import get_db, ReadSessionLocal
+from app.schemas.pagination import Page
+from app.utils.pagination import PageParams
+from app.utils.streaming import ResponseFormat, stream_query
+from app.models.donation import DonationRequest
 
 router = APIRouter(tags=["Donation Requests"])
 
@@ -12,9 +16,24 @@ def create_donation_request(request: donation_schema.DonationCreate, db: Session
     donation = donation_crud.create_donation_request(db, request)
     return donation
 
-@router.get("/list", response_model=List[donation_schema.DonationResponse])
-def get_all_donations(user_id: Optional[int] = None, status: Optional[donation_schema.DonationStatusEnum] = None, skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    return donation_crud.get_all_donation_requests(db, user_id, status, skip, limit)
+@router.get("/list", response_model=Page[donation_schema.DonationResponse])
+def get_all_donations(
+    user_id: Optional[int] = None,
+    status: Optional[donation_schema.DonationStatusEnum] = None,
+    page: PageParams = Depends(),
+    format: ResponseFormat = Query(ResponseFormat.PAGE, description="page, or json/ndjson to stream every row"),
+    db: Session = Depends(get_db),
+):
+    if format != ResponseFormat.PAGE:
+        return stream_query(
+            ReadSessionLocal,
+            lambda s: donation_crud.donation_requests_query(s, user_id, status)
+                .order_by(DonationRequest.created_at.desc(), DonationRequest.id.desc()),
+            donation_crud.donation_export_row,
+            format,
+            filename="donations",
+        )
+    return donation_crud.get_all_donation_requests(db, user_id, status, page.cursor, page.limit, page.include_total)
 
 @router.get("/retrieve/{id}", response_model=donation_schema.DonationResponse)
 def retrieve_donation(id: int, db: Session = Depends(get_db)):
@@ -1,8 +1,9 @@
 # app/routers/featured.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
+from app.core.cache import response_cache, FEATURED
 from app.schemas.featured import FeaturedBookCreate, FeaturedBookUpdate, FeaturedBookResponse
 from app.crud.featured import (
     create_featured_book,
@@ -31,7 +32,7 @@ def create_featured(featured_in: FeaturedBookCreate, db: Session = Depends(get_d
 
 # ---------- READ SINGLE ----------
 @router.get("/{featured_id}", response_model=FeaturedBookResponse)
-def read_featured(featured_id: int, db: Session = Depends(get_db)):
+def read_featured(featured_id: int, db: Session = Depends(get_read_db)):
     db_obj = get_featured_book(db=db, featured_id=featured_id)
     if not db_obj:
         raise HTTPException(status_code=404, detail="Featured book not found")
@@ -48,21 +49,23 @@ def read_featured(featured_id: int, db: Session = Depends(get_db)):
 
 # ---------- READ ALL ----------
 @router.get("/", response_model=List[FeaturedBookResponse])
-def read_featured_all(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    objs = get_featured_books(db=db, skip=skip, limit=limit)
-    return [
-        FeaturedBookResponse(
-            id=f.id,
-            book_id=f.book_id,
-            created_at=f.created_at,
-            updated_at=f.updated_at,
-            title=f.book.title if f.book else None,
-            author=f.book.author if f.book else None,
-            category_id=f.book.category_id if f.book else None,
-            cover=f.book.cover if f.book else None,
-        )
-        for f in objs
-    ]
+def read_featured_all(request: Request, skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
+    def build():
+        objs = get_featured_books(db=db, skip=skip, limit=limit)
+        return [
+            FeaturedBookResponse(
+                id=f.id,
+                book_id=f.book_id,
+                created_at=f.created_at,
+                updated_at=f.updated_at,
+                title=f.book.title if f.book else None,
+                author=f.book.author if f.book else None,
+                category_id=f.book.category_id if f.book else None,
+                cover=f.book.cover if f.book else None,
+            )
+            for f in objs
+        ]
+    return response_cache.respond(request, [FEATURED], build)
 
 # ---------- UPDATE ----------
 @router.put("/{featured_id}", response_model=FeaturedBookResponse)
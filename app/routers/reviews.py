@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.crud import review as crud_review
+from app.crud.aio import review as aio_review
 from app.schemas.review import ReviewCreateRequest, ReviewUpdateRequest, ReviewResponse
-from app.db.database import get_db
+from app.db.async_session import get_async_db, get_async_read_db
+from app.schemas.pagination import Page
+from app.utils.pagination import PageParams
 
 router = APIRouter(tags=["Review Management"])
 
@@ -22,53 +24,52 @@ def review_to_dict(review):
 
 # Create review
 @router.post("/book/{book_id}/create", response_model=ReviewResponse)
-def create_review(book_id: int, review_in: ReviewCreateRequest, db: Session = Depends(get_db)):
-    existing = crud_review.get_review_by_user_and_book(db, review_in.userId, book_id)
+async def create_review(book_id: int, review_in: ReviewCreateRequest, db: AsyncSession = Depends(get_async_db)):
+    existing = await aio_review.get_review_by_user_and_book(db, review_in.userId, book_id)
     if existing:
         raise HTTPException(status_code=409, detail="Review already exists")
     
-    review = crud_review.create_review(db, book_id, review_in)
-    db.refresh(review)
+    review = await aio_review.create_review(db, book_id, review_in)
     return review_to_dict(review)
 
 # Get single review
 @router.get("/retrieve/{review_id}", response_model=ReviewResponse)
-def get_review(review_id: int, db: Session = Depends(get_db)):
-    review = crud_review.get_review(db, review_id)
+async def get_review(review_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    review = await aio_review.get_review(db, review_id)
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
     return review_to_dict(review)
 
 # Get reviews by book
-@router.get("/list/book/{book_id}", response_model=List[ReviewResponse])
-def get_book_reviews(book_id: int, db: Session = Depends(get_db)):
-    reviews = crud_review.get_reviews_by_book(db, book_id)
-    return [review_to_dict(r) for r in reviews]
+@router.get("/list/book/{book_id}", response_model=Page[ReviewResponse])
+async def get_book_reviews(book_id: int, page: PageParams = Depends(), db: AsyncSession = Depends(get_async_read_db)):
+    result = await aio_review.get_reviews_by_book(db, book_id, page.cursor, page.limit, page.include_total)
+    result["data"] = [review_to_dict(r) for r in result["data"]]
+    return result
 
 # Get reviews by user
 @router.get("/user/{user_id}", response_model=List[ReviewResponse])
-def get_user_reviews(user_id: int, db: Session = Depends(get_db)):
-    reviews = crud_review.get_reviews_by_user(db, user_id)
+async def get_user_reviews(user_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    reviews = await aio_review.get_reviews_by_user(db, user_id)
     return [review_to_dict(r) for r in reviews]
 
 # Update review
 @router.put("/edit/{review_id}", response_model=ReviewResponse)
-def update_review(review_id: int, review_in: ReviewUpdateRequest, db: Session = Depends(get_db)):
-    review = crud_review.update_review(db, review_id, review_in)
+async def update_review(review_id: int, review_in: ReviewUpdateRequest, db: AsyncSession = Depends(get_async_db)):
+    review = await aio_review.update_review(db, review_id, review_in)
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
-    db.refresh(review)
     return review_to_dict(review)
 
 # Delete review
 @router.delete("/delete/{review_id}")
-def delete_review(review_id: int, db: Session = Depends(get_db)):
-    review = crud_review.delete_review(db, review_id)
+async def delete_review(review_id: int, db: AsyncSession = Depends(get_async_db)):
+    review = await aio_review.delete_review(db, review_id)
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
     return {"detail": "Review deleted successfully"}
 
 # Review stats for book
 @router.get("/book/{book_id}/stats")
-def get_review_stats(book_id: int, db: Session = Depends(get_db)):
-    return crud_review.get_review_stats(db, book_id)
+async def get_review_stats(book_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    return await aio_review.get_review_stats(db, book_id)
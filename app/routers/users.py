@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import func
 from typing import List, Dict
-from app.db.session import get_db
+from app.db.session import get_read_db, ReadSessionLocal
 from app.models.user import User
 from app.models.borrow import Borrow, BorrowStatus
 from app.schemas.user import UserResponse
+from app.schemas.pagination import Page
+from app.utils.pagination import PageParams, paginate
+from app.utils.streaming import ResponseFormat, stream_query
 from app.dependencies import get_current_user
+from app.crud import borrow as borrow_crud
 
 # -----------------------------
 # User Management router
@@ -20,21 +23,18 @@ router = APIRouter(
 # STATIC routes first (fixed)
 # -----------------------------
 @router.get("/with-overdue", response_model=List[UserResponse], summary="Get users with overdue books")
-def get_users_with_overdue(db: Session = Depends(get_db)):
-    subquery = db.query(Borrow.user_id).filter(
-        Borrow.return_date < func.now(),
-        Borrow.status != BorrowStatus.RETURNED
-    ).distinct()
+def get_users_with_overdue(db: Session = Depends(get_read_db)):
+    subquery = db.query(Borrow.user_id).filter(Borrow.status == BorrowStatus.OVERDUE).distinct()
     return db.query(User).filter(User.id.in_(subquery)).all()
 
 
 @router.get("/search", response_model=List[UserResponse], summary="Search users")
-def search_users(q: str = Query(..., min_length=1), db: Session = Depends(get_db)):
+def search_users(q: str = Query(..., min_length=1), db: Session = Depends(get_read_db)):
     return db.query(User).filter(User.name.ilike(f"%{q}%")).all()
 
 
 @router.get("/active-borrowers", response_model=List[UserResponse], summary="Get active borrowers")
-def get_active_borrowers(db: Session = Depends(get_db)):
+def get_active_borrowers(db: Session = Depends(get_read_db)):
     subquery = db.query(Borrow.user_id).filter(Borrow.status == BorrowStatus.ACTIVE).distinct()
     return db.query(User).filter(User.id.in_(subquery)).all()
 
@@ -42,13 +42,25 @@ def get_active_borrowers(db: Session = Depends(get_db)):
 # -----------------------------
 # Remaining routes
 # -----------------------------
-@router.get("/", response_model=List[UserResponse], summary="Get all users")
-def get_all_users(db: Session = Depends(get_db)):
-    return db.query(User).all()
+@router.get("/", response_model=Page[UserResponse], summary="Get all users")
+def get_all_users(
+    page: PageParams = Depends(),
+    format: ResponseFormat = Query(ResponseFormat.PAGE, description="page, or json/ndjson to stream every row"),
+    db: Session = Depends(get_read_db),
+):
+    if format != ResponseFormat.PAGE:
+        return stream_query(
+            ReadSessionLocal,
+            lambda s: s.query(User).order_by(User.created_at.desc(), User.id.desc()),
+            lambda u: UserResponse.from_orm(u).dict(),
+            format,
+            filename="users",
+        )
+    return paginate(db.query(User), User, page.cursor, page.limit, page.include_total)
 
 
 @router.get("/{id}", response_model=UserResponse, summary="Get user by ID")
-def get_user_by_id(id: int, db: Session = Depends(get_db)):
+def get_user_by_id(id: int, db: Session = Depends(get_read_db)):
     user = db.query(User).filter(User.id == id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -56,22 +68,8 @@ def get_user_by_id(id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/{id}/statistics", response_model=Dict[str, int], summary="Get user statistics")
-def get_user_statistics(id: int, db: Session = Depends(get_db)):
-    total_borrowed = db.query(Borrow).filter(Borrow.user_id == id).count()
-    total_returned = db.query(Borrow).filter(
-        Borrow.user_id == id,
-        Borrow.status == BorrowStatus.RETURNED
-    ).count()
-    total_overdue = db.query(Borrow).filter(
-        Borrow.user_id == id,
-        Borrow.return_date < func.now(),
-        Borrow.status != BorrowStatus.RETURNED
-    ).count()
-    return {
-        "total_borrowed_books": total_borrowed,
-        "total_returned_books": total_returned,
-        "total_overdue_books": total_overdue
-    }
+def get_user_statistics(id: int, db: Session = Depends(get_read_db)):
+    return borrow_crud.get_user_borrow_stats(db, id)
 
 
 # -----------------------------
@@ -86,41 +84,15 @@ def get_current_user_info(current_user=Depends(get_current_user)):
     return current_user
 
 @dashboard_router.get("/statistics", response_model=Dict[str, int], summary="Get current user statistics")
-def statistics(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    user_id = current_user.id
-    total_borrowed_books = db.query(Borrow).filter(Borrow.user_id == user_id).count()
-    total_returned_books = db.query(Borrow).filter(
-        Borrow.user_id == user_id,
-        Borrow.status == BorrowStatus.RETURNED
-    ).count()
-    total_overdue_books = db.query(Borrow).filter(
-        Borrow.user_id == user_id,
-        Borrow.return_date < func.now(),
-        Borrow.status != BorrowStatus.RETURNED
-    ).count()
-    return {
-        "total_borrowed_books": total_borrowed_books,
-        "total_returned_books": total_returned_books,
-        "total_overdue_books": total_overdue_books
-    }
+def statistics(db: Session = Depends(get_read_db), current_user=Depends(get_current_user)):
+    return borrow_crud.get_user_borrow_stats(db, current_user.id)
 
 @dashboard_router.get("/borrowed-books", summary="Get borrowed books with pagination")
 def borrowed_books(
-    page: int = Query(1, ge=1),
-    page_size: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(),
+    db: Session = Depends(get_read_db),
     current_user=Depends(get_current_user)
 ):
     user_id = current_user.id
     query = db.query(Borrow).filter(Borrow.user_id == user_id, Borrow.status == BorrowStatus.ACTIVE)
-    total = query.count()
-    results = query.offset((page - 1) * page_size).limit(page_size).all()
-    return {
-        "data": results,
-        "meta": {
-            "page": page,
-            "page_size": page_size,
-            "total": total,
-            "total_pages": (total + page_size - 1) // page_size
-        }
-    }
+    return paginate(query, Borrow, page.cursor, page.limit, page.include_total)
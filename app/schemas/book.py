@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
+import json
+from pydantic import BaseModel, conint, constr, validator
+from typing import List, Optional
 from datetime import datetime
 from enum import Enum
 from fastapi import Request
@@ -12,6 +13,7 @@ class BookFormatEnum(str, Enum):
 class BookBase(BaseModel):
     title: str
     author: str
+    isbn: Optional[str] = None
     category_id: Optional[int] = 1
     format: BookFormatEnum
     copies_total: int = 1
@@ -31,6 +33,7 @@ class BookCreate(BookBase):
 class BookUpdate(BaseModel):
     title: Optional[str] = None
     author: Optional[str] = None
+    isbn: Optional[str] = None
     category_id: Optional[int] = 1
     format: Optional[BookFormatEnum] = None
     copies_total: Optional[int] = None
@@ -42,6 +45,25 @@ class BookUpdate(BaseModel):
     audio_file: Optional[str] = None
 
 
+class BookSortEnum(str, Enum):
+    CREATED_AT = "created_at"
+    UPDATED_AT = "updated_at"
+    TITLE = "title"
+    RATING = "rating"
+
+
+class BookFilter(BaseModel):
+    """Catalog filters; every field is optional and they combine with AND."""
+    available: Optional[bool] = None
+    category_id: Optional[int] = None
+    format: Optional[BookFormatEnum] = None
+    author: Optional[str] = None
+    min_rating: Optional[float] = None
+    max_rating: Optional[float] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+
 class BookResponse(BookBase):
     id: int
     average_rating: float = 0
@@ -51,18 +73,110 @@ class BookResponse(BookBase):
     class Config:
         orm_mode = True
 
+    @validator("copies_total", "copies_available", "average_rating", pre=True)
+    def null_as_default(cls, value, field):
+        # copies_* are nullable columns; rows that predate them read as the defaults
+        return field.default if value is None else value
+
     @staticmethod
     def as_response(book, request: Request = None):
-        data = BookResponse.from_orm(book).dict()
-        if request:
-            base_url = str(request.base_url).rstrip("/")
-            if book.cover and not book.cover.startswith("http"):
-                data["cover"] = f"{base_url}/media/covers/{book.cover}"
-            if book.pdf_file and not book.pdf_file.startswith("http"):
-                data["pdf_file"] = f"{base_url}/media/pdfs/{book.pdf_file}"
-            if book.audio_file and not book.audio_file.startswith("http"):
-                data["audio_file"] = f"{base_url}/media/audio/{book.audio_file}"
-        return data
+        from app.utils.book_serializer import book_serializer
+        return book_serializer(request).row(book)
 
 
 BookRead = BookResponse
+
+
+class BookImportRow(BaseModel):
+    """One line of a CSV/JSONL catalog import; category is resolved (or created) by name."""
+    title: constr(strip_whitespace=True, min_length=1, max_length=200)
+    author: constr(strip_whitespace=True, min_length=1, max_length=100)
+    isbn: Optional[str] = None
+    category: Optional[constr(strip_whitespace=True, max_length=100)] = None
+    category_id: Optional[int] = None
+    format: BookFormatEnum = BookFormatEnum.HARD_COPY
+    copies_total: conint(ge=0) = 1
+    copies_available: Optional[conint(ge=0)] = None
+    description: Optional[constr(max_length=500)] = None
+    cover: Optional[constr(max_length=255)] = None
+    pdf_file: Optional[constr(max_length=255)] = None
+    audio_file: Optional[constr(max_length=255)] = None
+
+    @validator("isbn")
+    def normalize_isbn(cls, value):
+        if value is None:
+            return None
+        value = str(value).replace("-", "").replace(" ", "").upper()
+        if len(value) > 20:
+            raise ValueError("ISBN longer than 20 characters")
+        return value
+
+    @validator("copies_available", always=True)
+    def default_available(cls, value, values):
+        total = values.get("copies_total")
+        if value is None:
+            return total
+        if total is not None and value > total:
+            raise ValueError("copies_available exceeds copies_total")
+        return value
+
+
+class BookImportError(BaseModel):
+    line: int
+    error: str
+
+
+class BookImportJobResponse(BaseModel):
+    id: int
+    filename: str
+    status: str
+    last_line: int
+    processed: int
+    inserted: int
+    updated: int
+    failed: int
+    errors: List[BookImportError] = []
+    message: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    @validator("errors", pre=True)
+    def parse_errors(cls, value):
+        # Stored on the job as a JSON string
+        if isinstance(value, str):
+            return json.loads(value)
+        return value or []
+
+    class Config:
+        orm_mode = True
+
+
+class UploadKind(str, Enum):
+    COVER = "cover"
+    PDF = "pdf"
+    AUDIO = "audio"
+
+
+class UploadSessionCreate(BaseModel):
+    kind: UploadKind
+    filename: constr(strip_whitespace=True, min_length=1, max_length=255)
+    size: conint(gt=0)
+    content_type: Optional[str] = None
+
+
+class UploadSessionResponse(BaseModel):
+    id: str
+    kind: UploadKind
+    filename: str
+    size: int
+    offset: int
+    chunk_size: int
+
+
+class StoredFileResponse(BaseModel):
+    """Pass filename as the book's cover, pdf_file or audio_file."""
+    filename: str
+    kind: UploadKind
+    size: int
+    sha256: str
+    content_type: str
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
 from app.models.borrow import BorrowStatus  # Enum import
 
 # ==========================
@@ -41,9 +41,9 @@ class BorrowResponse(BaseModel):
     id: int
     user: UserResponse
     book: BookResponse
-    borrow_date: datetime
-    due_date: datetime
-    return_date: Optional[datetime] = None
+    borrow_date: date
+    due_date: date
+    return_date: Optional[date] = None
     status: BorrowStatus
     extension_count: int
     created_at: datetime
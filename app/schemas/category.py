@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 
 class CategoryCreate(BaseModel):
@@ -15,6 +15,9 @@ class CategoryResponse(BaseModel):
     name: str
     description: Optional[str]
     book_count: int
+    # Only with ?breakdown=true: books per format, and books with a copy available
+    format_counts: Optional[Dict[str, int]] = None
+    available_count: Optional[int] = None
     created_at: datetime
     updated_at: datetime
 
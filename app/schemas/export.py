@@ -0,0 +1,55 @@
+import json
+from pydantic import BaseModel, validator
+from typing import List, Optional
+from datetime import datetime
+from enum import Enum
+
+from app.models.export import ExportFormat, ExportStatus
+
+
+class ExportTable(str, Enum):
+    BOOKS = "books"
+    BORROWS = "borrows"
+    REVIEWS = "reviews"
+    USERS = "users"
+
+
+class ExportCreate(BaseModel):
+    tables: List[ExportTable] = list(ExportTable)
+    format: ExportFormat = ExportFormat.CSV
+    incremental: bool = True  # only rows changed since the table's last export
+
+
+class ExportArtifact(BaseModel):
+    table: str
+    file: str
+    rows: int
+    url: str
+
+
+class ExportJobResponse(BaseModel):
+    id: int
+    tables: List[str]
+    format: ExportFormat
+    incremental: bool
+    status: ExportStatus
+    rows: int
+    exported_until: Optional[datetime] = None
+    artifacts: List[ExportArtifact] = []
+    message: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    @validator("tables", pre=True)
+    def split_tables(cls, value):
+        return value.split(",") if isinstance(value, str) else value
+
+    @validator("artifacts", pre=True)
+    def parse_artifacts(cls, value):
+        # Stored on the job as a JSON string
+        if isinstance(value, str):
+            return json.loads(value)
+        return value or []
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from pydantic.generics import GenericModel
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+class PageMeta(BaseModel):
+    next_cursor: Optional[str] = None
+    limit: int
+    total: Optional[int] = None
+
+class Page(GenericModel, Generic[T]):
+    data: List[T]
+    meta: PageMeta
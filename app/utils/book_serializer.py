@@ -0,0 +1,101 @@
+from functools import lru_cache
+from operator import attrgetter
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.schemas.book import BookResponse
+from app.utils.media_urls import SIGNED_FOLDERS, signed_path
+from app.utils.streaming import dumps
+
+# Output keys, in BookResponse field order
+BOOK_FIELDS = tuple(BookResponse.__fields__)
+
+# (index, default, type) of the BookResponse fields that replace NULL with their
+# default and coerce the column value, as BookResponse.from_orm does
+def _field_fixes():
+    for index, field in enumerate(BookResponse.__fields__.values()):
+        cast = field.type_ if field.type_ in (int, float) else None
+        default = field.default if field.default is None or cast is None else cast(field.default)
+        if not field.allow_none and (default is not None or cast is not None):
+            yield index, default, cast
+
+
+FIELD_FIXES = tuple(_field_fixes())
+
+# Media columns and the /media sub-directory their bare filenames live in
+MEDIA_DIRS = {"cover": "covers", "pdf_file": "pdfs", "audio_file": "audio"}
+
+# Rows encoded per chunk of a streamed list
+STREAM_CHUNK_ROWS = 100
+
+
+class BookSerializer:
+    """
+    Turns Book rows into response dicts/JSON by reading the columns directly.
+
+    Replaces BookResponse.from_orm(book).dict(): no model validation per row and no
+    writes to the ORM instance, but the same NULL defaults and number coercion. Media URL prefixes are computed once per host; with
+    settings.MEDIA_SIGNED_URLS, PDFs and audio get signed, expiring links instead.
+    """
+
+    def __init__(self, base_url: Optional[str]):
+        self._values = attrgetter(*BOOK_FIELDS)
+        self._media = []
+        if base_url:
+            signed_base = settings.MEDIA_URL_BASE.rstrip("/") or f"{base_url}/media/signed"
+            for field, folder in MEDIA_DIRS.items():
+                if settings.MEDIA_SIGNED_URLS and folder in SIGNED_FOLDERS:
+                    self._media.append((BOOK_FIELDS.index(field), f"{signed_base}/", folder))
+                else:
+                    self._media.append((BOOK_FIELDS.index(field), f"{base_url}/media/{folder}/", None))
+
+    def row(self, book) -> dict:
+        values = list(self._values(book))
+        for index, default, cast in FIELD_FIXES:
+            value = values[index]
+            if value is None:
+                values[index] = default
+            elif cast is not None and type(value) is not cast:
+                values[index] = cast(value)
+        for index, prefix, signed_folder in self._media:
+            value = values[index]
+            if value and not value.startswith("http"):
+                if signed_folder:
+                    values[index] = prefix + signed_path(f"{signed_folder}/{value}")
+                else:
+                    values[index] = prefix + value
+        return dict(zip(BOOK_FIELDS, values))
+
+    def rows(self, books: Iterable) -> list:
+        return [self.row(book) for book in books]
+
+    def dumps_list(self, books: Iterable) -> bytes:
+        return dumps(self.rows(books))
+
+    def response(self, book, headers: dict = None) -> Response:
+        return Response(dumps(self.row(book)), media_type="application/json", headers=headers)
+
+    def _stream(self, books, meta):
+        yield b'{"data":['
+        books = list(books)
+        for start in range(0, len(books), STREAM_CHUNK_ROWS):
+            chunk = dumps(self.rows(books[start:start + STREAM_CHUNK_ROWS]))[1:-1]
+            yield chunk if start == 0 else b"," + chunk
+        yield b'],"meta":' + dumps(meta) + b"}"
+
+    def page_response(self, page: dict, headers: dict = None) -> StreamingResponse:
+        """Stream a {"data": [...], "meta": {...}} page without building it in memory twice."""
+        return StreamingResponse(self._stream(page["data"], page["meta"]), media_type="application/json", headers=headers)
+
+
+@lru_cache(maxsize=64)
+def _serializer(base_url: Optional[str]) -> BookSerializer:
+    return BookSerializer(base_url)
+
+
+def book_serializer(request: Optional[Request]) -> BookSerializer:
+    """Serializer for the request's host (cached), or one that leaves media paths as stored."""
+    return _serializer(str(request.base_url).rstrip("/") if request else None)
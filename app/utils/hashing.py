@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from anyio import to_thread
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+# Hashes below or above the configured cost are flagged by needs_update()
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full; routes answer 429."""
+
+
+# ------------------------------
+# Worker-side functions (run in the pool processes)
+# ------------------------------
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed)
+
+
+# ------------------------------
+# Rate limit
+# ------------------------------
+class TokenBucket:
+    """Allows `rate` calls per second on average, in bursts of up to `burst`. rate <= 0 disables it."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+# ------------------------------
+# Pool
+# ------------------------------
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated process pool so it neither holds the GIL nor ties up
+    the event loop or the request threadpool. At most workers + queue_limit calls are
+    in flight. Routes use the *_async methods, which await the pool future and get
+    PasswordHasherBusy (429) at once when the rate bucket is empty or every slot is
+    taken. Sync callers (scripts) are not rate limited. With backpressure on, they
+    wait up to wait_seconds for a slot.
+    """
+
+    def __init__(self, workers: int, queue_limit: int, backpressure: bool, wait_seconds: float,
+                 rate: float = 0, burst: int = 1):
+        self.workers = workers
+        self.backpressure = backpressure
+        self.wait_seconds = wait_seconds
+        self._slots = threading.BoundedSemaphore(max(1, workers) + queue_limit)
+        self._bucket = TokenBucket(rate, burst)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.rejected = 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def _reject(self):
+        with self._stats_lock:
+            self.rejected += 1
+        raise PasswordHasherBusy()
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            # Inline mode (tests, CLI scripts)
+            return fn(*args)
+        acquired = self._slots.acquire(timeout=self.wait_seconds) if self.backpressure else self._slots.acquire()
+        if not acquired:
+            self._reject()
+        try:
+            return self._executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    async def _run_async(self, fn, *args):
+        if not self._bucket.take():
+            self._reject()
+        if self.workers <= 0:
+            return await to_thread.run_sync(fn, *args)
+        # The queue is the waiting room: when it is full, answer now instead of parking the request
+        if not self._slots.acquire(blocking=False):
+            self._reject()
+        try:
+            return await asyncio.wrap_future(self._executor().submit(fn, *args))
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password)
+
+    def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """Return (valid, new_hash); new_hash is set when the stored cost is outdated."""
+        return self._run(_verify, password, hashed)
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run_async(_hash, password)
+
+    async def verify_and_update_async(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return await self._run_async(_verify, password, hashed)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_limit=settings.PASSWORD_HASH_QUEUE_LIMIT,
+    backpressure=settings.PASSWORD_HASH_BACKPRESSURE,
+    wait_seconds=settings.PASSWORD_HASH_WAIT_SECONDS,
+    rate=settings.PASSWORD_HASH_RATE_PER_SECOND,
+    burst=settings.PASSWORD_HASH_BURST,
+)
+
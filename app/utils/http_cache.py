@@ -0,0 +1,91 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+from starlette.datastructures import MutableHeaders
+
+from app.utils.media_store import is_blob_name
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag over the repr of parts (column values, version tokens, query params)."""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def row_etag(obj, *extra) -> str:
+    """ETag over every column value of an ORM row, without building its response model."""
+    values = tuple(getattr(obj, column.key) for column in obj.__table__.columns)
+    return make_etag(obj.__tablename__, values, *extra)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite/MySQL DATETIME come back naive; the app stores UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def validators(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """RFC 7232 evaluation: If-None-Match (weak comparison) wins over If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        wanted = etag[2:] if etag.startswith("W/") else etag
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if (tag[2:] if tag.startswith("W/") else tag) == wanted:
+                return True
+        return False
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return _as_utc(last_modified).replace(microsecond=0) <= since
+    return False
+
+
+def file_etag(name: str, stat: os.stat_result) -> str:
+    """Strong ETag of a media file: its sha256 when the name is content-addressed, else mtime and size."""
+    if is_blob_name(name):
+        return f'"{name[:64]}"'
+    return f'"{int(stat.st_mtime)}-{stat.st_size}"'
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    return Response(status_code=304, headers=validators(etag, last_modified))
+
+
+class MediaFileResponse(FileResponse):
+    """
+    FileResponse whose multi-range (206) bodies carry their multipart/byteranges type
+    in Content-Type, as RFC 9110 requires; Starlette sends it as Content-Range.
+    """
+
+    async def __call__(self, scope, receive, send):
+        async def send_with_type(message):
+            if message["type"] == "http.response.start" and message["status"] == 206:
+                headers = MutableHeaders(raw=message["headers"])
+                if headers.get("content-range", "").startswith("multipart/byteranges"):
+                    headers["content-type"] = headers["content-range"]
+                    del headers["content-range"]
+            await send(message)
+
+        await super().__call__(scope, receive, send_with_type)
@@ -0,0 +1,110 @@
+import os
+import re
+import shutil
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Iterator, Optional
+
+from app.core.config import settings
+
+MEDIA_DIR = os.path.join(os.getcwd(), "media")
+
+# "<sha256><ext>": the name of a content-addressed blob
+BLOB_NAME = re.compile(r"[0-9a-f]{64}\.[a-z0-9]+")
+
+
+def is_blob_name(value) -> bool:
+    """URLs and legacy filenames are stored on books too; only these are content-addressed."""
+    return isinstance(value, str) and BLOB_NAME.fullmatch(value) is not None
+
+
+class MediaBackend(ABC):
+    """
+    Where media bytes live. Keys are "<folder>/<name>", e.g. "covers/<sha256>.png";
+    content-addressed keys never change content, so a put of an existing key is a no-op.
+    """
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def put(self, source_path: str, key: str):
+        """Store a finished local file under key. The backend takes ownership of source_path."""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def size(self, key: str) -> int:
+        ...
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path for sendfile-style serving; None for remote stores."""
+        return None
+
+    @abstractmethod
+    def iter_keys(self, folder: str) -> Iterator[str]:
+        ...
+
+
+class LocalMediaBackend(MediaBackend):
+    """Files under media/, served by the /media mount. Also the stand-in for object storage."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid media key: {key}")
+        return path
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def put(self, source_path: str, key: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            # Atomic when source_path is on the same filesystem (uploads write their temp file there)
+            os.replace(source_path, path)
+        except OSError:
+            shutil.move(source_path, path)
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self._path(key))
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+    def iter_keys(self, folder: str) -> Iterator[str]:
+        directory = self._path(folder)
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if not name.startswith("."):
+                    yield f"{folder}/{name}"
+
+
+# An object storage backend registers here and is selected with MEDIA_BACKEND
+BACKENDS = {"local": LocalMediaBackend}
+
+
+def get_backend() -> MediaBackend:
+    backend = BACKENDS.get(settings.MEDIA_BACKEND)
+    if backend is None:
+        raise RuntimeError(f"Unknown MEDIA_BACKEND: {settings.MEDIA_BACKEND}")
+    return backend(MEDIA_DIR)
@@ -0,0 +1,50 @@
+import base64
+import hashlib
+import hmac
+import time
+from typing import Optional
+from urllib.parse import quote
+
+from app.core.config import settings
+
+# Media folders whose files are only reachable through a signed URL (see app.media_server)
+SIGNED_FOLDERS = ("pdfs", "audio")
+
+
+def _secret() -> bytes:
+    return (settings.MEDIA_URL_SECRET or settings.SECRET_KEY).encode()
+
+
+def signature(key: str, expires: int) -> str:
+    """HMAC-SHA256 of the media key ("<folder>/<name>") and its expiry, URL-safe base64."""
+    digest = hmac.new(_secret(), f"{key}\n{expires}".encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def current_window(now: Optional[float] = None) -> int:
+    """
+    URLs signed in the same window are identical, so cached book payloads and their
+    ETags stay valid until the window ends (include it in ETags of such payloads).
+    """
+    return int(time.time() if now is None else now) // settings.MEDIA_URL_TTL_SECONDS
+
+
+def expires_at(now: Optional[float] = None) -> int:
+    # End of the next window: every URL stays valid for at least MEDIA_URL_TTL_SECONDS
+    return (current_window(now) + 2) * settings.MEDIA_URL_TTL_SECONDS
+
+
+def signed_path(key: str, expires: Optional[int] = None) -> str:
+    """"<folder>/<name>?expires=..&sig=..", to append to the media server's base URL."""
+    expires = expires or expires_at()
+    return f"{quote(key)}?expires={expires}&sig={signature(key, expires)}"
+
+
+def verify(key: str, expires: Optional[str], sig: Optional[str], now: Optional[float] = None) -> bool:
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    if expires < (time.time() if now is None else now):
+        return False
+    return hmac.compare_digest(signature(key, expires), sig or "")
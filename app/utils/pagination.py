@@ -0,0 +1,173 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Optional
+
+from fastapi import HTTPException, Query
+from sqlalchemy import and_, func, or_, select, text
+from sqlalchemy.orm import Query as SAQuery
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class PageParams:
+    """Query parameters shared by every cursor-paginated list endpoint."""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Opaque next_cursor from the previous page"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        include_total: bool = Query(False, description="Also return an (approximate) total row count"),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.include_total = include_total
+
+
+# ------------------------------
+# Cursor encoding
+# ------------------------------
+def _to_json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "value"):  # Enum
+        return value.value
+    return value
+
+
+def _from_json(value, column):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return value
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps([_to_json(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *columns) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [_from_json(v, c) for v, c in zip(values, columns)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# ------------------------------
+# Totals
+# ------------------------------
+APPROXIMATE_COUNT_SQL = text(
+    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :name"
+)
+
+
+def approximate_count(query: SAQuery, table_name: str) -> int:
+    """
+    Row count for a page's `total`. For an unfiltered MySQL table this reads the
+    InnoDB statistics estimate instead of scanning; everything else is an exact COUNT.
+    """
+    session = query.session
+    if query.whereclause is None and session.get_bind().dialect.name == "mysql":
+        estimate = session.execute(APPROXIMATE_COUNT_SQL, {"name": table_name}).scalar()
+        if estimate is not None:
+            return int(estimate)
+    return query.order_by(None).count()
+
+
+async def approximate_count_async(db, stmt, table_name: str) -> int:
+    if stmt.whereclause is None and db.get_bind().dialect.name == "mysql":
+        estimate = (await db.execute(APPROXIMATE_COUNT_SQL, {"name": table_name})).scalar()
+        if estimate is not None:
+            return int(estimate)
+    count_stmt = select(func.count()).select_from(stmt.order_by(None).subquery())
+    return (await db.execute(count_stmt)).scalar()
+
+
+# ------------------------------
+# Keyset pagination
+# ------------------------------
+def _keyset(stmt, model, cursor, limit, sort_column, descending):
+    """Apply the keyset predicate, ordering and limit + 1 to a Query or Select."""
+    id_column = model.id
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, sort_column, id_column)
+        if descending:
+            stmt = stmt.filter(or_(
+                sort_column < last_value,
+                and_(sort_column == last_value, id_column < last_id),
+            ))
+        else:
+            stmt = stmt.filter(or_(
+                sort_column > last_value,
+                and_(sort_column == last_value, id_column > last_id),
+            ))
+
+    if descending:
+        stmt = stmt.order_by(sort_column.desc(), id_column.desc())
+    else:
+        stmt = stmt.order_by(sort_column.asc(), id_column.asc())
+    return stmt.limit(limit + 1)
+
+
+def _page(rows, limit, total, sort_column) -> dict:
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), last.id)
+    return {
+        "data": rows,
+        "meta": {"next_cursor": next_cursor, "limit": limit, "total": total},
+    }
+
+
+def paginate(
+    query: SAQuery,
+    model,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_total: bool = False,
+    sort_column=None,
+    descending: bool = True,
+) -> dict:
+    """
+    Keyset-paginate `query` on (sort_column, id), newest first by default.
+
+    sort_column defaults to model.created_at. Only limit + 1 rows are ever loaded,
+    so the cost of a page does not depend on how deep it is.
+    """
+    sort_column = model.created_at if sort_column is None else sort_column
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    total = approximate_count(query, model.__tablename__) if include_total else None
+    rows = _keyset(query, model, cursor, limit, sort_column, descending).all()
+    return _page(rows, limit, total, sort_column)
+
+
+async def paginate_async(
+    db,
+    stmt,
+    model,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_total: bool = False,
+    sort_column=None,
+    descending: bool = True,
+) -> dict:
+    """paginate() for a select() statement on an AsyncSession."""
+    sort_column = model.created_at if sort_column is None else sort_column
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    total = await approximate_count_async(db, stmt, model.__tablename__) if include_total else None
+    result = await db.execute(_keyset(stmt, model, cursor, limit, sort_column, descending))
+    rows = result.unique().scalars().all()
+    return _page(rows, limit, total, sort_column)
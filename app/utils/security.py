@@ -1,16 +1,14 @@
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from app.core.config import settings  # ✅ Correct import
+from app.utils.hashing import password_hasher
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# --- Password utils ---
+# --- Password utils (bcrypt runs in the hashing process pool) ---
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify_and_update(plain_password, hashed_password)[0]
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 # --- JWT utils ---
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
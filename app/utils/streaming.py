@@ -0,0 +1,99 @@
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Callable, Iterator
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Query, Session
+
+try:
+    import orjson
+except ImportError:  # optional accelerator; stdlib json is used without it
+    orjson = None
+
+# Rows fetched from the server-side cursor (and encoded) per chunk
+STREAM_BATCH_SIZE = 500
+
+
+class ResponseFormat(str, Enum):
+    PAGE = "page"      # cursor-paginated {"data", "meta"} envelope (default)
+    JSON = "json"      # every matching row as one chunked JSON array
+    NDJSON = "ndjson"  # every matching row, one JSON object per line
+
+
+MEDIA_TYPES = {
+    ResponseFormat.JSON: "application/json",
+    ResponseFormat.NDJSON: "application/x-ndjson",
+}
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+
+def iter_rows(query: Query, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[list]:
+    """
+    Yield lists of ORM rows from a server-side cursor (yield_per turns on
+    stream_results), so only one batch is held in memory at a time.
+
+    Runs the query as a 2.0-style select: legacy Query uniquifies joined-eager rows,
+    which would buffer the whole result.
+    """
+    stmt = query.statement.execution_options(yield_per=batch_size)
+    result = query.session.execute(stmt).scalars()
+    yield from result.partitions()
+
+
+def _encode_batches(session_factory, build_query, encode_row, fmt: ResponseFormat, batch_size: int):
+    db: Session = session_factory()
+    try:
+        first = True
+        if fmt == ResponseFormat.JSON:
+            yield b"["
+        for batch in iter_rows(build_query(db), batch_size):
+            encoded = [dumps(encode_row(row)) for row in batch]
+            if fmt == ResponseFormat.NDJSON:
+                yield b"\n".join(encoded) + b"\n"
+            else:
+                yield (b"" if first else b",") + b",".join(encoded)
+            # The identity map holds rows weakly, so an encoded batch is freed here
+            first = False
+        if fmt == ResponseFormat.JSON:
+            yield b"]"
+    finally:
+        db.close()
+
+
+def stream_query(
+    session_factory: Callable[[], Session],
+    build_query: Callable[[Session], Query],
+    encode_row: Callable,
+    fmt: ResponseFormat,
+    batch_size: int = STREAM_BATCH_SIZE,
+    filename: str = None,
+) -> StreamingResponse:
+    """
+    Stream every row of build_query(db) as NDJSON or a JSON array.
+
+    The generator opens its own session because request-scoped sessions are closed
+    before a streaming body is sent. encode_row turns one ORM row into a JSON-able dict.
+    """
+    headers = {}
+    if filename:
+        extension = "ndjson" if fmt == ResponseFormat.NDJSON else "json"
+        headers["Content-Disposition"] = f'attachment; filename="{filename}.{extension}"'
+    return StreamingResponse(
+        _encode_batches(session_factory, build_query, encode_row, fmt, batch_size),
+        media_type=MEDIA_TYPES[fmt],
+        headers=headers,
+    )
@@ -0,0 +1,416 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, BinaryIO, Dict, FrozenSet, Optional, Tuple
+
+from anyio import to_thread
+
+from app.core.config import settings
+from app.utils import media_store
+from app.utils.book_serializer import MEDIA_DIRS
+
+# Resumable upload sessions: <id>.part holds the bytes received so far, <id>.json the metadata
+UPLOAD_SESSION_DIR = os.path.join(media_store.MEDIA_DIR, "uploads")
+
+
+class UploadError(Exception):
+    """An upload that was refused; the message is safe to show the client."""
+    status_code = 400
+
+
+class UploadTooLarge(UploadError):
+    status_code = 413
+
+    def __init__(self, limit: int):
+        super().__init__(f"File is larger than the {limit} byte limit")
+
+
+class UnsupportedMediaType(UploadError):
+    status_code = 415
+
+
+class UploadConflict(UploadError):
+    status_code = 409
+
+
+@dataclass(frozen=True)
+class UploadRule:
+    column: str  # Book column the file is stored in
+    max_bytes: int
+    mime_types: FrozenSet[str]
+
+    @property
+    def media_dir(self) -> str:
+        return MEDIA_DIRS[self.column]
+
+    @property
+    def temp_dir(self) -> str:
+        # Next to the final files, so the local backend's rename is atomic
+        return os.path.join(media_store.MEDIA_DIR, self.media_dir)
+
+
+UPLOAD_RULES = {
+    "cover": UploadRule("cover", settings.UPLOAD_MAX_COVER_BYTES,
+                        frozenset({"image/jpeg", "image/png", "image/gif", "image/webp"})),
+    "pdf": UploadRule("pdf_file", settings.UPLOAD_MAX_PDF_BYTES, frozenset({"application/pdf"})),
+    "audio": UploadRule("audio_file", settings.UPLOAD_MAX_AUDIO_BYTES,
+                        frozenset({"audio/mpeg", "audio/mp4", "audio/ogg", "audio/flac", "audio/wav"})),
+}
+
+# The stored extension comes from the sniffed type, never from the client filename
+EXTENSIONS = {
+    "image/jpeg": ".jpg", "image/png": ".png", "image/gif": ".gif", "image/webp": ".webp",
+    "application/pdf": ".pdf",
+    "audio/mpeg": ".mp3", "audio/mp4": ".m4a", "audio/ogg": ".ogg", "audio/flac": ".flac", "audio/wav": ".wav",
+}
+
+# Bytes of the file needed to sniff its type
+SNIFF_BYTES = 16
+
+
+def sniff(head: bytes) -> Optional[str]:
+    """MIME type from the file's magic bytes, for the types in UPLOAD_RULES."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head.startswith(b"RIFF") and head[8:12] == b"WAVE":
+        return "audio/wav"
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    if head.startswith(b"ID3") or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return "audio/mpeg"
+    if head[4:8] == b"ftyp":
+        return "audio/mp4"
+    if head.startswith(b"OggS"):
+        return "audio/ogg"
+    if head.startswith(b"fLaC"):
+        return "audio/flac"
+    return None
+
+
+def get_rule(kind: str) -> UploadRule:
+    rule = UPLOAD_RULES.get(kind)
+    if rule is None:
+        raise UploadError(f"Unknown upload kind: {kind}")
+    return rule
+
+
+def check_declared(rule: UploadRule, content_type: Optional[str], size: Optional[int] = None):
+    """Reject what the client says it is sending before any byte is written."""
+    declared = (content_type or "").split(";")[0].strip().lower()
+    if declared and declared != "application/octet-stream" and declared not in rule.mime_types:
+        raise UnsupportedMediaType(f"{declared} is not accepted, expected one of {', '.join(sorted(rule.mime_types))}")
+    if size is not None and size > rule.max_bytes:
+        raise UploadTooLarge(rule.max_bytes)
+
+
+def safe_filename(filename: Optional[str]) -> str:
+    """Client filename reduced to a safe stem: no directories, no dots, bounded length."""
+    stem = os.path.splitext(os.path.basename((filename or "").replace("\\", "/")))[0]
+    stem = re.sub(r"[^A-Za-z0-9_-]+", "-", stem).strip("-")[:60]
+    return stem or "file"
+
+
+def _place(rule: UploadRule, temp_path: str, digest: str, mime_type: str) -> str:
+    """
+    Hand the finished temp file to the media backend under its content address. A
+    key that already exists holds the same bytes, so the duplicate is just dropped.
+    """
+    name = f"{digest}{EXTENSIONS[mime_type]}"
+    backend = media_store.get_backend()
+    key = f"{rule.media_dir}/{name}"
+    if not backend.exists(key):
+        backend.put(temp_path, key)
+    return name
+
+
+@dataclass
+class StoredFile:
+    filename: str  # "<sha256><ext>", the bare name stored on the book row
+    kind: str
+    size: int
+    sha256: str
+    content_type: str
+
+
+# ------------------------------
+# Single-request uploads
+# ------------------------------
+class _UploadWriter:
+    """
+    Temp file an upload is copied into, one chunk at a time: the first chunk is
+    sniffed, every chunk is counted against the size limit, hashed and written. The
+    bytes go to a temp file first, so readers never see a partial file.
+    """
+
+    def __init__(self, kind: str, content_type: Optional[str] = None):
+        self.kind = kind
+        self.rule = get_rule(kind)
+        check_declared(self.rule, content_type)
+        os.makedirs(self.rule.temp_dir, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(dir=self.rule.temp_dir, prefix=".upload-", suffix=".part")
+        self.out = os.fdopen(fd, "wb")
+        self.digest, self.size, self.mime_type = hashlib.sha256(), 0, None
+
+    def write(self, chunk: bytes):
+        if self.mime_type is None:
+            self.mime_type = sniff(chunk[:SNIFF_BYTES])
+            if self.mime_type not in self.rule.mime_types:
+                raise UnsupportedMediaType(f"File content is not one of {', '.join(sorted(self.rule.mime_types))}")
+        self.size += len(chunk)
+        if self.size > self.rule.max_bytes:
+            raise UploadTooLarge(self.rule.max_bytes)
+        self.digest.update(chunk)
+        self.out.write(chunk)
+
+    def finish(self) -> StoredFile:
+        self.out.close()
+        if self.mime_type is None:
+            raise UploadError("File is empty")
+        sha256 = self.digest.hexdigest()
+        name = _place(self.rule, self.temp_path, sha256, self.mime_type)
+        return StoredFile(name, self.kind, self.size, sha256, self.mime_type)
+
+    def close(self):
+        self.out.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+def store_upload(source: BinaryIO, kind: str, content_type: Optional[str] = None) -> StoredFile:
+    """
+    Copy a file into the media store in settings.UPLOAD_CHUNK_BYTES chunks, hashing
+    it and enforcing the kind's size and type limits on the way. The caller registers
+    the blob (app.crud.media.register_blob) so unreferenced uploads are collected.
+    """
+    writer = _UploadWriter(kind, content_type)
+    try:
+        for chunk in iter(lambda: source.read(settings.UPLOAD_CHUNK_BYTES), b""):
+            writer.write(chunk)
+        return writer.finish()
+    finally:
+        writer.close()
+
+
+async def save_upload_file(upload_file, kind: str) -> StoredFile:
+    """
+    store_upload() for a FastAPI UploadFile, from an async route: the body is read
+    chunk by chunk, and the writes and hashing run on a worker thread, as in
+    append_chunk().
+    """
+    writer = await to_thread.run_sync(_UploadWriter, kind, upload_file.content_type)
+    try:
+        while True:
+            chunk = await upload_file.read(settings.UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            await to_thread.run_sync(writer.write, chunk)
+        return await to_thread.run_sync(writer.finish)
+    finally:
+        await to_thread.run_sync(writer.close)
+
+
+def copy_to_path(source: BinaryIO, path: str) -> int:
+    """
+    Copy a file that is not media (e.g. a catalog import) to path in
+    settings.UPLOAD_CHUNK_BYTES chunks, through a temp file in the same folder so
+    readers never see a partial file. Returns the number of bytes written.
+    """
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=folder, prefix=".upload-", suffix=".part")
+    try:
+        size = 0
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: source.read(settings.UPLOAD_CHUNK_BYTES), b""):
+                out.write(chunk)
+                size += len(chunk)
+        os.replace(temp_path, path)
+        return size
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+# ------------------------------
+# Resumable uploads
+# ------------------------------
+@dataclass
+class UploadSession:
+    id: str
+    kind: str
+    filename: str
+    size: int  # total bytes the client announced
+    content_type: Optional[str]
+    created_at: float
+
+    def as_dict(self, offset: int) -> dict:
+        return {**asdict(self), "offset": offset, "chunk_size": settings.UPLOAD_CHUNK_BYTES}
+
+
+# Running SHA-256 of each session's part file, fed as chunks are written. Kept per
+# process: a session whose chunks reached several workers is hashed once at completion.
+_digests: Dict[str, Tuple[int, "hashlib._Hash"]] = {}
+_digests_lock = threading.Lock()
+
+
+def _running_digest(upload_id: str, offset: int):
+    """The session's hash object if it covers exactly the first `offset` bytes."""
+    with _digests_lock:
+        entry = _digests.get(upload_id)
+        if entry is not None and entry[0] == offset:
+            return entry[1]
+        _digests.pop(upload_id, None)
+        return hashlib.sha256() if offset == 0 else None
+
+
+def _write_and_hash(f, data: bytes, upload_id: str, digest, offset: int):
+    f.write(data)
+    if digest is not None:
+        digest.update(data)
+        with _digests_lock:
+            _digests[upload_id] = (offset + len(data), digest)
+
+
+def _session_path(upload_id: str, extension: str) -> str:
+    # upload_id is a uuid4 hex; anything else cannot name a session
+    if not re.fullmatch(r"[0-9a-f]{32}", upload_id):
+        raise UploadError("Unknown upload")
+    return os.path.join(UPLOAD_SESSION_DIR, f"{upload_id}.{extension}")
+
+
+def create_session(kind: str, filename: str, size: int, content_type: Optional[str]) -> UploadSession:
+    rule = get_rule(kind)
+    if size <= 0:
+        raise UploadError("size must be positive")
+    check_declared(rule, content_type, size)
+    session = UploadSession(uuid.uuid4().hex, kind, safe_filename(filename), size, content_type, time.time())
+    os.makedirs(UPLOAD_SESSION_DIR, exist_ok=True)
+    open(_session_path(session.id, "part"), "wb").close()
+    with open(_session_path(session.id, "json"), "w") as f:
+        json.dump(asdict(session), f)
+    return session
+
+
+def get_session(upload_id: str) -> Optional[UploadSession]:
+    try:
+        with open(_session_path(upload_id, "json")) as f:
+            return UploadSession(**json.load(f))
+    except (FileNotFoundError, UploadError):
+        return None
+
+
+def received(session: UploadSession) -> int:
+    return os.path.getsize(_session_path(session.id, "part"))
+
+
+def _lock(f):
+    """Exclusive, non-blocking lock on the part file, so one chunk is written at a time."""
+    try:
+        import fcntl
+    except ImportError:  # no cross-process locking on Windows; the offset check still applies
+        return
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        raise UploadConflict("Another chunk of this upload is being written")
+
+
+async def append_chunk(session: UploadSession, offset: int, body: AsyncIterator[bytes]) -> int:
+    """
+    Append a request body at `offset`, which must be the number of bytes received so
+    far. Writes, and the running SHA-256 they feed, go to a worker thread in
+    settings.UPLOAD_CHUNK_BYTES pieces. Bytes written before a dropped connection are
+    kept, so the client resumes at the new offset.
+    """
+    f = open(_session_path(session.id, "part"), "ab")
+    try:
+        _lock(f)
+        current = os.fstat(f.fileno()).st_size
+        if offset != current:
+            raise UploadConflict(f"Expected offset {current}")
+        digest, written = _running_digest(session.id, current), current
+        buffer = bytearray()
+        async for data in body:
+            current += len(data)
+            if current > session.size:
+                raise UploadError(f"Chunk goes past the announced size of {session.size} bytes")
+            buffer += data
+            if len(buffer) >= settings.UPLOAD_CHUNK_BYTES:
+                await to_thread.run_sync(_write_and_hash, f, bytes(buffer), session.id, digest, written)
+                written += len(buffer)
+                buffer.clear()
+        if buffer:
+            await to_thread.run_sync(_write_and_hash, f, bytes(buffer), session.id, digest, written)
+        return current
+    finally:
+        f.close()
+
+
+def complete_session(session: UploadSession) -> StoredFile:
+    """
+    Check the finished part file (size, type) and rename it into the media store under
+    its hash. The hash was computed as the chunks came in; the file is only read
+    again when they were spread over several processes.
+    """
+    rule = get_rule(session.kind)
+    part = _session_path(session.id, "part")
+    with open(part, "rb") as f:
+        _lock(f)
+        size = os.fstat(f.fileno()).st_size
+        if size != session.size:
+            raise UploadConflict(f"Upload is incomplete: {size} of {session.size} bytes received")
+        if size > rule.max_bytes:
+            raise UploadTooLarge(rule.max_bytes)
+        mime_type = sniff(f.read(SNIFF_BYTES))
+        if mime_type not in rule.mime_types:
+            raise UnsupportedMediaType(f"File content is not one of {', '.join(sorted(rule.mime_types))}")
+        digest = _running_digest(session.id, size)
+        if digest is None:
+            f.seek(0)
+            digest = hashlib.sha256()
+            for chunk in iter(lambda: f.read(settings.UPLOAD_CHUNK_BYTES), b""):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+        # The part file sits next to the media folders, so the local backend renames it
+        stored = StoredFile(_place(rule, part, sha256, mime_type), session.kind, size, sha256, mime_type)
+    discard_session(session.id)
+    return stored
+
+
+def discard_session(upload_id: str):
+    with _digests_lock:
+        _digests.pop(upload_id, None)
+    for extension in ("part", "json"):
+        try:
+            os.remove(_session_path(upload_id, extension))
+        except FileNotFoundError:
+            pass
+
+
+def purge_stale_sessions(db=None) -> dict:
+    """Scheduled job: drop sessions not touched for settings.UPLOAD_SESSION_TTL_HOURS."""
+    if not os.path.isdir(UPLOAD_SESSION_DIR):
+        return {"rows": 0}
+    cutoff = time.time() - settings.UPLOAD_SESSION_TTL_HOURS * 3600
+    purged = 0
+    for name in os.listdir(UPLOAD_SESSION_DIR):
+        upload_id, extension = os.path.splitext(name)
+        path = os.path.join(UPLOAD_SESSION_DIR, name)
+        if extension == ".json" and os.path.getmtime(path) < cutoff:
+            part = os.path.join(UPLOAD_SESSION_DIR, f"{upload_id}.part")
+            if not os.path.exists(part) or os.path.getmtime(part) < cutoff:
+                discard_session(upload_id)
+                purged += 1
+    return {"rows": purged}
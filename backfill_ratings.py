@@ -0,0 +1,24 @@
+import argparse
+
+from app.db.database import SessionLocal
+from app.db.counters import backfill_ratings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute every book's rating totals and average from its reviews.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="books per transaction")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        written = backfill_ratings(db, args.batch_size, on_progress=lambda n: print(f"{n} books updated"))
+        print(f"Backfill complete: {written} books.")
+    except Exception as e:
+        db.rollback()
+        print(f"Error: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
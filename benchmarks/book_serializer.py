@@ -0,0 +1,76 @@
+"""
+Rows/sec of book list serialization: the old from_orm().dict() path against
+app.utils.book_serializer.
+
+    PYTHONPATH=. python benchmarks/book_serializer.py [rows] [repeats]
+"""
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models import Book
+from app.schemas.book import BookFormatEnum, BookResponse
+from app.utils.book_serializer import BookSerializer
+
+BASE_URL = "http://testserver"
+MEDIA_URL = "http://127.0.0.1:8000/media"
+
+
+def make_books(count: int):
+    now = datetime(2026, 1, 1)
+    return [
+        Book(
+            id=i, title=f"Book {i}", author=f"Author {i % 97}", category_id=i % 12,
+            format=BookFormatEnum.E_BOOK, copies_total=3, copies_available=i % 4,
+            description="A fairly ordinary description of a book. " * 3,
+            cover=f"cover_{i}.jpg", pdf_file=f"book_{i}.pdf", audio_file=None,
+            average_rating=3.5, created_at=now + timedelta(seconds=i), updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def old_path(books) -> bytes:
+    """What the list routes did before: format_book_urls, then from_orm().dict() per row."""
+    data = []
+    for book in books:
+        cover, pdf_file = book.cover, book.pdf_file
+        if book.cover and not book.cover.startswith("http"):
+            book.cover = f"{MEDIA_URL}/cover/{book.cover}"
+        if book.pdf_file and not book.pdf_file.startswith("http"):
+            book.pdf_file = f"{MEDIA_URL}/pdf/{book.pdf_file}"
+        data.append(BookResponse.from_orm(book).dict())
+        book.cover, book.pdf_file = cover, pdf_file  # keep the rows reusable between runs
+    return json.dumps(jsonable_encoder(data)).encode()
+
+
+def new_path(books) -> bytes:
+    return BookSerializer(BASE_URL).dumps_list(books)
+
+
+def measure(fn, books, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(books)
+        best = min(best, time.perf_counter() - start)
+    return len(books) / best
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    books = make_books(rows)
+    before = measure(old_path, books, repeats)
+    after = measure(new_path, books, repeats)
+    print(f"rows={rows} best of {repeats}")
+    print(f"before (from_orm + jsonable_encoder): {before:12,.0f} rows/s")
+    print(f"after  (BookSerializer):              {after:12,.0f} rows/s")
+    print(f"speedup: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
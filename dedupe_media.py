@@ -0,0 +1,33 @@
+import argparse
+import json
+
+from app.db.database import SessionLocal
+from app.crud.media import collect_garbage, convert_legacy_media, recount_references
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Move book media into the content-addressed store, merging identical files."
+    )
+    parser.add_argument("--recount", action="store_true", help="only recompute blob reference counts")
+    parser.add_argument("--gc", action="store_true", help="also delete unreferenced blobs past the grace period")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.recount:
+            print(f"{recount_references(db)} reference counts corrected.")
+        else:
+            report = convert_legacy_media(db, on_progress=lambda r: print(f"{r['converted']} files converted"))
+            print(json.dumps(report, indent=2))
+        if args.gc:
+            print(json.dumps(collect_garbage(db), indent=2))
+    except Exception as e:
+        db.rollback()
+        print(f"Error: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
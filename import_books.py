@@ -0,0 +1,56 @@
+import argparse
+import os
+import shutil
+
+from app.db.database import SessionLocal
+from app.crud import book_import
+
+IMPORT_DIR = os.path.join(os.getcwd(), "media", "imports")
+
+
+def print_progress(job):
+    print(f"line {job.last_line}: {job.processed} processed, {job.inserted} inserted, "
+          f"{job.updated} updated, {job.failed} failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import books from a CSV or JSON Lines file.")
+    parser.add_argument("file", nargs="?", help="CSV (with header row) or .jsonl file")
+    parser.add_argument("--resume", type=int, metavar="JOB_ID", help="resume a failed import job")
+    parser.add_argument("--batch-size", type=int, default=book_import.IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+    if not args.file and args.resume is None:
+        parser.error("give a file to import or --resume JOB_ID")
+
+    db = SessionLocal()
+    job = None
+    try:
+        if args.resume is not None:
+            job = book_import.get_job(db, args.resume)
+            if not job:
+                print(f"Import job {args.resume} not found.")
+                return
+            print(f"Resuming import job {job.id} after line {job.last_line}.")
+        else:
+            # Keep a copy next to uploaded imports so the job can be resumed later
+            os.makedirs(IMPORT_DIR, exist_ok=True)
+            job = book_import.create_job(db, os.path.basename(args.file), "")
+            job.file_path = book_import.file_for_upload(IMPORT_DIR, job.id, args.file)
+            shutil.copyfile(args.file, job.file_path)
+            db.commit()
+            print(f"Created import job {job.id}.")
+
+        book_import.run_import(db, job, batch_size=args.batch_size, on_progress=print_progress)
+        print(f"Import job {job.id} {job.status.value}.")
+        for error in book_import.job_errors(job)[:20]:
+            print(f"  line {error['line']}: {error['error']}")
+    except Exception as e:
+        print(f"Import failed: {e}")
+        if job is not None and job.id:
+            print(f"Resume with: python import_books.py --resume {job.id}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import argparse
+import json
+
+from app.db.database import SessionLocal
+from app.db.counters import reconcile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute borrow/review counters from the source tables.")
+    parser.add_argument("--fix", action="store_true", help="correct the drifted counters")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = reconcile(db, fix=args.fix)
+        print(json.dumps(report, indent=2, default=str))
+        if any(report["drift"].values()):
+            print("Counters corrected." if args.fix else "Drift found; run again with --fix to correct it.")
+        else:
+            print("Counters are in sync.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import argparse
+import json
+import time
+
+from app.core.scheduler import scheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the scheduled jobs (status flips, upload and media cleanup) outside the web workers."
+    )
+    parser.add_argument("--once", action="store_true", help="run every job once and exit")
+    parser.add_argument("--job", action="append", help="only this job (repeatable)")
+    args = parser.parse_args()
+
+    names = args.job or list(scheduler.stats()["jobs"])
+    for name in names:
+        if scheduler.job_stats(name) is None:
+            parser.error(f"unknown job: {name}")
+
+    if args.once:
+        for name in names:
+            scheduler.run_job(name)
+            print(json.dumps({name: scheduler.job_stats(name)}, default=str))
+        return
+
+    print(f"Running {', '.join(names)}; leave SCHEDULER_ENABLED off on the web workers. Ctrl+C to stop.")
+    try:
+        while True:
+            scheduler.run_pending(names)
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(json.dumps(scheduler.stats(), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
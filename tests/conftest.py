@@ -0,0 +1,24 @@
+import os
+import tempfile
+
+# Point the app at a throwaway SQLite database before anything imports app.db
+os.environ["MYSQL_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+
+import pytest
+
+from app.main import app  # noqa: E402  (registers every model on Base)
+from app.core.settings_cache import settings_cache
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    settings_cache.invalidate()  # versions restart with the fresh database
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
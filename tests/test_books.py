@@ -0,0 +1,724 @@
+import asyncio
+import hashlib
+import importlib
+import io
+from datetime import date, datetime
+
+import pytest
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.cache import BOOKS, response_cache
+from app.core.config import settings
+from app.core.media_cache import media_file_cache
+from app.core.search import book_index
+from app.crud import book as book_crud
+from app.crud import book_import
+from app.crud import category as category_crud
+from app.crud import export as export_crud
+from app.crud import review as review_crud
+from app.db import counters
+from app.db.base import Base
+from app.db.explain import assert_no_full_scans, capture_queries
+from app.db.routing import ReplicaRouter, RoutingSession, primary_pinned
+from app.db.session import SessionLocal, create_db_engine, engine
+from app.db.versioning import bump_versions, get_versions
+from app.crud.aio import book as aio_book
+from app.crud.aio import category as aio_category
+from app.db.async_session import AsyncSessionLocal, async_engine, create_async_db_engine
+from app.main import app
+from app.models.book import Book
+from app.models.book_import import ImportStatus
+from app.models.borrow import Borrow, BorrowStatus
+from app.models.category import Category
+from app.models.export import ExportFormat, ExportStatus, ExportWatermark
+from app.models.user import User, UserRoleEnum
+from app.schemas.book import BookFilter, BookFormatEnum, BookResponse, BookSortEnum
+from app.schemas.category import CategoryCreate
+from app.schemas.review import ReviewCreateRequest
+from app.crud import media as media_crud
+from app.models.media import MediaBlob
+from app.utils import media_store, media_urls, uploads
+from app.utils.book_serializer import MEDIA_DIRS, BookSerializer
+from app.utils.security import create_access_token
+
+# app.routers binds `books` to the router, so load the module itself
+books_router = importlib.import_module("app.routers.books")
+
+
+def test_catalog_and_review_queries_use_indexes(db):
+    user = User(username="reader", name="Reader", email="reader@example.com", password="x")
+    db.add(user)
+    db.commit()
+    book = book_crud.create_book(db, {
+        "title": "Dune", "author": "Herbert", "format": BookFormatEnum.HARD_COPY,
+        "copies_total": 2, "copies_available": 2, "category_id": None,
+    })
+
+    with capture_queries(engine) as captured:
+        book_crud.query_books(db, BookFilter(available=True))
+        book_crud.query_books(db, BookFilter(category_id=1))
+        book_crud.query_books(db, BookFilter(format=BookFormatEnum.E_BOOK))
+        book_crud.query_books(db, BookFilter(author="Her"))
+        review_crud.create_review(db, book.id, ReviewCreateRequest(userId=user.id, rating=4))
+        review_crud.get_review_by_user_and_book(db, user.id, book.id)
+        review_crud.get_reviews_by_book(db, book.id)
+
+    assert_no_full_scans(engine, captured)
+
+
+def test_filter_books_combines_predicates_and_sorts_in_sql(db):
+    fiction = Category(name="Fiction")
+    db.add(fiction)
+    db.commit()
+    rows = [
+        ("Dune", "Herbert", BookFormatEnum.HARD_COPY, fiction.id, 2, 4.5, datetime(2024, 1, 1)),
+        ("Emma", "Austen", BookFormatEnum.E_BOOK, fiction.id, 0, 3.0, datetime(2024, 2, 1)),
+        ("Persuasion", "Austen", BookFormatEnum.AUDIO_BOOK, None, 1, 4.5, datetime(2024, 3, 1)),
+        ("100%_Real", "A_uthor", BookFormatEnum.E_BOOK, None, 1, 1.0, datetime(2024, 4, 1)),
+    ]
+    for title, author, fmt, category_id, available, rating, created in rows:
+        db.add(Book(
+            title=title, author=author, format=fmt, category_id=category_id, copies_total=2,
+            copies_available=available, average_rating=rating, created_at=created,
+        ))
+    db.commit()
+
+    def titles(filters=None, **kwargs):
+        return [b.title for b in book_crud.query_books(db, filters, **kwargs)["data"]]
+
+    assert titles() == ["100%_Real", "Persuasion", "Emma", "Dune"]
+    assert titles(BookFilter(available=True)) == ["100%_Real", "Persuasion", "Dune"]
+    assert titles(BookFilter(available=False)) == ["Emma"]
+    assert titles(BookFilter(category_id=fiction.id, format=BookFormatEnum.E_BOOK)) == ["Emma"]
+    assert titles(BookFilter(author="Aus")) == ["Persuasion", "Emma"]
+    # LIKE wildcards in the author are literal
+    assert titles(BookFilter(author="A_")) == ["100%_Real"]
+    assert titles(BookFilter(min_rating=3.0, max_rating=4.0)) == ["Emma"]
+    assert titles(BookFilter(created_after=datetime(2024, 2, 1), created_before=datetime(2024, 4, 1))) == [
+        "Persuasion", "Emma",
+    ]
+
+    assert titles(sort=BookSortEnum.TITLE, descending=False) == ["100%_Real", "Dune", "Emma", "Persuasion"]
+    # Rating ties fall back to id, across pages too
+    assert titles(sort=BookSortEnum.RATING) == ["Persuasion", "Dune", "Emma", "100%_Real"]
+    first = book_crud.query_books(db, BookFilter(min_rating=3.0), sort=BookSortEnum.RATING, limit=1)
+    second = book_crud.query_books(
+        db, BookFilter(min_rating=3.0), sort=BookSortEnum.RATING, limit=1, cursor=first["meta"]["next_cursor"],
+    )
+    assert [b.title for b in first["data"] + second["data"]] == ["Persuasion", "Dune"]
+
+
+def test_search_index_follows_writes_and_syncs_other_workers_changes(db):
+    book_index.mark_stale()
+    dune = book_crud.create_book(db, {
+        "title": "Dune", "author": "Frank Herbert", "format": BookFormatEnum.HARD_COPY,
+        "copies_total": 1, "copies_available": 1,
+    })
+    emma = book_crud.create_book(db, {
+        "title": "Emma", "author": "Jane Austen", "format": BookFormatEnum.E_BOOK,
+        "description": "A novel about dune-less Highbury",
+    })
+
+    def titles(q):
+        books, total = book_crud.search_books(db, q)
+        assert total == len(books)
+        return [b.title for b in books]
+
+    # Title hits outrank description hits; prefixes match
+    assert titles("dune") == ["Dune", "Emma"]
+    assert titles("herb") == ["Dune"]
+    assert titles("jane austen") == ["Emma"]
+
+    book_crud.update_book(db, dune.id, {"title": "Children of Dune"})
+    assert titles("children dune") == ["Children of Dune"]
+    book_crud.delete_book(db, emma.id)
+    assert titles("austen") == []
+
+    # Another worker inserts and deletes rows behind the index's back
+    with engine.begin() as conn:
+        conn.execute(Book.__table__.insert().values(
+            title="Persuasion", author="Jane Austen", format=BookFormatEnum.E_BOOK,
+            copies_total=1, copies_available=1, updated_at=datetime(2999, 1, 1),
+        ))
+    book_index.sync(db, force=True)
+    assert titles("persuasion") == ["Persuasion"]
+
+    with engine.begin() as conn:
+        conn.execute(Book.__table__.delete().where(Book.id == dune.id))
+    book_index.sync(db, force=True)
+    assert titles("dune") == []
+    assert titles("austen") == ["Persuasion"]
+
+
+def test_read_session_routes_to_replica_until_a_write(db, tmp_path):
+    replica = create_db_engine("sqlite:///" + str(tmp_path / "replica.db"))
+    Base.metadata.create_all(bind=replica)
+    with replica.begin() as conn:
+        conn.execute(Book.__table__.insert().values(
+            title="Replica only", author="R", format=BookFormatEnum.E_BOOK,
+            copies_total=1, copies_available=1,
+        ))
+
+    primary_pinned.set(False)
+    router = ReplicaRouter(engine, [replica], max_lag=5, fallback_to_primary=True, check_interval=0)
+    session = RoutingSession(router=router)
+    try:
+        assert [b.title for b in session.query(Book).all()] == ["Replica only"]
+
+        session.add(User(username="writer", name="Writer", email="writer@example.com", password="x"))
+        session.commit()
+        assert session.query(Book).all() == []
+        assert session.query(User).filter_by(username="writer").one()
+    finally:
+        session.close()
+        primary_pinned.set(False)
+        replica.dispose()
+
+
+def test_sync_and_async_pools_are_sized_separately_and_reported(db, monkeypatch):
+    for name, value in {"DB_POOL_SIZE": 2, "DB_MAX_OVERFLOW": 1, "DB_ASYNC_POOL_SIZE": 7, "DB_ASYNC_MAX_OVERFLOW": 3}.items():
+        monkeypatch.setattr(settings, name, value)
+    sync_engine = create_db_engine("sqlite://")
+    async_engine_ = create_async_db_engine("sqlite://")
+    assert (sync_engine.pool.size(), sync_engine.pool._max_overflow) == (2, 1)
+    assert (async_engine_.sync_engine.pool.size(), async_engine_.sync_engine.pool._max_overflow) == (7, 3)
+    sync_engine.dispose()
+
+    admin = User(username="dba", name="DBA", email="dba@example.com", password="x", role=UserRoleEnum.ADMIN)
+    db.add(admin)
+    db.commit()
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": "dba", "role": "ADMIN"})}
+    stats = TestClient(app).get("/api/admin/db-pool", headers=headers).json()
+    assert stats["primary"]["size"] == engine.pool.size() and stats["primary"]["max_overflow"] == engine.pool._max_overflow
+    assert stats["primary_async"]["size"] == async_engine.sync_engine.pool.size()
+    assert stats["max_connections_per_database"] == sum(
+        stats[name]["size"] + stats[name]["max_overflow"] for name in ("primary", "primary_async")
+    )
+
+
+def test_replica_lag_is_measured_outside_the_lock_and_never_by_pick(monkeypatch):
+    replica = create_db_engine("sqlite://")
+    router = ReplicaRouter(engine, [replica], max_lag=5, fallback_to_primary=True, check_interval=60)
+    measured = []
+
+    def measure_lag(probe):
+        measured.append(router._lock.locked())
+        return 30.0
+
+    monkeypatch.setattr(router, "measure_lag", measure_lag)
+    assert router.pick() is replica and measured == []
+    router.refresh()
+    assert measured == [False]
+    assert router.pick() is engine and router.status()[0]["lag_seconds"] == 30.0
+    replica.dispose()
+
+
+def test_book_routes_answer_304_until_the_book_changes(db):
+    book = book_crud.create_book(db, {
+        "title": "Emma", "author": "Austen", "format": BookFormatEnum.E_BOOK,
+        "copies_total": 1, "copies_available": 1,
+    })
+    client = TestClient(app)
+
+    for copies, path in enumerate(("/api/book/list", f"/api/book/retrieve/{book.id}")):
+        etag = client.get(path).headers["etag"]
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+        book_crud.update_book(db, book.id, {"copies_available": copies})
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_table_versions_are_bumped_after_the_write_commits(db):
+    before, _ = get_versions(db, ["books"])
+    db.add(Book(title="Dune", author="Herbert", format=BookFormatEnum.HARD_COPY))
+    db.flush()
+    # The writer's transaction does not touch (or lock) the version row
+    assert get_versions(db, ["books"])[0] == before
+    db.rollback()
+    assert get_versions(db, ["books"])[0] == before
+
+    book_crud.create_book(db, {"title": "Dune", "author": "Herbert", "format": BookFormatEnum.HARD_COPY})
+    with engine.connect() as other:
+        assert get_versions(other, ["books"])[0] != before
+
+
+def test_catalog_responses_are_cached_until_their_tag_is_invalidated(db):
+    book_crud.create_book(db, {
+        "title": "Dune", "author": "Herbert", "format": BookFormatEnum.HARD_COPY,
+        "copies_total": 1, "copies_available": 1,
+    })
+    client = TestClient(app)
+    path = "/api/book/new-collection"
+
+    first = client.get(path)
+    hits = response_cache.hits
+    # A write that skips app.crud does not invalidate: the cached body is served
+    with engine.begin() as conn:
+        conn.execute(Book.__table__.insert().values(
+            title="Emma", author="Austen", format=BookFormatEnum.E_BOOK, copies_total=1, copies_available=1,
+        ))
+    second = client.get(path)
+    assert response_cache.hits == hits + 1
+    assert second.content == first.content and second.headers["etag"] == first.headers["etag"]
+    assert [b["title"] for b in second.json()] == ["Dune"]
+
+    not_modified = client.get(path, headers={"If-None-Match": first.headers["etag"]})
+    assert not_modified.status_code == 304 and not not_modified.content
+
+    response_cache.invalidate(BOOKS)
+    fresh = client.get(path, headers={"If-None-Match": first.headers["etag"]})
+    assert fresh.status_code == 200 and fresh.headers["etag"] != first.headers["etag"]
+    assert sorted(b["title"] for b in fresh.json()) == ["Dune", "Emma"]
+
+
+def test_cached_responses_follow_table_versions_written_by_other_workers(db):
+    book_crud.create_book(db, {
+        "title": "Dune", "author": "Herbert", "format": BookFormatEnum.HARD_COPY,
+        "copies_total": 1, "copies_available": 1,
+    })
+    client = TestClient(app)
+    path = "/api/book/new-collection"
+    response_cache.refresh_versions(db)
+    etag = client.get(path).headers["etag"]
+
+    # Weak and listed validators match the strong ETag of the cached entry
+    assert client.get(path, headers={"If-None-Match": "W/" + etag}).status_code == 304
+    assert client.get(path, headers={"If-None-Match": '"other", ' + etag}).status_code == 304
+
+    # Another worker inserts a book: only table_versions moves in this process
+    with engine.begin() as conn:
+        conn.execute(Book.__table__.insert().values(
+            title="Emma", author="Austen", format=BookFormatEnum.E_BOOK, copies_total=1, copies_available=1,
+        ))
+        bump_versions(conn, ["books"])
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+    response_cache.refresh_versions(db)
+    fresh = client.get(path, headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert sorted(b["title"] for b in fresh.json()) == ["Dune", "Emma"]
+
+
+def test_bulk_import_upserts_and_records_row_errors(db, tmp_path):
+    book_crud.create_book(db, {
+        "title": "Dune", "author": "Herbert", "isbn": "9780441172719", "format": BookFormatEnum.HARD_COPY,
+        "copies_total": 1, "copies_available": 1,
+    })
+    # Catalogued before ISBNs were recorded
+    book_crud.create_book(db, {"title": "Emma", "author": "Austen", "format": BookFormatEnum.HARD_COPY})
+    path = tmp_path / "catalog.csv"
+    path.write_text(
+        "title,author,isbn,category,copies_total\n"
+        "Dune,Herbert,978-0441172719,Sci-Fi,4\n"
+        "Neuromancer,Gibson,,Sci-Fi,2\n"
+        ",Nobody,,,1\n"
+        "Emma,Austen,9780141439587,,3\n"
+    )
+
+    job = book_import.create_job(db, "catalog.csv", str(path))
+    assert book_import.claim_job(db, job.id) and not book_import.claim_job(db, job.id)
+    job = book_import.run_import(db, job, batch_size=2)
+
+    assert (job.status, job.inserted, job.updated, job.failed) == (ImportStatus.COMPLETED, 1, 2, 1)
+    assert book_import.job_errors(job)[0]["line"] == 4
+    books = {b.title: b for b in db.query(Book).populate_existing()}
+    assert len(books) == db.query(Book).count() == 3
+    assert books["Dune"].copies_total == 4
+    assert (books["Emma"].isbn, books["Emma"].copies_total) == ("9780141439587", 3)
+    assert books["Dune"].category_id == books["Neuromancer"].category_id is not None
+
+
+def test_bulk_import_refuses_bad_rows_without_failing_the_job(db, tmp_path):
+    reader = User(username="reader", name="Reader", email="reader@example.com", password="x")
+    dune = Book(title="Dune", author="Herbert", isbn="9780441172719", format=BookFormatEnum.HARD_COPY,
+                copies_total=3, copies_available=1)
+    ubik = Book(title="Ubik", author="Dick", format=BookFormatEnum.HARD_COPY, copies_total=2, copies_available=0)
+    db.add_all([reader, dune, ubik])
+    db.commit()
+    today = date.today()
+    db.add_all([
+        Borrow(user_id=reader.id, book_id=book.id, borrow_date=today, due_date=today, status=status)
+        for book in (dune, ubik) for status in (BorrowStatus.ACTIVE, BorrowStatus.REQUESTED)
+    ])
+    # Stands in for any row the database refuses (a constraint, a too-long value on MySQL)
+    db.execute(text(
+        "CREATE TRIGGER refuse_book BEFORE INSERT ON books WHEN NEW.title = 'Refused' "
+        "BEGIN SELECT RAISE(ABORT, 'refused by the database'); END"
+    ))
+    db.commit()
+    path = tmp_path / "catalog.csv"
+    path.write_text(
+        "title,author,isbn,category_id,copies_total\n"
+        "Neuromancer,Gibson,,999,1\n"
+        "Refused,Nobody,,,1\n"
+        "Emma,Austen,,,1\n"
+        "Dune,Herbert,9780441172719,,5\n"
+        "Ubik,Dick,,,1\n"
+    )
+
+    job = book_import.run_import(db, book_import.create_job(db, "catalog.csv", str(path)))
+
+    assert (job.status, job.inserted, job.updated, job.failed) == (ImportStatus.COMPLETED, 1, 1, 3)
+    errors = book_import.job_errors(job)
+    assert [e["line"] for e in errors] == [2, 3, 6]
+    assert "category 999" in errors[0]["error"] and "refused" in errors[1]["error"]
+    books = {b.title: b for b in db.query(Book).populate_existing()}
+    assert sorted(books) == ["Dune", "Emma", "Ubik"]
+    # Two copies are out: raising the total frees three, the live count is not overwritten
+    assert (books["Dune"].copies_total, books["Dune"].copies_available) == (5, 3)
+    assert (books["Ubik"].copies_total, books["Ubik"].copies_available) == (2, 0)
+
+
+def test_import_route_copies_the_upload_and_logs_failed_jobs(db, tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(books_router, "IMPORT_DIR", str(tmp_path))
+    db.add(User(username="admin", name="Admin", email="admin@example.com", password="x", role=UserRoleEnum.ADMIN))
+    db.commit()
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": "admin", "role": "ADMIN"})}
+    catalog = b"title,author\\nDune,Herbert\\n"
+
+    # The background task runs before TestClient returns
+    job = TestClient(app).post("/api/book/import", headers=headers, files={"file": ("catalog.csv", catalog, "text/csv")}).json()
+    assert (tmp_path / f"{job['id']}.csv").read_bytes() == catalog
+    assert [p.name for p in tmp_path.iterdir()] == [f"{job['id']}.csv"]  # no temp file left behind
+    assert book_import.get_job(db, job["id"]).status == ImportStatus.COMPLETED
+
+    lost = book_import.create_job(db, "lost.csv", str(tmp_path / "lost.csv"))
+    with caplog.at_level("ERROR", logger=books_router.__name__):
+        books_router.run_import_job(lost.id)
+        books_router.run_import_job(999)
+    assert [r.getMessage() for r in caplog.records] == [
+        f"Import job {lost.id} failed", "Import job 999 no longer exists",
+    ]
+    assert caplog.records[0].exc_info is not None
+    db.refresh(lost)
+    assert lost.status == ImportStatus.FAILED
+
+
+def test_incremental_export_writes_rows_changed_since_the_watermark(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(export_crud, "EXPORT_DIR", str(tmp_path))
+    for title, day in (("Old", 1), ("Changed", 3)):
+        db.add(Book(title=title, author="A", format=BookFormatEnum.E_BOOK, updated_at=datetime(2020, 1, day)))
+    db.add(User(username="reader", name="Reader", email="reader@example.com", password="secret-hash", updated_at=datetime(2020, 1, 1)))
+    db.add(ExportWatermark(table_name="books", format=ExportFormat.CSV, exported_until=datetime(2020, 1, 2)))
+    db.commit()
+
+    job = export_crud.create_job(db, ["books", "users"], ExportFormat.CSV, incremental=True)
+    export_crud.run_export(db, SessionLocal(), job)
+
+    assert job.status == ExportStatus.COMPLETED
+    books_csv = open(export_crud.artifact_path(job, "books-00001.csv")).read()
+    assert "Changed" in books_csv and "Old" not in books_csv
+    assert "secret-hash" not in open(export_crud.artifact_path(job, "users-00001.csv")).read()
+    assert export_crud.get_watermark(db, "books", ExportFormat.CSV) == job.exported_until
+
+
+def test_review_writes_keep_average_rating_in_sync(db):
+    reader = User(username="reader", name="Reader", email="reader@example.com", password="x")
+    db.add(reader)
+    db.commit()
+    books = [
+        book_crud.create_book(db, {"title": t, "author": "A", "format": BookFormatEnum.E_BOOK})
+        for t in ("Emma", "Dune")
+    ]
+    first = review_crud.create_review(db, books[0].id, ReviewCreateRequest(userId=reader.id, rating=5))
+    review_crud.create_review(db, books[0].id, ReviewCreateRequest(userId=reader.id, rating=2))
+    review_crud.create_review(db, books[1].id, ReviewCreateRequest(userId=reader.id, rating=4))
+    review_crud.delete_review(db, first.id)
+
+    with capture_queries(engine) as captured:
+        recommended = book_crud.get_recommended_books(db, limit=2)
+    assert_no_full_scans(engine, captured)
+    assert [(b.title, b.average_rating) for b in recommended] == [("Dune", 4), ("Emma", 2)]
+
+    db.execute(Book.__table__.update().values(average_rating=0, rating_sum=0, rating_count=0))
+    db.commit()
+    assert counters.backfill_ratings(db, batch_size=1) == 2
+    assert [b.average_rating for b in book_crud.get_recommended_books(db, limit=2)] == [4, 2]
+
+
+def test_category_book_counts_use_a_constant_number_of_queries(db):
+    def add_categories(n):
+        for i in range(n):
+            category = Category(name=f"Category {len(db.query(Category).all())}")
+            db.add(category)
+            db.flush()
+            db.add_all([
+                Book(title=f"{category.name} hard", author="A", format=BookFormatEnum.HARD_COPY,
+                     copies_total=1, copies_available=0, category_id=category.id),
+                Book(title=f"{category.name} ebook", author="A", format=BookFormatEnum.E_BOOK,
+                     copies_total=1, copies_available=1, category_id=category.id),
+            ])
+        db.commit()
+        db.expire_all()
+
+    query_counts = []
+    for n in (3, 30):
+        add_categories(n)
+        with capture_queries(engine) as captured:
+            categories = category_crud.get_all_categories_list(db, breakdown=True)
+            category_crud.get_all_categories(db, skip=0, limit=n)
+            category_crud.get_category_by_id(db, categories[0].id)
+        query_counts.append(len(captured))
+
+    assert query_counts[0] == query_counts[1] == 6
+    assert all(c.book_count == 2 and c.available_count == 1 for c in categories)
+    assert categories[0].format_counts == {"HARD_COPY": 1, "E_BOOK": 1}
+
+    client = TestClient(app)
+    listed = client.get("/api/categories/list", params={"breakdown": True}).json()
+    assert len(listed) == 33 and listed[0]["format_counts"] == {"HARD_COPY": 1, "E_BOOK": 1}
+    assert client.get(f"/api/categories/{categories[0].id}").json()["book_count"] == 2
+    assert client.delete(f"/api/categories/delete/{categories[0].id}").status_code == 404
+
+
+def test_resumable_upload_streams_hashes_and_places_the_file(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(media_store, "MEDIA_DIR", str(tmp_path))
+    monkeypatch.setattr(uploads, "UPLOAD_SESSION_DIR", str(tmp_path / "uploads"))
+    db.add(User(username="admin", name="Admin", email="admin@example.com", password="x", role=UserRoleEnum.ADMIN))
+    db.commit()
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": "admin", "role": "ADMIN"})}
+    client = TestClient(app)
+    audio = b"ID3" + bytes(range(256)) * 8
+
+    session = client.post("/api/book/uploads", headers=headers, json={
+        "kind": "audio", "filename": "../../etc/Chapter 1.mp3", "size": len(audio), "content_type": "audio/mpeg",
+    }).json()
+    url = f"/api/book/uploads/{session['id']}"
+    assert client.put(url, headers={**headers, "Upload-Offset": "0"}, content=audio[:1000]).json()["offset"] == 1000
+    # A retried chunk at a stale offset is refused, the status tells where to resume
+    assert client.put(url, headers={**headers, "Upload-Offset": "0"}, content=audio[:1000]).status_code == 409
+    assert client.get(url, headers=headers).json()["offset"] == 1000
+    client.put(url, headers={**headers, "Upload-Offset": "1000"}, content=audio[1000:])
+    part_inode = (tmp_path / "uploads" / f"{session['id']}.part").stat().st_ino
+
+    stored = client.post(url + "/complete", headers=headers).json()
+    assert stored["sha256"] == hashlib.sha256(audio).hexdigest()
+    assert stored["filename"] == stored["sha256"] + ".mp3"
+    placed = tmp_path / "audio" / stored["filename"]
+    assert placed.read_bytes() == audio and placed.stat().st_ino == part_inode  # renamed, not copied
+    assert client.get(url, headers=headers).status_code == 404
+
+    # Chunks written by another process: no running hash here, so completion hashes the file
+    pdf = b"%PDF-1.4\n" + b"x" * 5000
+    other = uploads.create_session("pdf", "book.pdf", len(pdf), "application/pdf")
+
+    async def body():
+        yield pdf
+
+    asyncio.run(uploads.append_chunk(other, 0, body()))
+    uploads._digests.clear()
+    assert uploads.complete_session(other).sha256 == hashlib.sha256(pdf).hexdigest()
+
+    too_big = {"kind": "cover", "filename": "c.jpg", "size": uploads.UPLOAD_RULES["cover"].max_bytes + 1}
+    assert client.post("/api/book/uploads", headers=headers, json=too_big).status_code == 413
+    with pytest.raises(uploads.UnsupportedMediaType):
+        uploads.store_upload(io.BytesIO(b"<html>not an image</html>"), "cover")
+    assert not list((tmp_path / "covers").iterdir())  # the temp file was removed
+
+
+def test_multipart_uploads_write_and_hash_off_the_event_loop(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(media_store, "MEDIA_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_BYTES", 256)
+    db.add(User(username="admin", name="Admin", email="admin@example.com", password="x", role=UserRoleEnum.ADMIN))
+    db.commit()
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": "admin", "role": "ADMIN"})}
+    client = TestClient(app)
+    cover = b"\x89PNG\r\n\x1a\n" + b"pixels" * 200
+
+    threaded = []
+    run_sync = uploads.to_thread.run_sync
+
+    async def spy(func, *args, **kwargs):
+        threaded.append(getattr(func, "__name__", type(func).__name__))
+        return await run_sync(func, *args, **kwargs)
+
+    monkeypatch.setattr(uploads.to_thread, "run_sync", spy)
+    created = client.post("/api/book/create", headers=headers, data={
+        "title": "Emma", "author": "Austen", "format": "HARD_COPY",
+    }, files={"cover_file": ("emma.png", cover, "image/png")})
+    assert created.status_code == 201
+    name = hashlib.sha256(cover).hexdigest() + ".png"
+    assert created.json()["cover"].endswith("/media/covers/" + name)
+    assert (tmp_path / "covers" / name).read_bytes() == cover
+    # Every chunk was written and hashed on a worker thread
+    assert threaded.count("write") == -(-len(cover) // 256) and "finish" in threaded
+    db.expire_all()
+    assert db.get(MediaBlob, name).ref_count == 1
+
+    refused = client.put(f"/api/book/edit/{created.json()['id']}", headers=headers, files={
+        "pdf_upload": ("emma.pdf", b"<html>not a pdf</html>", "application/pdf"),
+    })
+    assert refused.status_code == 415
+    assert [p.name for p in (tmp_path / "pdfs").iterdir()] == []  # the temp file was removed
+
+
+def test_media_store_deduplicates_counts_references_and_collects_orphans(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(media_store, "MEDIA_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "MEDIA_GC_GRACE_HOURS", 0)
+    cover = b"\x89PNG\r\n\x1a\n" + b"pixels" * 100
+
+    names = set()
+    for _ in range(2):  # the same cover uploaded for two editions
+        stored = uploads.store_upload(io.BytesIO(cover), "cover")
+        media_crud.register_blob(db, stored)
+        names.add(stored.filename)
+    assert len(names) == 1 and len(list((tmp_path / "covers").iterdir())) == 1
+    name = names.pop()
+
+    editions = [
+        book_crud.create_book(db, {"title": "Emma", "author": "Austen", "format": BookFormatEnum.HARD_COPY, "cover": name})
+        for _ in range(2)
+    ]
+    assert db.get(MediaBlob, name).ref_count == 2
+
+    book_crud.update_book(db, editions[0].id, {"cover": "https://example.com/emma.png"})
+    assert media_crud.collect_garbage(db)["rows"] == 0  # still named by the second edition
+    book_crud.delete_book(db, editions[1].id)
+    db.expire_all()
+    assert db.get(MediaBlob, name).ref_count == 0
+
+    # A Core write the listener does not see: GC checks the books table before deleting
+    db.execute(Book.__table__.update().where(Book.id == editions[0].id).values(cover=name))
+    db.commit()
+    assert media_crud.collect_garbage(db) == {"rows": 0, "bytes_freed": 0, "repaired": 1}
+    db.execute(Book.__table__.update().values(cover=None))
+    db.commit()
+    assert media_crud.recount_references(db) == 1
+    assert media_crud.collect_garbage(db)["bytes_freed"] == len(cover)
+    assert db.query(MediaBlob).count() == 0 and not list((tmp_path / "covers").iterdir())
+
+
+def test_media_routes_serve_ranges_and_cache_the_file_lookup(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(media_store, "MEDIA_DIR", str(tmp_path))
+    media_file_cache.clear()
+    audio = b"ID3" + bytes(range(256)) * 40
+    stored = uploads.store_upload(io.BytesIO(audio), "audio")
+    book = book_crud.create_book(db, {
+        "title": "Emma (unabridged)", "author": "Austen", "format": BookFormatEnum.AUDIO_BOOK,
+        "audio_file": stored.filename,
+    })
+    client = TestClient(app)
+    path = f"/api/book/play/audio/{book.id}"
+
+    first = client.get(path, headers={"Range": "bytes=0-99"})
+    assert first.status_code == 206 and first.content == audio[:100]
+    assert first.headers["etag"] == f'"{stored.sha256}"' and first.headers["content-type"] == "audio/mpeg"
+    assert first.headers["content-disposition"] == 'inline; filename="Emma-unabridged.mp3"'
+
+    # Seeks and revalidation are answered from the per-worker cache
+    with capture_queries(async_engine.sync_engine) as captured:
+        seek = client.get(path, headers={"Range": "bytes=1000-1099,-10"})
+        assert client.get(path, headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+    assert captured == []
+    assert seek.status_code == 206 and seek.headers["content-type"].startswith("multipart/byteranges")
+    assert audio[1000:1100] in seek.content and audio[-10:] in seek.content
+
+    book_crud.update_book(db, book.id, {"audio_file": "https://example.com/emma.mp3"})
+    assert client.get(path).json() == {"audio_url": "https://example.com/emma.mp3"}
+
+
+def test_book_serializer_matches_book_response_apart_from_media_urls(db, monkeypatch):
+    book = book_crud.create_book(db, {
+        "title": "Emma", "author": "Austen", "isbn": "9780141439587", "format": BookFormatEnum.AUDIO_BOOK,
+        "copies_total": 1, "copies_available": 1, "description": "Highbury",
+        "cover": "emma.png", "pdf_file": "emma.pdf",
+        "audio_file": "https://cdn.example.com/emma.mp3",
+    })
+    expected = BookResponse.from_orm(book).dict()
+
+    # Without a request, media paths stay as stored
+    assert BookSerializer(None).row(book) == expected
+
+    monkeypatch.setattr(settings, "MEDIA_SIGNED_URLS", False)
+    row = BookSerializer("http://lib.example").row(book)
+    assert list(row) == list(expected)
+    assert row == {
+        **expected,
+        "cover": "http://lib.example/media/covers/emma.png",
+        "pdf_file": "http://lib.example/media/pdfs/emma.pdf",
+    }
+
+    monkeypatch.setattr(settings, "MEDIA_SIGNED_URLS", True)
+    row = BookSerializer("http://lib.example").row(book)
+    assert row["cover"] == "http://lib.example/media/covers/emma.png"
+    assert row["pdf_file"] == "http://lib.example/media/signed/" + media_urls.signed_path("pdfs/emma.pdf")
+    # External URLs are never rewritten or signed
+    assert row["audio_file"] == "https://cdn.example.com/emma.mp3"
+    assert {k: v for k, v in row.items() if k not in MEDIA_DIRS} == {
+        k: v for k, v in expected.items() if k not in MEDIA_DIRS
+    }
+
+
+def test_book_serializer_applies_book_response_defaults_to_null_columns(db):
+    # copies_* and category_id are nullable and left unset here
+    book = book_crud.create_book(db, {"title": "Emma", "author": "Austen", "format": BookFormatEnum.E_BOOK})
+    assert book.copies_total is None and book.copies_available is None
+    serializer = BookSerializer(None)
+
+    row = serializer.row(book)
+    assert row == BookResponse.from_orm(book).dict()
+    assert row["copies_total"] == row["copies_available"] == 1 and row["category_id"] is None
+
+    # Coerced in the payload only; the instance keeps its value
+    for average_rating in (None, 4):
+        book.average_rating = average_rating
+        row = serializer.row(book)
+        assert row == BookResponse.from_orm(book).dict()
+        assert type(row["average_rating"]) is float
+    assert type(book.average_rating) is int
+
+
+def test_book_payloads_link_media_through_signed_urls(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(media_store, "MEDIA_DIR", str(tmp_path))
+    pdf = b"%PDF-1.7\n" + b"pages" * 200
+    stored = uploads.store_upload(io.BytesIO(pdf), "pdf")
+    book = book_crud.create_book(db, {
+        "title": "Emma", "author": "Austen", "format": BookFormatEnum.E_BOOK, "pdf_file": stored.filename,
+    })
+    client = TestClient(app)
+
+    url = client.get(f"/api/book/retrieve/{book.id}").json()["pdf_file"]
+    assert url.startswith(f"http://testserver/media/signed/pdfs/{stored.filename}?expires=")
+    with capture_queries(engine) as captured, capture_queries(async_engine.sync_engine) as captured_async:
+        response = client.get(url, headers={"Range": "bytes=0-8"})
+    assert captured == [] and captured_async == []
+    assert response.status_code == 206 and response.content == pdf[:9]
+    assert response.headers["etag"] == f'"{stored.sha256}"'
+
+    assert client.get(url[:-1] + ("A" if url[-1] != "A" else "B")).status_code == 403
+    expires = media_urls.expires_at() - 3 * settings.MEDIA_URL_TTL_SECONDS
+    expired = media_urls.signed_path(f"pdfs/{stored.filename}", expires)
+    assert client.get(f"/media/signed/{expired}").status_code == 403
+    # Only signed links reach PDFs
+    assert client.get(f"/media/pdfs/{stored.filename}").status_code == 404
+
+
+def test_async_book_and_category_crud(db):
+    async def scenario():
+        async with AsyncSessionLocal() as session:
+            category = await aio_category.create_category(session, CategoryCreate(name="Sci-Fi"))
+            assert await aio_category.create_category(session, CategoryCreate(name="sci-fi")) is None
+            dune = await aio_book.create_book(session, {
+                "title": "Dune", "author": "Herbert", "format": BookFormatEnum.HARD_COPY,
+                "category_id": category.id, "copies_total": 2, "copies_available": 0,
+            })
+            emma = await aio_book.create_book(session, {
+                "title": "Emma", "author": "Austen", "format": BookFormatEnum.E_BOOK, "copies_available": 1,
+            })
+
+            assert [b.id for b in await aio_book.get_books_by_ids(session, [emma.id, 999, dune.id])] == [emma.id, dune.id]
+            assert [b.title for b in (await aio_book.get_available_books(session))["data"]] == ["Emma"]
+            assert [b.title for b in (await aio_book.get_books_by_category(session, category.id))["data"]] == ["Dune"]
+            assert await aio_book.is_book_available(session, dune.id) is False
+
+            await aio_book.update_book(session, dune.id, {"copies_available": 1})
+            assert await aio_book.is_book_available(session, dune.id) is True
+            counted = await aio_category.get_category_by_id(session, category.id, breakdown=True)
+            assert (counted.book_count, counted.available_count) == (1, 1)
+
+            await aio_book.delete_book(session, emma.id)
+            assert await aio_book.get_book(session, emma.id) is None
+
+    asyncio.run(scenario())
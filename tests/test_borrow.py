@@ -0,0 +1,298 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.scheduler import scheduler
+from app.core.settings_cache import settings_cache
+from app.crud import borrow as borrow_crud
+from app.crud import review as review_crud
+from app.crud import settings as settings_crud
+from app.crud.inventory import BorrowLimitReached, ExtendLimitReached, InventoryError
+from app.db import counters
+from app.db.explain import assert_no_full_scans, capture_queries
+from app.db.session import SessionLocal, engine
+from app.db.versioning import bump_versions
+from app.main import app
+from app.models.book import Book, BookFormatEnum
+from app.models.booking import Booking, BookingStatusEnum
+from app.models.borrow import Borrow, BorrowStatus
+from app.models.notification import Notification
+from app.models.settings import AdminSettings
+from app.models.user import User
+from app.schemas.borrow import BorrowCreate
+from app.schemas.review import ReviewCreateRequest, ReviewUpdateRequest
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.security import create_access_token
+from app.utils.streaming import ResponseFormat, stream_query
+
+
+def make_user_and_book(db):
+    user = User(username="reader", name="Reader", email="reader@example.com", password="x")
+    book = Book(title="Dune", author="Herbert", format=BookFormatEnum.HARD_COPY, copies_total=3, copies_available=3)
+    db.add_all([user, book])
+    db.commit()
+    return user, book
+
+
+def test_borrow_hot_queries_use_indexes(db):
+    user, book = make_user_and_book(db)
+
+    with capture_queries(engine) as captured:
+        borrow_crud.create_borrow(db, BorrowCreate(user_id=user.id, book_id=book.id), user.id)
+        borrow_crud.accept_borrow(db, user.id, book.id)
+        borrow_crud.extend_due_date(db, user.id, book.id)
+        borrow_crud.get_active_borrows(db)
+        borrow_crud.get_overdue_borrows(db)
+        borrow_crud.reject_borrow(db, user.id, book.id)
+        borrow_crud.return_book(db, user.id, book.id)
+
+    assert captured
+    # admin_settings holds a single row, a scan of it is expected
+    assert_no_full_scans(engine, [q for q in captured if "FROM admin_settings" not in q[0]])
+
+
+def test_cursors_round_trip_and_page_borrowed_books_without_gaps(db):
+    created = datetime(2024, 5, 1, 12, 30, 15)
+    cursor = encode_cursor(created, 42)
+    assert decode_cursor(cursor, Borrow.created_at, Borrow.id) == [created, 42]
+    assert decode_cursor(encode_cursor(date(2024, 5, 1), 7), Borrow.due_date, Borrow.id) == [date(2024, 5, 1), 7]
+    for bad in ("not-a-cursor", encode_cursor(1, 2, 3)):
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor(bad, Borrow.created_at, Borrow.id)
+        assert exc.value.status_code == 400
+
+    user, book = make_user_and_book(db)
+    today = date.today()
+    # Equal created_at on every row: the id tiebreak alone keeps pages apart
+    db.add_all([
+        Borrow(user_id=user.id, book_id=book.id, borrow_date=today, due_date=today, created_at=created,
+               status=BorrowStatus.RETURNED if i == 2 else BorrowStatus.ACTIVE)
+        for i in range(6)
+    ])
+    db.commit()
+    active = [b.id for b in db.query(Borrow).filter(Borrow.status == BorrowStatus.ACTIVE).order_by(Borrow.id.desc())]
+
+    client = TestClient(app)
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": user.username, "role": "USER"})}
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, "include_total": True}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/api/dashboard/borrowed-books", params=params, headers=headers).json()
+        assert len(page["data"]) <= 2 and page["meta"]["total"] == len(active)
+        seen += [row["id"] for row in page["data"]]
+        cursor = page["meta"]["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == active
+    assert client.get("/api/dashboard/borrowed-books", params={"cursor": "garbage"}, headers=headers).status_code == 400
+
+
+def test_borrow_list_streams_every_row_as_ndjson_or_a_json_array(db):
+    user, book = make_user_and_book(db)
+    today = date.today()
+    db.add_all([
+        Borrow(user_id=user.id, book_id=book.id, borrow_date=today, due_date=today + timedelta(days=i),
+               status=BorrowStatus.ACTIVE)
+        for i in range(5)
+    ])
+    db.commit()
+    newest_first = [b.id for b in db.query(Borrow).order_by(Borrow.created_at.desc(), Borrow.id.desc())]
+    client = TestClient(app)
+
+    ndjson = client.get("/api/borrow/list", params={"format": "ndjson", "limit": 1})
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    assert ndjson.headers["content-disposition"] == 'attachment; filename="borrows.ndjson"'
+    lines = ndjson.text.splitlines()
+    # Every row, not one page
+    assert [json.loads(line)["id"] for line in lines] == newest_first
+
+    array = client.get("/api/borrow/list", params={"format": "json"})
+    assert array.headers["content-type"] == "application/json"
+    assert array.json() == [json.loads(line) for line in lines]
+    assert client.get("/api/borrow/list", params={"limit": 2}).json()["meta"]["next_cursor"]
+
+    async def collect(response):
+        return [chunk async for chunk in response.body_iterator]
+
+    # Batches are encoded and sent one chunk at a time, with valid separators between them
+    def build(session):
+        return session.query(Borrow).order_by(Borrow.id)
+    for fmt in (ResponseFormat.JSON, ResponseFormat.NDJSON):
+        response = stream_query(SessionLocal, build, lambda b: {"id": b.id}, fmt, batch_size=2)
+        chunks = asyncio.run(collect(response))
+        body = b"".join(chunks)
+        if fmt == ResponseFormat.JSON:
+            assert len(chunks) == 5 and json.loads(body) == [{"id": i} for i in sorted(newest_first)]
+        else:
+            assert len(chunks) == 3 and [json.loads(line) for line in body.splitlines()] == [
+                {"id": i} for i in sorted(newest_first)
+            ]
+    empty = stream_query(SessionLocal, lambda s: s.query(Borrow).filter(Borrow.id < 0), dict, ResponseFormat.JSON)
+    assert json.loads(b"".join(asyncio.run(collect(empty)))) == []
+
+
+def test_borrow_and_review_counters_follow_writes(db):
+    user, book = make_user_and_book(db)
+    borrow_crud.create_borrow(db, BorrowCreate(user_id=user.id, book_id=book.id), user.id)
+    borrow_crud.return_book(db, user.id, book.id)
+    borrow_crud.create_borrow(db, BorrowCreate(user_id=user.id, book_id=book.id), user.id)
+    review = review_crud.create_review(db, book.id, ReviewCreateRequest(userId=user.id, rating=4))
+    review_crud.update_review(db, review.id, ReviewUpdateRequest(rating=2))
+
+    assert borrow_crud.get_borrow_stats(db)["totalBorrows"] == 2
+    assert borrow_crud.get_user_borrow_stats(db, user.id) == {
+        "total_borrowed_books": 2, "total_returned_books": 1, "total_overdue_books": 0,
+    }
+    assert review_crud.get_review_stats(db, book.id) == {"average_rating": 2, "total_reviews": 1}
+    assert not any(counters.reconcile(db)["drift"].values())
+
+    # Core writes skip the listeners, reconcile finds and repairs the drift
+    db.execute(Borrow.__table__.delete())
+    db.commit()
+    assert counters.reconcile(db, fix=True)["drift"]["user_borrows"] == 2
+    assert borrow_crud.get_user_borrow_stats(db, user.id)["total_borrowed_books"] == 0
+
+
+def test_concurrent_borrows_never_oversell_a_book(db):
+    users = [User(username=f"u{i}", name="U", email=f"u{i}@example.com", password="x") for i in range(200)]
+    book = Book(title="Dune", author="Herbert", format=BookFormatEnum.HARD_COPY, copies_total=25, copies_available=25)
+    db.add_all(users + [book])
+    db.commit()
+    user_ids, book_id = [u.id for u in users], book.id
+
+    def attempt(user_id):
+        session = SessionLocal()
+        try:
+            borrow_crud.create_borrow(session, BorrowCreate(user_id=user_id, book_id=book_id), user_id)
+            return user_id
+        except InventoryError:
+            return None
+        finally:
+            session.close()
+
+    # 2000 requests, ten per user, all racing for the same 25 copies
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        winners = [u for u in pool.map(attempt, user_ids * 10) if u is not None]
+
+    db.expire_all()
+    assert len(winners) == len(set(winners)) == 25
+    assert db.get(Book, book_id).copies_available == 0
+    assert db.query(Borrow).count() == 25
+    assert not any(counters.reconcile(db)["drift"].values())
+
+
+def test_concurrent_requests_and_rejects_lock_the_book_first(db):
+    users = [User(username=f"u{i}", name="U", email=f"u{i}@example.com", password="x") for i in range(40)]
+    book = Book(title="Dune", author="Herbert", format=BookFormatEnum.HARD_COPY, copies_total=20, copies_available=20)
+    db.add_all(users + [book])
+    db.commit()
+    user_ids, book_id = [u.id for u in users], book.id
+    for user_id in user_ids[:20]:
+        borrow_crud.create_borrow(db, BorrowCreate(user_id=user_id, book_id=book_id), user_id)
+
+    # Every transition updates the book row before the borrow and counter rows, like create_borrow
+    with capture_queries(engine) as captured:
+        borrow_crud.reject_borrow(db, user_ids[0], book_id)
+    tables = [statement.split()[1] for statement, _ in captured if statement.startswith("UPDATE")]
+    assert tables[:2] == ["books", "borrows"]
+
+    def attempt(action, user_id):
+        session = SessionLocal()
+        try:
+            if action == "reject":
+                return borrow_crud.reject_borrow(session, user_id, book_id) is not None
+            borrow_crud.create_borrow(session, BorrowCreate(user_id=user_id, book_id=book_id), user_id)
+            return True
+        except InventoryError:
+            return False
+        finally:
+            session.close()
+
+    # Rejections of the held copies race new requests for them
+    jobs = [("reject", u) for u in user_ids[1:20]] + [("request", u) for u in user_ids[20:]] * 3
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        list(pool.map(lambda job: attempt(*job), jobs))
+
+    db.expire_all()
+    outstanding = db.query(Borrow).filter(Borrow.status == BorrowStatus.REQUESTED).count()
+    assert db.get(Book, book_id).copies_available == 20 - outstanding
+    assert not any(counters.reconcile(db)["drift"].values())
+
+
+def test_borrow_and_extend_limits_are_enforced(db):
+    user, book = make_user_and_book(db)
+    other = Book(title="Emma", author="Austen", format=BookFormatEnum.HARD_COPY, copies_total=1, copies_available=1)
+    db.add(other)
+    db.commit()
+    settings_crud.set_borrow_book_limit(db, 1)
+    settings_crud.set_borrow_extend_limit(db, 1)
+
+    borrow_crud.create_borrow(db, BorrowCreate(user_id=user.id, book_id=book.id), user.id)
+    with pytest.raises(BorrowLimitReached):
+        borrow_crud.create_borrow(db, BorrowCreate(user_id=user.id, book_id=other.id), user.id)
+    assert db.get(Book, other.id).copies_available == 1  # the reservation was rolled back
+
+    borrow_crud.extend_due_date(db, user.id, book.id)
+    with pytest.raises(ExtendLimitReached):
+        borrow_crud.extend_due_date(db, user.id, book.id)
+
+    borrow_crud.return_book(db, user.id, book.id)
+    assert db.get(Book, book.id).copies_available == 3
+
+
+def test_settings_cache_polls_the_version_and_reloads_on_change(db, monkeypatch):
+    settings_crud.set_borrow_book_limit(db, 2)
+    assert settings_crud.get_cached_settings(db).borrow_book_limit == 2
+
+    with capture_queries(engine) as captured:
+        settings_crud.get_cached_settings(db)
+    assert captured == []
+
+    # Another worker's write: only the table version tells this worker
+    monkeypatch.setattr(settings_cache, "poll_seconds", 0)
+    db.execute(AdminSettings.__table__.update().values(borrow_book_limit=5))
+    bump_versions(db.connection(), ["admin_settings"])
+    db.commit()
+    assert settings_crud.get_cached_settings(db).borrow_book_limit == 5
+
+
+def test_status_jobs_flip_overdue_borrows_and_expired_bookings(db):
+    user, book = make_user_and_book(db)
+    borrow = borrow_crud.create_borrow(db, BorrowCreate(user_id=user.id, book_id=book.id), user.id)
+    borrow_crud.accept_borrow(db, user.id, book.id)
+    db.execute(Borrow.__table__.update().values(due_date=date.today() - timedelta(days=2)))
+    db.add(Booking(user_id=user.id, book_id=book.id, booking_date=date.today() - timedelta(days=5),
+                   expected_available_date=date.today() - timedelta(days=1)))
+    db.commit()
+
+    scheduler.run_job("mark_overdue_borrows")
+    scheduler.run_job("expire_bookings")
+    scheduler.run_job("mark_overdue_borrows")  # nothing left to flip
+
+    db.expire_all()
+    assert [b.id for b in borrow_crud.get_overdue_borrows(db)["data"]] == [borrow.id]
+    assert borrow_crud.get_borrow_stats(db)["overdueBorrows"] == 1
+    assert borrow_crud.get_user_borrow_stats(db, user.id)["total_overdue_books"] == 1
+    assert db.query(Booking).one().status == BookingStatusEnum.EXPIRED
+    assert db.query(Notification).filter(Notification.recipient == user.email).count() == 2
+    assert not any(counters.reconcile(db)["drift"].values())
+    stats = scheduler.job_stats("mark_overdue_borrows")
+    assert stats["runs"] >= 2 and stats["rows"] >= 1 and stats["last_result"] == {"rows": 0, "notifications": 0}
+
+    # An extension that still ends in the past leaves the borrow overdue
+    borrow_crud.extend_due_date(db, user.id, book.id, extend_days=1)
+    extended = db.get(Borrow, borrow.id)
+    assert extended.status == BorrowStatus.OVERDUE and extended.due_date == date.today() - timedelta(days=1)
+
+    # Extending past today puts the borrow back on loan
+    borrow_crud.extend_due_date(db, user.id, book.id, extend_days=7)
+    extended = db.get(Borrow, borrow.id)
+    assert extended.status == BorrowStatus.ACTIVE and extended.due_date == date.today() + timedelta(days=6)
+    assert not any(counters.reconcile(db)["drift"].values())
@@ -0,0 +1,71 @@
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+
+from app.core.user_cache import user_cache
+from app.crud import notification as notification_crud
+from app.crud.aio import user as aio_user
+from app.db.explain import assert_no_full_scans, capture_queries
+from app.db.session import engine
+from app.main import app
+from app.models.user import User, UserRoleEnum
+from app.utils.hashing import PasswordHasher, pwd_context
+from app.utils.security import create_access_token
+
+
+def test_unread_notifications_use_index(db):
+    with capture_queries(engine) as captured:
+        notification_crud.get_unread_notifications(db, "reader@example.com")
+
+    assert_no_full_scans(engine, captured)
+
+
+def test_current_user_is_cached_and_invalidated_on_role_change(db):
+    user = User(username="cached", name="Cached", email="cached@example.com", password="x")
+    db.add(user)
+    db.commit()
+    user_cache.clear()
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": "cached", "role": "USER"})}
+    client = TestClient(app)
+
+    assert client.get("/api/dashboard/me", headers=headers).json()["role"] == "USER"
+    with capture_queries(engine) as captured:
+        assert client.get("/api/dashboard/me", headers=headers).status_code == 200
+    assert not [s for s, _ in captured if "FROM users" in s]
+
+    user.role = UserRoleEnum.ADMIN
+    db.commit()
+    assert client.get("/api/dashboard/me", headers=headers).json()["role"] == "ADMIN"
+
+    user.is_active = False
+    db.commit()
+    assert client.get("/api/dashboard/me", headers=headers).status_code == 403
+
+
+def test_login_upgrades_an_outdated_hash_and_answers_429_when_busy(db, monkeypatch):
+    inline = PasswordHasher(workers=0, queue_limit=0, backpressure=True, wait_seconds=0, rate=0)
+    monkeypatch.setattr(aio_user, "password_hasher", inline)
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("secret")
+    db.add(User(username="legacy", name="Legacy", email="legacy@example.com", password=old_hash))
+    db.commit()
+    client = TestClient(app)
+    credentials = {"username": "legacy", "password": "secret"}
+
+    assert client.post("/api/auth/login", json=credentials).status_code == 200
+    db.expire_all()
+    upgraded = db.query(User).filter_by(username="legacy").one().password
+    assert upgraded != old_hash and pwd_context.identify(upgraded) == "bcrypt" and not pwd_context.needs_update(upgraded)
+    assert client.post("/api/auth/login", json={**credentials, "password": "wrong"}).status_code == 401
+
+    # Login rate: one token, then the bucket is empty
+    limited = PasswordHasher(workers=0, queue_limit=0, backpressure=True, wait_seconds=0, rate=0.001, burst=1)
+    monkeypatch.setattr(aio_user, "password_hasher", limited)
+    assert client.post("/api/auth/login", json=credentials).status_code == 200
+    busy = client.post("/api/auth/login", json=credentials)
+    assert busy.status_code == 429 and busy.headers["retry-after"] == "1"
+
+    # Capacity: with every slot taken the request is refused at once, not queued
+    full = PasswordHasher(workers=1, queue_limit=0, backpressure=True, wait_seconds=5, rate=0)
+    full._slots.acquire()
+    monkeypatch.setattr(aio_user, "password_hasher", full)
+    assert client.post("/api/auth/login", json=credentials).status_code == 429
+    assert limited.rejected == 1 and full.rejected == 1